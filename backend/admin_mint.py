@@ -2,222 +2,198 @@
 
 import os
 import time
-import asyncio
-import textwrap
-from PIL import Image, ImageDraw, ImageFont
+import threading
 from dotenv import load_dotenv
 
 from aptos_sdk.account import Account
-from aptos_sdk.async_client import RestClient
 from aptos_sdk.transactions import (
     EntryFunction,
     TransactionArgument,
     TransactionPayload,
-    SignedTransaction
 )
 from aptos_sdk.bcs import Serializer
 
+from mint_engine import MintEngine, SignerPool, MINT_TIMEOUT
+from metrics import Callback
+from chain_state import COLLECTION_NAME
+
+# Rendering lives in renderer.py; re-exported for existing callers
+from renderer import TEMPLATE_PATH, FONT_PATH, generate_certificate_png
+
 
 # ============================================================
 #                 PATH FIXES (ABSOLUTE & SAFE)
 # ============================================================
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))        # /backend
-TEMPLATE_PATH = os.path.join(BASE_DIR, "template.png")       # backend/template.png
-
-# Frontend/Fonts folder (InterLocal)
-FONT_PATH = os.path.abspath(
-    os.path.join(BASE_DIR, "..", "frontend", "fonts", "inter.ttf")
-)
-
 print("[PATH] Template:", TEMPLATE_PATH)
 print("[PATH] Font:", FONT_PATH)
 
 load_dotenv()
 
-NODE_URL = "https://fullnode.devnet.aptoslabs.com/v1"
+# Override to point at a local node or mock_aptos_node.py
+NODE_URL = os.getenv("APTOS_NODE_URL", "https://fullnode.devnet.aptoslabs.com/v1")
 PRIVATE_KEY = os.getenv("UNIVERSITY_PRIVATE_KEY")
 
 if not PRIVATE_KEY:
     raise Exception("UNIVERSITY_PRIVATE_KEY missing in .env")
 
-COLLECTION_NAME = "Credlytic - Hack"
 university_account = Account.load_key(PRIVATE_KEY)
 
+# Extra signing accounts minting alongside the university account, each
+# into its own "Credlytic - Hack" collection (provisioned by
+# create_collec.py --signers N). Comma-separated private keys.
+MINT_SIGNER_KEYS = [k.strip() for k in os.getenv("MINT_SIGNER_KEYS", "").split(",") if k.strip()]
+signer_accounts = [Account.load_key(k) for k in MINT_SIGNER_KEYS]
 
-# ============================================================
-#                         FONT HELPERS
-# ============================================================
-
-def safe_font(size):
-    try:
-        if os.path.exists(FONT_PATH):
-            return ImageFont.truetype(FONT_PATH, size)
-        return ImageFont.load_default()
-    except Exception:
-        return ImageFont.load_default()
-
-
-def fit_font_for_width(draw, text, start_size, max_width, min_size=12):
-    size = start_size
-    while size >= min_size:
-        f = safe_font(size)
-        width = draw.textbbox((0, 0), text, font=f)[2]
-        if width <= max_width:
-            return f
-        size -= 1
-    return safe_font(min_size)
-
-
-def wrap_text(draw, text, font, max_width):
-    if not text:
-        return [""]
-
-    lines = textwrap.wrap(text, width=60)
-    final = []
-
-    for line in lines:
-        if draw.textbbox((0, 0), line, font=font)[2] <= max_width:
-            final.append(line)
-        else:
-            cur = ""
-            for ch in line:
-                if draw.textbbox((0, 0), cur + ch, font=font)[2] <= max_width:
-                    cur += ch
-                else:
-                    final.append(cur)
-                    cur = ch
-            if cur:
-                final.append(cur)
-
-    return final
 
 # ============================================================
-#                CERTIFICATE GENERATOR (PNG + PDF)
+#                 APTOS MINTING LOGIC
 # ============================================================
 
-def generate_certificate_png(student_name, course_name, tx_hash, token_name, out_path):
-    try:
-        # Load template
-        if not os.path.exists(TEMPLATE_PATH):
-            print("[ERROR] Template missing:", TEMPLATE_PATH)
-            return None
-
-        img = Image.open(TEMPLATE_PATH).convert("RGB")
-        draw = ImageDraw.Draw(img)
-
-        # Fonts
-        font_name = safe_font(60)
-        font_course = safe_font(45)
-        font_tx_size = 22
-
-        # Coordinates
-        name_xy = (726, 526)
-        course_xy = (840, 674)
-        tx_xy = (699, 765)
-
-        # Draw main text fields
-        draw.text(name_xy, student_name, fill="white", font=font_name)
-        draw.text(course_xy, course_name, fill="white", font=font_course)
-
-        # TX hash text building
-        tx_text = f"Blockchain Verified Tx: {tx_hash}"
-
-        max_tx_width = int(img.size[0] * 0.70)
-        font_tx = fit_font_for_width(draw, tx_text, font_tx_size, max_tx_width)
-
-        lines = wrap_text(draw, tx_text, font_tx, max_tx_width)
-        line_h = draw.textbbox((0, 0), "Ay", font=font_tx)[3]
-
-        start_y = tx_xy[1] - (line_h * len(lines) // 2)
-
-        for i, line in enumerate(lines):
-            draw.text(
-                (tx_xy[0], start_y + i * line_h),
-                line,
-                fill="gray",
-                font=font_tx
-            )
-
-        # Ensure directories exist
-        os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
-
-        # Save PNG
-        try:
-            img.save(out_path, "PNG")
-        except:
-            print("[ERR] PNG save failed")
+_stamp_lock = threading.Lock()
+_last_stamp = 0
+
+
+def _unique_stamp():
+    """
+    Millisecond timestamp, strictly increasing within the process.
+    Token names must be unique in the collection, and pipelined mints
+    of the same student name can land in the same second.
+    """
+    global _last_stamp
+    with _stamp_lock:
+        _last_stamp = max(_last_stamp + 1, int(time.time() * 1000))
+        return _last_stamp
+
+
+def token_name_for(student_name):
+    return f"Certificate: {student_name} #{_unique_stamp()}"
+
+
+def build_mint_payload(student_name, course_name, student_email, creator=None, token_name=None):
+    # 0x3::token only lets a collection's creator mint into it, so
+    # `creator` is the signing account
+    creator = creator or university_account.address()
+    token_name = token_name or token_name_for(student_name)
+
+    property_key = "student_id"
+    property_value = student_email.lower().encode("utf-8")
+
+    payload = EntryFunction.natural(
+        "0x3::token",
+        "create_token_script",
+        [],
+        [
+            TransactionArgument(COLLECTION_NAME, Serializer.str),
+            TransactionArgument(token_name, Serializer.str),
+            TransactionArgument(f"Awarded for: {course_name}", Serializer.str),
+            TransactionArgument(1, Serializer.u64),
+            TransactionArgument(1, Serializer.u64),
+            TransactionArgument("https://i.imgur.com/T0aCg0C.png", Serializer.str),
+            TransactionArgument(creator, Serializer.struct),
+            TransactionArgument(0, Serializer.u64),
+            TransactionArgument(0, Serializer.u64),
+            TransactionArgument([False] * 5, Serializer.sequence_serializer(Serializer.bool)),
+            TransactionArgument([property_key], Serializer.sequence_serializer(Serializer.str)),
+            TransactionArgument([property_value], Serializer.sequence_serializer(Serializer.to_bytes)),
+            TransactionArgument(["string"], Serializer.sequence_serializer(Serializer.str)),
+        ],
+    )
 
-        # Save PDF
-        pdf_path = os.path.splitext(out_path)[0] + ".pdf"
-        try:
-            img.convert("RGB").save(pdf_path, "PDF", resolution=100.0)
-        except Exception as e:
-            print("[PDF ERROR]", e)
-            return None
+    return TransactionPayload(payload), token_name
+
+
+def build_anchor_payload(root, size, batch_id, creator=None):
+    """
+    One token in the collection per Merkle batch (anchoring.py); its
+    merkle_root property is what anchored certificates verify against.
+    """
+    creator = creator or university_account.address()
+    token_name = f"Anchor: {batch_id}"
+
+    payload = EntryFunction.natural(
+        "0x3::token",
+        "create_token_script",
+        [],
+        [
+            TransactionArgument(COLLECTION_NAME, Serializer.str),
+            TransactionArgument(token_name, Serializer.str),
+            TransactionArgument(f"Merkle root of {size} certificates", Serializer.str),
+            TransactionArgument(1, Serializer.u64),
+            TransactionArgument(1, Serializer.u64),
+            TransactionArgument("https://i.imgur.com/T0aCg0C.png", Serializer.str),
+            TransactionArgument(creator, Serializer.struct),
+            TransactionArgument(0, Serializer.u64),
+            TransactionArgument(0, Serializer.u64),
+            TransactionArgument([False] * 5, Serializer.sequence_serializer(Serializer.bool)),
+            TransactionArgument(["merkle_root", "leaves"], Serializer.sequence_serializer(Serializer.str)),
+            TransactionArgument([root.encode("utf-8"), str(size).encode("utf-8")],
+                                Serializer.sequence_serializer(Serializer.to_bytes)),
+            TransactionArgument(["string", "string"], Serializer.sequence_serializer(Serializer.str)),
+        ],
+    )
 
-        return pdf_path
+    return TransactionPayload(payload), token_name
 
-    except Exception as e:
-        print("[CERT GENERATION ERROR]", e)
-        return None
 
+_engine = None
+_engine_lock = threading.Lock()
 
-# ============================================================
-#                 APTOS MINTING LOGIC
-# ============================================================
 
-async def _mint_async(student_name, course_name, student_email):
-    client = RestClient(NODE_URL)
+def get_mint_engine():
+    """Process-wide minting engine for the university account (started lazily)."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = MintEngine(university_account, NODE_URL).start()
+        return _engine
 
-    try:
-        timestamp = int(time.time())
-        token_name = f"Certificate: {student_name} #{timestamp}"
 
-        property_key = "student_id"
-        property_value = student_email.lower().encode("utf-8")
+_pool = None
 
-        payload = EntryFunction.natural(
-            "0x3::token",
-            "create_token_script",
-            [],
-            [
-                TransactionArgument(COLLECTION_NAME, Serializer.str),
-                TransactionArgument(token_name, Serializer.str),
-                TransactionArgument(f"Awarded for: {course_name}", Serializer.str),
-                TransactionArgument(1, Serializer.u64),
-                TransactionArgument(1, Serializer.u64),
-                TransactionArgument("https://i.imgur.com/T0aCg0C.png", Serializer.str),
-                TransactionArgument(university_account.address(), Serializer.struct),
-                TransactionArgument(0, Serializer.u64),
-                TransactionArgument(0, Serializer.u64),
-                TransactionArgument([False] * 5, Serializer.sequence_serializer(Serializer.bool)),
-                TransactionArgument([property_key], Serializer.sequence_serializer(Serializer.str)),
-                TransactionArgument([property_value], Serializer.sequence_serializer(Serializer.to_bytes)),
-                TransactionArgument(["string"], Serializer.sequence_serializer(Serializer.str)),
-            ],
-        )
 
-        raw_txn = await client.create_bcs_transaction(
-            university_account, TransactionPayload(payload)
-        )
+def get_signer_pool():
+    """
+    Process-wide pool of the university account and MINT_SIGNER_KEYS
+    (started lazily). With no extra keys it mints through the
+    university account alone, as before.
+    """
+    global _pool
+    engine = get_mint_engine()
+    with _engine_lock:
+        if _pool is None:
+            engines = [engine] + [MintEngine(a, NODE_URL) for a in signer_accounts]
+            _pool = SignerPool(engines).start()
+            Callback(
+                "credlytic_signer_in_flight", "Unconfirmed mints per signing account",
+                lambda: {a: s["in_flight"] for a, s in _pool.stats().items()}, ["signer"],
+            )
+            Callback(
+                "credlytic_signer_healthy", "1 if the signing account takes new mints",
+                lambda: {a: int(s["healthy"]) for a, s in _pool.stats().items()}, ["signer"],
+            )
+        return _pool
 
-        signed = SignedTransaction(raw_txn, university_account.sign_transaction(raw_txn))
 
-        tx_hash = await client.submit_bcs_transaction(signed)
-        await client.wait_for_transaction(tx_hash)
+def mint_certificate_async(student_name, course_name, student_email):
+    """Submit a mint without waiting; returns (Future of tx_hash, token_name)."""
+    token_name = token_name_for(student_name)
+    future = get_signer_pool().submit(
+        lambda creator: build_mint_payload(student_name, course_name, student_email,
+                                           creator, token_name)[0])
+    return future, token_name
 
-        return tx_hash, token_name
 
-    finally:
-        await client.close()
+def mint_certificate_with_email(student_name, course_name, student_email):
+    future, token_name = mint_certificate_async(student_name, course_name, student_email)
+    tx_hash = future.result(timeout=MINT_TIMEOUT)
+    return tx_hash, token_name
 
 
-def mint_certificate_with_email(student_name, course_name, student_email):
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    tx_hash, token_name = loop.run_until_complete(
-        _mint_async(student_name, course_name, student_email)
-    )
-    loop.close()
+def anchor_root(root, size, batch_id):
+    """Records a Merkle root on chain; returns (tx_hash, token_name) once committed."""
+    token_name = build_anchor_payload(root, size, batch_id)[1]
+    tx_hash = get_signer_pool().submit(
+        lambda creator: build_anchor_payload(root, size, batch_id, creator)[0]
+    ).result(timeout=MINT_TIMEOUT)
     return tx_hash, token_name
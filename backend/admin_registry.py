@@ -0,0 +1,71 @@
+# backend/admin_registry.py
+
+import os
+import time
+import threading
+from types import MappingProxyType
+
+
+# How often a read checks whether another process changed the bindings
+ADMIN_RELOAD_INTERVAL = float(os.getenv("ADMIN_RELOAD_INTERVAL", "2"))
+
+
+class AdminRegistry:
+    """
+    Admin wallet bindings held in memory.
+
+    Loaded once from the store. Reads look up an immutable snapshot: no
+    lock and no I/O, so auth checks during bulk issuance cost a dict
+    lookup. At most every reload_interval seconds a read also compares
+    the store's admins_version() and reloads if another process bound a
+    wallet. bind() writes through to the store (atomic, serialized
+    across processes) and then swaps in a new snapshot.
+    """
+
+    def __init__(self, store, reload_interval=ADMIN_RELOAD_INTERVAL):
+        self.store = store
+        self.reload_interval = reload_interval
+        self._write_lock = threading.Lock()
+        self._admins = MappingProxyType({})
+        self._version = None
+        self._next_check = 0.0
+        self.reload()
+
+    def reload(self):
+        with self._write_lock:
+            # Version first: a write landing in between only causes one
+            # more reload later, never a missed one
+            version = self.store.admins_version()
+            self._admins = MappingProxyType(dict(self.store.get_admins()))
+            self._version = version
+            self._next_check = time.monotonic() + self.reload_interval
+
+    def _maybe_reload(self):
+        self._next_check = time.monotonic() + self.reload_interval
+        try:
+            version = self.store.admins_version()
+        except Exception as e:
+            print("[ADMIN REGISTRY ERROR]", e)
+            return
+        if version is None or version != self._version:
+            self.reload()
+
+    # ---- read path ----
+    def get(self, email):
+        if time.monotonic() >= self._next_check:
+            self._maybe_reload()
+        return self._admins.get(email)
+
+    def all(self):
+        if time.monotonic() >= self._next_check:
+            self._maybe_reload()
+        return self._admins
+
+    # ---- write path ----
+    def bind(self, email, record):
+        with self._write_lock:
+            self.store.put_admin(email, record)
+            admins = dict(self._admins)
+            admins[email] = record
+            self._admins = MappingProxyType(admins)
+        return record
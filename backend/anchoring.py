@@ -0,0 +1,381 @@
+# backend/anchoring.py
+# Merkle-batched anchoring. With CERT_ANCHOR_MODE=merkle, certificates
+# are not minted one token each: their leaf hashes are collected into a
+# batch for up to ANCHOR_WINDOW seconds or ANCHOR_MAX_LEAVES leaves, and
+# one transaction records the batch's Merkle root on chain. Every
+# certificate keeps its inclusion proof; verification folds the proof
+# back to the root and, with check_chain, compares it with the root in
+# the anchor transaction.
+#
+#   leaf  = sha256(0x00 || canonical JSON of id, student, email, course)
+#   node  = sha256(0x01 || left || right)
+#
+# An odd node at the end of a level moves up unchanged. The certificate
+# id is random, so a proof's sibling hashes reveal nothing about other
+# students in the batch.
+
+import os
+import json
+import time
+import uuid
+import hashlib
+import threading
+from concurrent.futures import Future
+
+from storage import get_database, owner_alive, owner_id
+
+
+# ============================================================
+#                         CONFIG
+# ============================================================
+
+# mint: one token per certificate (default); merkle: batched roots
+CERT_ANCHOR_MODE = os.getenv("CERT_ANCHOR_MODE", "mint").strip().lower()
+# A batch is anchored when its oldest leaf is this old, or when it is full
+ANCHOR_WINDOW = float(os.getenv("ANCHOR_WINDOW", "60"))
+ANCHOR_MAX_LEAVES = int(os.getenv("ANCHOR_MAX_LEAVES", "4096"))
+ANCHOR_POLL_INTERVAL = float(os.getenv("ANCHOR_POLL_INTERVAL", "0.5"))
+
+# Batch lifecycle: open -> sealed -> anchored | failed
+# "owner" is the process submitting a sealed batch (storage.owner_id).
+ANCHOR_SCHEMA = """
+CREATE TABLE IF NOT EXISTS anchor_batches (
+    batch_id     TEXT PRIMARY KEY,
+    status       TEXT NOT NULL,
+    size         INTEGER NOT NULL DEFAULT 0,
+    root         TEXT,
+    tx_hash      TEXT,
+    token_name   TEXT,
+    error        TEXT,
+    owner        TEXT,
+    opened_at    REAL NOT NULL,
+    anchored_at  REAL
+);
+CREATE INDEX IF NOT EXISTS idx_anchor_batches_status ON anchor_batches(status);
+
+CREATE TABLE IF NOT EXISTS anchor_leaves (
+    cert_id   TEXT PRIMARY KEY,
+    batch_id  TEXT NOT NULL REFERENCES anchor_batches(batch_id),
+    position  INTEGER NOT NULL,
+    leaf      TEXT NOT NULL,
+    proof     TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_anchor_leaves_batch ON anchor_leaves(batch_id, position);
+"""
+
+
+class AnchorError(Exception):
+    """A batch could not be anchored; str(e) is safe to return to the admin."""
+
+
+def anchor_mode():
+    return CERT_ANCHOR_MODE == "merkle"
+
+
+# ============================================================
+#                       MERKLE TREE
+# ============================================================
+
+def _h(*parts):
+    return hashlib.sha256(b"".join(parts)).digest()
+
+
+def leaf_hash(entry):
+    """Hex leaf for a certificate entry (only fields fixed before anchoring)."""
+    canonical = json.dumps({
+        "id": entry.get("id"),
+        "student": entry.get("student"),
+        "email": (entry.get("email") or "").strip().lower(),
+        "course": entry.get("course"),
+    }, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return _h(b"\x00", canonical.encode("utf-8")).hex()
+
+
+def merkle_tree(leaves):
+    """Every level of the tree, leaves first, as lists of digests."""
+    level = [bytes.fromhex(x) for x in leaves]
+    levels = [level]
+    while len(level) > 1:
+        nxt = [_h(b"\x01", level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            nxt.append(level[-1])
+        levels.append(nxt)
+        level = nxt
+    return levels
+
+
+def merkle_root(leaves):
+    return merkle_tree(leaves)[-1][0].hex()
+
+
+def merkle_proofs(leaves):
+    """(root, proofs): proofs[i] is a list of [side, sibling] with side "L" or "R"."""
+    levels = merkle_tree(leaves)
+    proofs = []
+    for i in range(len(leaves)):
+        proof, pos = [], i
+        for level in levels[:-1]:
+            sibling = pos ^ 1
+            if sibling < len(level):
+                proof.append(["L" if sibling < pos else "R", level[sibling].hex()])
+            pos //= 2
+        proofs.append(proof)
+    return levels[-1][0].hex(), proofs
+
+
+def proof_root(leaf, proof):
+    """The root a leaf and its proof fold up to; None if the proof is malformed."""
+    try:
+        node = bytes.fromhex(leaf)
+        for side, sibling in proof:
+            sibling = bytes.fromhex(sibling)
+            node = _h(b"\x01", sibling, node) if side == "L" else _h(b"\x01", node, sibling)
+    except (TypeError, ValueError):
+        return None
+    return node.hex()
+
+
+def check_inclusion(entry):
+    """
+    (ok, reason) for an anchored entry: its fields hash to the recorded
+    leaf and the proof folds up to the recorded root. Entries minted
+    one token each pass.
+    """
+    anchor = entry.get("anchor")
+    if not anchor:
+        return True, None
+    if leaf_hash(entry) != anchor.get("leaf"):
+        return False, "Certificate fields do not match the anchored leaf"
+    if proof_root(anchor["leaf"], anchor.get("proof") or []) != anchor.get("root"):
+        return False, "Inclusion proof does not match the anchored root"
+    return True, None
+
+
+# ============================================================
+#                        ANCHORER
+# ============================================================
+
+class Anchorer:
+    """
+    Collects leaves into batches in the shared database, so every server
+    process adds to the same open batch. A background thread seals due
+    batches, submits each root in one transaction and stores every
+    leaf's proof.
+
+    anchor() returns a Future per certificate, resolved in the process
+    that asked, whichever process submitted the batch. A batch whose
+    submitting process died is submitted again on the next poll: the
+    same root anchored twice proves the same certificates.
+    """
+
+    def __init__(self, submit=None, window=ANCHOR_WINDOW, max_leaves=ANCHOR_MAX_LEAVES,
+                 poll_interval=ANCHOR_POLL_INTERVAL):
+        # submit(root, size, batch_id) -> (tx_hash, token_name); defaults
+        # to admin_mint.anchor_root, loaded on first use
+        self.submit = submit
+        self.window = window
+        self.max_leaves = max_leaves
+        self.poll_interval = poll_interval
+
+        self.db = get_database()
+        self.db.ensure_schema(ANCHOR_SCHEMA)
+
+        self._waiting = {}   # cert_id -> Future
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="anchorer", daemon=True)
+                self._thread.start()
+        return self
+
+    # ---- adding leaves ----
+    def anchor(self, cert_id, leaf):
+        """Adds a leaf (once per certificate); Future of {"tx_hash", "token_name", "anchor"}."""
+        full = False
+        with self.db.transaction() as c:
+            known = c.execute("SELECT 1 FROM anchor_leaves WHERE cert_id = ?", (cert_id,)).fetchone()
+            if not known:
+                batch = c.execute(
+                    "SELECT batch_id, size FROM anchor_batches WHERE status = 'open' AND size < ? "
+                    "ORDER BY opened_at LIMIT 1",
+                    (self.max_leaves,),
+                ).fetchone()
+                if batch is None:
+                    batch_id, size = uuid.uuid4().hex, 0
+                    c.execute(
+                        "INSERT INTO anchor_batches (batch_id, status, opened_at) "
+                        "VALUES (?, 'open', ?)",
+                        (batch_id, time.time()),
+                    )
+                else:
+                    batch_id, size = batch["batch_id"], batch["size"]
+                c.execute(
+                    "INSERT INTO anchor_leaves (cert_id, batch_id, position, leaf) VALUES (?, ?, ?, ?)",
+                    (cert_id, batch_id, size, leaf),
+                )
+                c.execute("UPDATE anchor_batches SET size = size + 1 WHERE batch_id = ?", (batch_id,))
+                full = size + 1 >= self.max_leaves
+        future = self.watch(cert_id)
+        if full:
+            self._wake.set()
+        return future
+
+    def watch(self, cert_id):
+        """Future for a certificate whose leaf was already added (e.g. before a restart)."""
+        with self._lock:
+            future = self._waiting.get(cert_id)
+            if future is None:
+                future = self._waiting[cert_id] = Future()
+        self.start()
+        self._wake.set()
+        return future
+
+    # ---- background ----
+    def _run(self):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                self._seal_due()
+                for batch_id in self._claim_sealed():
+                    self._submit(batch_id)
+                self._resolve()
+            except Exception as e:
+                print("[ANCHOR ERROR]", e)
+
+    def _seal_due(self):
+        with self.db.transaction() as c:
+            c.execute(
+                "UPDATE anchor_batches SET status = 'sealed' WHERE status = 'open' "
+                "AND (size >= ? OR opened_at <= ?)",
+                (self.max_leaves, time.time() - self.window),
+            )
+
+    def _claim_sealed(self):
+        """Sealed batches no other live process is submitting, now owned by this one."""
+        claimed = []
+        rows = self.db.execute(
+            "SELECT batch_id, owner FROM anchor_batches WHERE status = 'sealed'"
+        ).fetchall()
+        for r in rows:
+            if r["owner"] != owner_id() and owner_alive(r["owner"]):
+                continue
+            with self.db.transaction() as c:
+                cur = c.execute(
+                    "UPDATE anchor_batches SET owner = ? WHERE batch_id = ? AND status = 'sealed' "
+                    "AND owner IS ?",
+                    (owner_id(), r["batch_id"], r["owner"]),
+                )
+                if cur.rowcount == 1:
+                    claimed.append(r["batch_id"])
+        return claimed
+
+    def _submit(self, batch_id):
+        leaves = self.db.execute(
+            "SELECT cert_id, leaf FROM anchor_leaves WHERE batch_id = ? ORDER BY position",
+            (batch_id,),
+        ).fetchall()
+        root, proofs = merkle_proofs([r["leaf"] for r in leaves])
+        try:
+            submit = self.submit
+            if submit is None:
+                from admin_mint import anchor_root as submit
+            tx_hash, token_name = submit(root, len(leaves), batch_id)
+        except Exception as e:
+            with self.db.transaction() as c:
+                c.execute(
+                    "UPDATE anchor_batches SET status = 'failed', root = ?, error = ?, owner = NULL "
+                    "WHERE batch_id = ?",
+                    (root, str(e), batch_id),
+                )
+            print("[ANCHOR ERROR]", batch_id, e)
+            return
+
+        with self.db.transaction() as c:
+            c.executemany(
+                "UPDATE anchor_leaves SET proof = ? WHERE cert_id = ?",
+                [(json.dumps(p), r["cert_id"]) for r, p in zip(leaves, proofs)],
+            )
+            c.execute(
+                "UPDATE anchor_batches SET status = 'anchored', root = ?, tx_hash = ?, "
+                "token_name = ?, owner = NULL, anchored_at = ? WHERE batch_id = ?",
+                (root, tx_hash, token_name, time.time(), batch_id),
+            )
+        print(f"⚓ Anchored {len(leaves)} certificates in {tx_hash}")
+
+    _LEAF_QUERY = (
+        "SELECT l.cert_id, l.batch_id, l.position, l.leaf, l.proof, b.status, b.size, "
+        "b.root, b.tx_hash, b.token_name, b.error FROM anchor_leaves l "
+        "JOIN anchor_batches b ON b.batch_id = l.batch_id "
+    )
+
+    @staticmethod
+    def _result(r):
+        return {
+            "tx_hash": r["tx_hash"],
+            "token_name": r["token_name"],
+            "anchor": {
+                "batch": r["batch_id"],
+                "root": r["root"],
+                "leaf": r["leaf"],
+                "index": r["position"],
+                "size": r["size"],
+                "proof": json.loads(r["proof"]),
+            },
+        }
+
+    def _resolve(self):
+        with self._lock:
+            waiting = list(self._waiting)
+        if not waiting:
+            return
+        for start in range(0, len(waiting), 500):
+            chunk = waiting[start:start + 500]
+            rows = self.db.execute(
+                self._LEAF_QUERY +
+                f"WHERE l.cert_id IN ({','.join('?' * len(chunk))}) "
+                "AND b.status IN ('anchored', 'failed')",
+                chunk,
+            ).fetchall()
+            for r in rows:
+                with self._lock:
+                    future = self._waiting.pop(r["cert_id"], None)
+                if future is None:
+                    continue
+                if r["status"] == "failed":
+                    future.set_exception(AnchorError(f"Anchoring failed: {r['error']}"))
+                else:
+                    future.set_result(self._result(r))
+
+    def lookup(self, cert_id):
+        """The anchor() result for an already anchored certificate, or None."""
+        r = self.db.execute(
+            self._LEAF_QUERY + "WHERE l.cert_id = ? AND b.status = 'anchored'", (cert_id,)
+        ).fetchone()
+        return self._result(r) if r else None
+
+    # ---- status ----
+    def stats(self):
+        return {
+            r["status"]: r["n"]
+            for r in self.db.execute(
+                "SELECT status, COUNT(*) AS n FROM anchor_batches GROUP BY status"
+            )
+        }
+
+
+_anchorer = None
+_anchorer_lock = threading.Lock()
+
+
+def get_anchorer():
+    """Process-wide anchorer (its thread starts with the first certificate)."""
+    global _anchorer
+    with _anchorer_lock:
+        if _anchorer is None:
+            _anchorer = Anchorer()
+        return _anchorer
@@ -1,31 +1,177 @@
 # backend/app.py
 
-from flask import Flask, jsonify, request, send_from_directory
+from flask import (
+    Flask, Response, abort, g, jsonify, request, send_file, send_from_directory, stream_with_context,
+)
 from flask_cors import CORS
-import os, json
-from datetime import datetime, timezone
+import os
+import time
+from datetime import datetime, timedelta, timezone
+import gzip
 import base64
+import hashlib
+import json
+import re
+import functools
+import mimetypes
+import threading
+import multiprocessing
+
+from dotenv import load_dotenv
+
+# Before the imports below, which read their settings at import time
+load_dotenv()
+
+from storage import open_store, get_database, decode_cursor, normalize_tx_hash, LIST_SORTS
+from tx_index import TxIndex
+from admin_registry import AdminRegistry
+from search_index import SearchIndex, SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT
+from issuance import GENERATED_DIR
+from anchoring import anchor_mode, get_anchorer, check_inclusion
+from file_store import get_file_store, is_key, key_digest
+from render_cache import (
+    RenderError, get_render_cache, parse_lazy_name, resolve_attachment,
+    cache_stats as render_cache_stats,
+)
+from batch_jobs import BatchIssuer, BATCH_MAX_ROWS, parse_csv
+from mailer import Mailer
+from pipeline import IssuancePipeline
+from metrics import REGISTRY, CONTENT_TYPE, HTTP_SECONDS, Callback
+from tracing import (
+    TRACE_HEADER, LOG_REQUESTS, new_trace_id, set_trace_id, reset_trace_id, log_event,
+)
+
+# ==========================================================
+#                   SERVER ROLE
+# ==========================================================
+# issuer: admin sign-in, issuance, and the pipeline/mail/batch workers
+# reader: student certificate lookups and employer verification
+# Pages and certificate files are served by both. Minting (Aptos client,
+# university key), rendering (PIL) and email load on first use, so a
+# reader never loads them and needs no UNIVERSITY_PRIVATE_KEY.
+CREDLYTIC_ROLE = os.getenv("CREDLYTIC_ROLE", "issuer,reader")
+ROLES = ("issuer", "reader")
+
+
+def parse_roles(value):
+    roles = {r.strip().lower() for r in value.split(",") if r.strip()}
+    if roles == {"all"}:
+        return set(ROLES)
+    unknown = roles - set(ROLES)
+    if unknown or not roles:
+        raise ValueError(f"Unknown CREDLYTIC_ROLE: {value}")
+    return roles
+
+
+roles = parse_roles(CREDLYTIC_ROLE)
+ISSUER = "issuer" in roles
+READER = "reader" in roles
 
-from admin_mint import mint_certificate_with_email, generate_certificate_png
-from email_utils import send_certificate_email
 
 # ==========================================================
 #                   FILE SYSTEM SETUP
 # ==========================================================
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-GENERATED_DIR = os.path.join(BASE_DIR, "generated")
-DB_FILE = os.path.join(BASE_DIR, "db.json")
-ADMINS_FILE = os.path.join(BASE_DIR, "admin.json")
 
-os.makedirs(GENERATED_DIR, exist_ok=True)
-
-if not os.path.exists(DB_FILE):
-    with open(DB_FILE, "w") as f:
-        json.dump({}, f)
-
-if not os.path.exists(ADMINS_FILE):
-    with open(ADMINS_FILE, "w") as f:
-        json.dump({}, f)
+# SQLite by default; CREDLYTIC_STORE=json keeps the old db.json/admin.json files
+store = open_store()
+
+# In-memory tx_hash index + verification result cache for employer lookups
+tx_index = TxIndex(store) if READER else None
+
+# Admin wallet bindings, held in memory and reloaded when another process changes them.
+# Readers need them too, for the full entry from /api/certificates/<id>.
+admins = AdminRegistry(store)
+
+# Dashboard search; on SQLite, triggers keep it current on every write
+search_index = SearchIndex(store) if ISSUER else None
+
+mailer = pipeline = batch_issuer = None
+if ISSUER:
+    # Certificate emails go through a persistent outbox sent by background workers
+    mailer = Mailer(store, resolve_attachment=lambda path: resolve_attachment(path, store))
+
+    # Single issuance runs as mint -> render -> persist -> email stages in the background
+    pipeline = IssuancePipeline(store, mailer)
+
+    # Bulk issuance worker pool; unfinished jobs continue after a restart
+    batch_issuer = BatchIssuer(store, mailer=mailer)
+
+    # Registry/chain reconciliation (issuer routes and workers only)
+    from chain_indexer import INDEXER_INTERVAL, get_chain_indexer
+
+    # The workers above run in one issuer process at a time, the lease holder
+    from issuer_lease import IssuerLease
+
+issuer_lease = None
+_background = {"index": False, "workers": False}
+_background_lock = threading.Lock()
+
+
+def build_index():
+    with _background_lock:
+        if READER and not _background["index"]:
+            tx_index.build()
+            _background["index"] = True
+
+
+def _start_issuer_workers():
+    # A mint engine owns its signing account's sequence numbers, so only
+    # the lease holder mints; the other processes just write the rows
+    mailer.start()
+    pipeline.start()
+    batch_issuer.start()
+    if anchor_mode():
+        # Also submits batches left sealed by a process that died
+        get_anchorer().start()
+    if INDEXER_INTERVAL > 0:
+        get_chain_indexer(store).start()
+
+
+def _issuer_lease_lost():
+    # This process stalled past ISSUER_LEASE and another one took over;
+    # exit rather than keep minting alongside it (gunicorn starts a new worker)
+    os._exit(1)
+
+
+def start_background_workers(on_lead=None):
+    """
+    Index build (reader) and the issuer lease; once per process. The lease
+    holder runs the mailer/pipeline/batch workers and then calls on_lead.
+    """
+    global issuer_lease
+    build_index()
+    with _background_lock:
+        if _background["workers"]:
+            return
+        if ISSUER:
+            def lead():
+                _start_issuer_workers()
+                if on_lead:
+                    on_lead()
+            issuer_lease = IssuerLease(lead, on_lost=_issuer_lease_lost).start()
+        _background["workers"] = True
+
+
+def requires_role(role):
+    """Routes answered only by processes running `role`; 404 elsewhere."""
+    def decorate(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if role not in roles:
+                return jsonify({"ok": False, "error": f"Not served here ({role} endpoint)"}), 404
+            return view(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# Render pool workers are spawned and re-import this module as __mp_main__;
+# only the server process builds the index and runs the background workers.
+# Under gunicorn the app is imported once before forking (CREDLYTIC_PRELOAD=1)
+# and each worker builds its index and joins the issuer lease after the
+# fork (gunicorn.conf.py).
+if multiprocessing.parent_process() is None and os.getenv("CREDLYTIC_PRELOAD") != "1":
+    start_background_workers()
 
 app = Flask(
     __name__,
@@ -46,28 +192,159 @@ app.url_map.strict_slashes = False
 
 
 # ==========================================================
-#              LOAD & SAVE HELPERS
+#             REQUEST TRACING / METRICS
 # ==========================================================
-def load_admins():
-    with open(ADMINS_FILE, "r") as f:
-        return json.load(f)
+# Probes and scrapes are not worth an access log line each
+QUIET_ENDPOINTS = {"healthz", "readyz", "metrics"}
+
+
+@app.before_request
+def start_trace():
+    # Honour an id from the proxy/client so logs line up across services
+    g.trace_id = (request.headers.get(TRACE_HEADER) or "")[:64] or new_trace_id()
+    g.trace_token = set_trace_id(g.trace_id)
+    g.started = time.perf_counter()
+
+
+@app.after_request
+def finish_trace(res):
+    started = g.pop("started", None)
+    if started is None:
+        return res
+    seconds = time.perf_counter() - started
+    # Route pattern, not the raw path, to keep label cardinality bounded
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    HTTP_SECONDS.observe(seconds, method=request.method, endpoint=endpoint,
+                         status=res.status_code)
+    res.headers[TRACE_HEADER] = g.trace_id
+    if LOG_REQUESTS and request.endpoint not in QUIET_ENDPOINTS:
+        log_event("request", method=request.method, path=request.path,
+                  status=res.status_code, ms=round(seconds * 1000, 1))
+    return res
+
+
+@app.teardown_request
+def end_trace(exc):
+    token = g.pop("trace_token", None)
+    if token is not None:
+        reset_trace_id(token)
+
+
+if ISSUER:
+    Callback(
+        "credlytic_pipeline_queue_depth", "Certificates waiting per pipeline stage",
+        lambda: {name: s["queued"] for name, s in pipeline.stats()["stages"].items()}, ["stage"],
+    )
+    Callback(
+        "credlytic_pipeline_busy_workers", "Busy workers per pipeline stage",
+        lambda: {name: s["busy"] for name, s in pipeline.stats()["stages"].items()}, ["stage"],
+    )
+    Callback(
+        "credlytic_mail_outbox", "Outbox rows by status", mailer.status, ["status"],
+    )
+    if anchor_mode():
+        Callback(
+            "credlytic_anchor_batches", "Merkle anchor batches by status",
+            get_anchorer().stats, ["status"],
+        )
+    if INDEXER_INTERVAL > 0:
+        Callback(
+            "credlytic_chain_drift", "Registry vs chain differences found by the indexer",
+            lambda: {k: v for k, v in get_chain_indexer(store).last_drift.items()
+                     if k != "examples"},
+            ["kind"],
+        )
+if READER:
+    Callback(
+        "credlytic_verify_cache", "Employer verification cache",
+        tx_index.cache.stats, ["stat"],
+    )
+Callback(
+    "credlytic_render_cache", "Lazy render cache hits, misses and evictions",
+    render_cache_stats, ["stat"],
+)
+
 
-def save_admins(admins):
-    with open(ADMINS_FILE, "w") as f:
-        json.dump(admins, f, indent=2)
+@app.route("/metrics")
+def metrics():
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
 
-def load_db():
-    with open(DB_FILE, "r") as f:
-        return json.load(f)
 
-def save_db(db):
-    with open(DB_FILE, "w") as f:
-        json.dump(db, f, indent=2)
+# ==========================================================
+#                HEALTH / READINESS
+# ==========================================================
+@app.route("/healthz")
+def healthz():
+    """Liveness: the process is serving requests."""
+    return jsonify({"ok": True})
+
+
+@app.route("/readyz")
+def readyz():
+    """Readiness: database up; index built (reader); lease joined and template (issuer)."""
+    checks = {"workers": _background["workers"]}
+    if READER:
+        checks["index"] = _background["index"]
+    if ISSUER:
+        from renderer import TEMPLATE_PATH
+        checks["template"] = os.path.exists(TEMPLATE_PATH)
+    try:
+        get_database().execute("SELECT 1").fetchone()
+        checks["database"] = True
+    except Exception as e:
+        print("[READYZ ERROR]", e)
+        checks["database"] = False
+    ok = all(checks.values())
+    body = {"ok": ok, "roles": sorted(roles), "checks": checks}
+    if issuer_lease:
+        # Whether this process runs the issuer workers (not a readiness condition)
+        body["issuer_leader"] = issuer_lease.held
+    return jsonify(body), 200 if ok else 503
 
 
 # ==========================================================
 #                FRONTEND ROUTES
 # ==========================================================
+# Pages revalidate on every load (ETag); CSS, JS and fonts are cached
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", "86400"))
+COMPRESSIBLE = {"text/html", "text/css", "text/javascript", "application/javascript",
+                "application/json", "image/svg+xml", "font/ttf", "font/otf"}
+FRONTEND_ENDPOINTS = {"static", "index", "student_page", "admin_page",
+                      "admin_dashboard_page", "employer_page"}
+
+_gzipped = {}   # (path, etag) -> compressed body; one entry per frontend file version
+
+
+@app.after_request
+def frontend_caching(res):
+    """Cache headers and gzip for the static frontend, compressed once per file version."""
+    if request.endpoint not in FRONTEND_ENDPOINTS or res.status_code != 200:
+        return res
+
+    if res.mimetype != "text/html":
+        res.cache_control.no_cache = None
+        res.cache_control.public = True
+        res.cache_control.max_age = STATIC_MAX_AGE
+    res.vary.add("Accept-Encoding")
+
+    etag, _ = res.get_etag()
+    if (res.mimetype not in COMPRESSIBLE or not etag
+            or "gzip" not in request.headers.get("Accept-Encoding", "")):
+        return res
+
+    key = (request.path, etag)
+    body = _gzipped.get(key)
+    if body is None:
+        res.direct_passthrough = False
+        body = _gzipped[key] = gzip.compress(res.get_data(), 6, mtime=0)
+    res.close()
+    res.set_data(body)
+    res.headers["Content-Encoding"] = "gzip"
+    # Different bytes, different validator
+    res.set_etag(etag + "-gz")
+    return res.make_conditional(request)
+
+
 @app.route("/")
 def index():
     return app.send_static_file("index.html")
@@ -106,6 +383,7 @@ def api_guard(dummy):
 ALLOWED_ADMIN_EMAILS = ["# ADD ADMIN EMAIL IDS HERE"]
 
 @app.route("/api/admin/login_check", methods=["POST"])
+@requires_role("issuer")
 def login_check():
     data = request.get_json() or {}
     email = data.get("email")
@@ -116,13 +394,13 @@ def login_check():
     if email not in ALLOWED_ADMIN_EMAILS:
         return jsonify({"ok": False, "error": "Unauthorized Google Admin"}), 403
 
-    admins = load_admins()
+    admin = admins.get(email)
 
-    if email in admins:
+    if admin:
         return jsonify({
             "ok": True,
             "is_registered": True,
-            "wallet": admins[email]["wallet"]
+            "wallet": admin["wallet"]
         })
 
     return jsonify({"ok": True, "is_registered": False})
@@ -132,6 +410,7 @@ def login_check():
 #         WALLET BINDING (ONE-TIME)
 # ==========================================================
 @app.route("/api/admin/bind_start", methods=["POST"])
+@requires_role("issuer")
 def bind_start():
     data = request.get_json() or {}
     email = data.get("email")
@@ -143,6 +422,7 @@ def bind_start():
 
 
 @app.route("/api/admin/bind_finish", methods=["POST"])
+@requires_role("issuer")
 def bind_finish():
     data = request.get_json() or {}
 
@@ -163,13 +443,11 @@ def bind_finish():
     except Exception:
         return jsonify({"ok": False, "error": "Invalid signature"}), 400
 
-    admins = load_admins()
-    admins[email] = {
+    admins.bind(email, {
         "wallet": wallet,
         "verified": True,
         "bound_at": datetime.now(timezone.utc).isoformat()
-    }
-    save_admins(admins)
+    })
 
     return jsonify({"ok": True, "wallet": wallet})
 
@@ -177,95 +455,355 @@ def bind_finish():
 # ==========================================================
 #                 ISSUE CERTIFICATE
 # ==========================================================
-@app.route("/api/admin/issue", methods=["POST"])
-def issue():
-    p = request.get_json() or {}
-
-    admin_email = p.get("admin_email")
-    admin_wallet = p.get("admin_wallet")
-
-    admins = load_admins()
+def check_admin(admin_email, admin_wallet):
+    """Returns an error response tuple, or None if the admin may issue."""
+    admin = admins.get(admin_email)
 
-    if admin_email not in admins:
+    if not admin:
         return jsonify({"ok": False, "error": "Admin not registered"}), 403
 
-    if admins[admin_email]["wallet"].lower() != admin_wallet.lower():
+    if admin["wallet"].lower() != (admin_wallet or "").lower():
         return jsonify({"ok": False, "error": "Wallet mismatch"}), 403
 
+    return None
+
+
+@app.route("/api/admin/issue", methods=["POST"])
+@requires_role("issuer")
+def issue():
+    p = request.get_json() or {}
+
+    denied = check_admin(p.get("admin_email"), p.get("admin_wallet"))
+    if denied:
+        return denied
+
     required = ["student_name", "student_email", "course_name"]
     for f in required:
         if not p.get(f):
             return jsonify({"ok": False, "error": f"Missing field: {f}"}), 400
 
+    entry = pipeline.submit(
+        p["student_name"], p["student_email"], p["course_name"], created_by=p.get("admin_email")
+    )
+
+    return jsonify({
+        "ok": True,
+        "certificate_id": entry["id"],
+        "status": entry["status"],
+        "status_url": f"/api/certificates/{entry['id']}",
+        "entry": entry,
+    }), 202
+
+
+@app.route("/api/certificates/<cert_id>", methods=["GET"])
+def certificate_status(cert_id):
+    """
+    Issuance progress: pending, minted, rendered, delivered or failed.
+    The full entry (student, email, file, error text) only comes back
+    with ?admin_email=&admin_wallet= of a bound admin.
+    """
+    entry = store.get_certificate(cert_id)
+    if not entry:
+        return jsonify({"ok": False, "error": "Certificate not found"}), 404
+
+    status = entry.get("status", "delivered")
+    if request.args.get("admin_email"):
+        denied = check_admin(request.args.get("admin_email"), request.args.get("admin_wallet"))
+        if denied:
+            return denied
+        return jsonify({"ok": True, "status": status, "certificate": entry})
+
+    return jsonify({"ok": True, "status": status, "certificate": {
+        "id": entry["id"],
+        "status": status,
+        "email_status": entry.get("email_status"),
+    }})
+
+
+# ==========================================================
+#                 BULK ISSUANCE
+# ==========================================================
+@app.route("/api/admin/issue/batch", methods=["POST"])
+@requires_role("issuer")
+def issue_batch():
+    """
+    Accepts either JSON {"admin_email", "admin_wallet", "certificates": [...]}
+    or a multipart form with admin_email/admin_wallet fields and a CSV
+    "file" (columns: student_name, student_email, course_name).
+    """
+    if request.files.get("file"):
+        p = request.form
+        upload = request.files["file"]
+        try:
+            text = upload.read().decode("utf-8-sig")
+        except UnicodeDecodeError:
+            return jsonify({"ok": False, "error": "File must be UTF-8"}), 400
+
+        if upload.filename.lower().endswith(".json"):
+            try:
+                rows = json.loads(text)
+            except ValueError:
+                return jsonify({"ok": False, "error": "Invalid JSON file"}), 400
+        else:
+            rows = parse_csv(text)
+    else:
+        p = request.get_json() or {}
+        rows = p.get("certificates")
+
+    denied = check_admin(p.get("admin_email"), p.get("admin_wallet"))
+    if denied:
+        return denied
+
+    if not isinstance(rows, list) or not rows:
+        return jsonify({"ok": False, "error": "No certificates supplied"}), 400
+
+    if len(rows) > BATCH_MAX_ROWS:
+        return jsonify({"ok": False, "error": f"Too many rows (max {BATCH_MAX_ROWS})"}), 400
+
+    if not all(isinstance(r, dict) for r in rows):
+        return jsonify({"ok": False, "error": "Each certificate must be an object"}), 400
+
+    job_id = batch_issuer.submit(rows, created_by=p.get("admin_email"))
+
+    return jsonify({
+        "ok": True,
+        "job_id": job_id,
+        "total": len(rows),
+        "status_url": f"/api/admin/issue/batch/{job_id}"
+    }), 202
+
+
+@app.route("/api/admin/issue/batch/<job_id>", methods=["GET"])
+@requires_role("issuer")
+def issue_batch_status(job_id):
     try:
-        tx, token_name = mint_certificate_with_email(
-            p["student_name"], p["course_name"], p["student_email"]
-        )
-    except Exception as e:
-        return jsonify({"ok": False, "error": f"Minting failed: {e}"}), 500
+        offset = max(int(request.args.get("offset", 0)), 0)
+        limit = min(max(int(request.args.get("limit", 100)), 0), 1000)
+    except ValueError:
+        return jsonify({"ok": False, "error": "Invalid offset/limit"}), 400
 
-    explorer = f"https://explorer.aptoslabs.com/txn/{tx}?network=devnet"
+    job = batch_issuer.status(job_id, offset=offset, limit=limit)
+    if not job:
+        return jsonify({"ok": False, "error": "Job not found"}), 404
 
-    ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-    safe = p["student_email"].replace("@", "_").replace(".", "_")
-    pdf_name = f"{safe}_{ts}.pdf"
-    pdf_path = os.path.join(GENERATED_DIR, pdf_name)
+    return jsonify({"ok": True, "job": job})
 
-    returned_pdf_path = generate_certificate_png(
-        p["student_name"], p["course_name"], tx, token_name, pdf_path
-    )
 
-    if not returned_pdf_path:
-        return jsonify({"ok": False, "error": "Failed to generate certificate"}), 500
+@app.route("/api/admin/chain-index", methods=["GET"])
+@requires_role("issuer")
+def chain_index_status():
+    denied = check_admin(request.args.get("admin_email"), request.args.get("admin_wallet"))
+    if denied:
+        return denied
 
-    entry = {
-        "file": os.path.basename(returned_pdf_path),
-        "student": p["student_name"],
-        "email": p["student_email"],
-        "course": p["course_name"],
-        "token_name": token_name,
-        "tx_hash": tx,
-        "explorer_url": explorer,
-        "issued_at": datetime.now(timezone.utc).isoformat()
-    }
+    indexer = get_chain_indexer(store)
+    # Drift as of the last pass; POST starts a new one
+    return jsonify({"ok": True, "index": indexer.status(), "drift": indexer.last_drift})
 
-    db = load_db()
-    db.setdefault(p["student_email"], []).append(entry)
-    save_db(db)
 
+@app.route("/api/admin/chain-index", methods=["POST"])
+@requires_role("issuer")
+def chain_index_run():
+    p = request.get_json() or {}
+
+    denied = check_admin(p.get("admin_email"), p.get("admin_wallet"))
+    if denied:
+        return denied
+
+    # Runs in the background indexer's thread; poll GET for the result
+    get_chain_indexer(store).start().trigger()
+    return jsonify({"ok": True}), 202
+
+
+@app.route("/api/admin/search", methods=["GET"])
+@requires_role("issuer")
+def admin_search():
+    """
+    Search every issued certificate: ?q= (words matched as prefixes over
+    student, email, course and token name, or a tx hash), &course=,
+    &month=YYYY-MM, &limit=, &cursor=. Returns facet counts per course
+    and issue month with each page.
+    """
+    args = request.args
+    denied = check_admin(args.get("admin_email"), args.get("admin_wallet"))
+    if denied:
+        return denied
+
+    month = args.get("month") or None
+    if month and not re.fullmatch(r"\d{4}-\d{2}", month):
+        return jsonify({"ok": False, "error": "Invalid month (YYYY-MM)"}), 400
     try:
-        send_certificate_email(
-            p["student_email"],
-            p["student_name"],
-            p["course_name"],
-            explorer,
-            returned_pdf_path,
-            tx_hash=tx
-        )
-    except Exception as e:
-        return jsonify({"ok": True, "entry": entry, "warning": f"Email failed: {e}"}), 200
+        limit = min(max(int(args.get("limit", SEARCH_DEFAULT_LIMIT)), 1), SEARCH_MAX_LIMIT)
+    except ValueError:
+        return jsonify({"ok": False, "error": "Invalid limit"}), 400
+    try:
+        result = search_index.search(args.get("q", ""), course=args.get("course"), month=month,
+                                     limit=limit, cursor=args.get("cursor"))
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
 
-    return jsonify({"ok": True, "entry": entry})
+    return jsonify({"ok": True, **result})
 
 
 # ==========================================================
 #             STUDENT CERTIFICATE LOOKUP
 # ==========================================================
+LIST_DEFAULT_LIMIT = 100
+LIST_MAX_LIMIT = 1000
+# NDJSON without a limit streams everything, fetched this many rows at a time
+STREAM_PAGE = 500
+
+
+def parse_issued_bound(value, end=False):
+    """
+    'YYYY-MM-DD' or an ISO datetime -> ISO string comparable with
+    issued_at (UTC). A date as the upper bound includes that whole day.
+    """
+    if not value:
+        return None
+    try:
+        if len(value) == 10:
+            day = datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+            return (day + timedelta(days=1) if end else day).isoformat()
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"Invalid date: {value}")
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).isoformat()
+
+
+def list_query(args):
+    """Validated list_certificates() arguments from the query string."""
+    sort_arg = args.get("sort", "issued_at")
+    descending = sort_arg.startswith("-")
+    sort = sort_arg.lstrip("-")
+    if sort not in LIST_SORTS:
+        raise ValueError(f"sort must be one of: {', '.join(LIST_SORTS)}")
+
+    limit = args.get("limit")
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError("Invalid limit")
+        limit = min(max(limit, 1), LIST_MAX_LIMIT)
+
+    cursor = args.get("cursor") or None
+    if cursor:
+        decode_cursor(cursor, f"-{sort}" if descending else sort)
+
+    return {
+        "course": args.get("course") or None,
+        "issued_from": parse_issued_bound(args.get("from")),
+        "issued_to": parse_issued_bound(args.get("to"), end=True),
+        "sort": sort,
+        "descending": descending,
+        "cursor": cursor,
+        "limit": limit,
+    }
+
+
 @app.route("/api/student/certificates", methods=["GET"])
+@requires_role("reader")
 def get_certificates():
+    """
+    A student's certificates, one page at a time.
+
+    Query: email (required), course, from/to (date or ISO datetime),
+    sort (issued_at | course, "-" prefix for descending), limit
+    (default 100, max 1000), cursor (next_cursor of the previous page),
+    format=ndjson to stream one certificate per line. Certificates
+    whose issuance failed are only shown to the admin.
+    """
     email = request.args.get("email")
     if not email:
         return jsonify({"ok": False, "error": "Missing email"}), 400
 
-    db = load_db()
-    return jsonify({"ok": True, "certificates": db.get(email, [])})
+    try:
+        query = list_query(request.args)
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    ndjson = request.args.get("format") == "ndjson"
+
+    # Revalidation costs one row lookup: nothing is loaded or serialized
+    # unless the student's certificates changed
+    etag = None
+    version = store.certificates_version(email)
+    if version is not None:
+        etag = hashlib.sha1(
+            f"{version}|{sorted(request.args.items(multi=True))}".encode()
+        ).hexdigest()[:32]
+        if etag in request.if_none_match:
+            return conditional(Response(status=304), etag)
+
+    filters = {k: query[k] for k in ("course", "issued_from", "issued_to")}
+
+    try:
+        if ndjson and query["limit"] is None:
+            return conditional(Response(
+                stream_with_context(stream_certificates(email, query)),
+                mimetype="application/x-ndjson",
+            ), etag)
+
+        limit = query["limit"] or LIST_DEFAULT_LIMIT
+        items, next_cursor = store.list_certificates(email, **{**query, "limit": limit}, raw=True)
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    total = store.count_certificates(email, **filters)
+
+    if ndjson:
+        res = Response("".join(f"{item}\n" for item in items), mimetype="application/x-ndjson")
+        res.headers["X-Total-Count"] = str(total)
+        if next_cursor:
+            res.headers["X-Next-Cursor"] = next_cursor
+        return conditional(res, etag)
+
+    # Entries are the stored JSON text, spliced in without a decode/encode round trip
+    body = (
+        f'{{"ok": true, "total": {total}, "next_cursor": {json.dumps(next_cursor)}, '
+        f'"certificates": [{", ".join(items)}]}}'
+    )
+    return conditional(Response(body, mimetype="application/json"), etag)
+
+
+def stream_certificates(email, query):
+    cursor = query["cursor"]
+    while True:
+        items, cursor = store.list_certificates(
+            email, **{**query, "cursor": cursor, "limit": STREAM_PAGE}, raw=True
+        )
+        for item in items:
+            yield f"{item}\n"
+        if not cursor:
+            return
+
+
+def conditional(res, etag):
+    """Per-student data: browsers keep it but revalidate on every load."""
+    if etag:
+        res.set_etag(etag)
+        res.headers["Cache-Control"] = "private, no-cache"
+    return res
 
 
 # ==========================================================
 #             EMPLOYER VERIFICATION
 # ==========================================================
+# VERIFY_ON_CHAIN=1 makes check_chain the default for every verification
+VERIFY_ON_CHAIN = os.getenv("VERIFY_ON_CHAIN", "0") == "1"
+
+
 @app.route("/api/employer/verify", methods=["POST"])
+@requires_role("reader")
 def employer_verify():
+    """
+    Body: {"email", "tx_hash", "check_chain"?}. With check_chain the
+    match is also confirmed on the fullnode: the transaction must be
+    committed and mint a token whose student_id is the email. An
+    anchored certificate's inclusion proof is always checked, and with
+    check_chain its root must be the one the transaction anchored.
+    """
     data = request.get_json() or {}
     email = (data.get("email") or "").strip()
     tx_hash = (data.get("tx_hash") or "").strip()
@@ -273,33 +811,168 @@ def employer_verify():
     if not email or not tx_hash:
         return jsonify({"ok": False, "error": "Missing email or transaction hash"}), 400
 
-    db = load_db()
-    entries = db.get(email, [])
-
-    def normalize(h):
-        h = h.lower()
-        return h if h.startswith("0x") else "0x" + h
-
-    needle = normalize(tx_hash)
-
-    for e in entries:
-        if e.get("tx_hash") and e["tx_hash"].lower() == needle:
-            return jsonify({"ok": True, "certificate": e})
-
-    return jsonify({"ok": False, "error": "No matching certificate found"}), 404
+    entry = tx_index.verify(email, tx_hash)
+    if not entry:
+        return jsonify({"ok": False, "error": "No matching certificate found"}), 404
+
+    ok, reason = check_inclusion(entry)
+    if not ok:
+        return jsonify({"ok": False, "error": reason, "certificate": entry}), 409
+
+    if not data.get("check_chain", VERIFY_ON_CHAIN):
+        return jsonify({"ok": True, "certificate": entry})
+
+    # Loaded on first use: the Aptos client is only needed for chain checks
+    from chain_state import get_chain_state
+    ok, reason, status = get_chain_state().verify(email, tx_hash, anchored_root(entry))
+    if status["status"] == "error":
+        return jsonify({"ok": False, "error": "Could not reach the blockchain", "chain": status}), 503
+    if not ok:
+        return jsonify({"ok": False, "error": reason, "certificate": entry, "chain": status}), 409
+    return jsonify({"ok": True, "certificate": entry, "chain": status})
+
+
+def anchored_root(entry):
+    """The Merkle root an anchored certificate's transaction must carry, else None."""
+    return (entry.get("anchor") or {}).get("root")
+
+
+VERIFY_BATCH_MAX = int(os.getenv("VERIFY_BATCH_MAX", "10000"))
+
+
+@app.route("/api/employer/verify/batch", methods=["POST"])
+@requires_role("reader")
+def employer_verify_batch():
+    """
+    Body: {"items": [{"email", "tx_hash", "check_chain"?}, ...], "check_chain": false}
+    (or just the list). Streams one NDJSON line per item:
+    {"index", "email", "tx_hash", "ok", "certificate" | "error", "chain"?}.
+
+    Database matches are resolved together and streamed first, in input
+    order. Items with check_chain are then confirmed on the fullnode
+    (same rules as /api/employer/verify) and streamed as the answers arrive.
+    """
+    data = request.get_json(silent=True)
+    items = data.get("items") if isinstance(data, dict) else data
+    check_chain = VERIFY_ON_CHAIN
+    if isinstance(data, dict):
+        check_chain = bool(data.get("check_chain", VERIFY_ON_CHAIN))
+
+    if not isinstance(items, list) or not items:
+        return jsonify({"ok": False, "error": "No items supplied"}), 400
+    if len(items) > VERIFY_BATCH_MAX:
+        return jsonify({"ok": False, "error": f"Too many items (max {VERIFY_BATCH_MAX})"}), 400
+
+    pairs = []
+    for item in items:
+        if isinstance(item, dict):
+            pairs.append(((item.get("email") or "").strip(), (item.get("tx_hash") or "").strip()))
+        else:
+            pairs.append(("", ""))
+    valid = [i for i, (email, tx_hash) in enumerate(pairs) if email and tx_hash]
+    entries = dict(zip(valid, tx_index.verify_many([pairs[i] for i in valid])))
+
+    def results():
+        on_chain = {}   # normalized hash -> results waiting for the fullnode
+        for i, (email, tx_hash) in enumerate(pairs):
+            result = {"index": i, "email": email, "tx_hash": tx_hash}
+            entry = entries.get(i)
+            included, reason = check_inclusion(entry) if entry else (True, None)
+            if i not in entries:
+                result.update(ok=False, error="Missing email or transaction hash")
+            elif entry is None:
+                result.update(ok=False, error="No matching certificate found")
+            elif not included:
+                result.update(ok=False, error=reason, certificate=entry)
+            else:
+                result.update(ok=True, certificate=entry)
+                if items[i].get("check_chain", check_chain):
+                    on_chain.setdefault(normalize_tx_hash(tx_hash), []).append(result)
+                    continue
+            yield json.dumps(result) + "\n"
+
+        if on_chain:
+            from chain_state import get_chain_state, confirms
+            for h, status in get_chain_state().check_many(on_chain):
+                for result in on_chain[h]:
+                    result["chain"] = status
+                    ok, reason = confirms(status, result["email"],
+                                          anchored_root(result["certificate"]))
+                    if not ok:
+                        result.update(ok=False, error=reason)
+                    yield json.dumps(result) + "\n"
+
+    return Response(stream_with_context(results()), mimetype="application/x-ndjson")
 
 
 # ==========================================================
 #             SERVE GENERATED FILES
 # ==========================================================
-@app.route("/generated/<filename>")
+# Content keys never change meaning: cache them for a year
+FILE_MAX_AGE = 365 * 24 * 3600
+# Lazily rendered files change only with the template
+LAZY_FILE_MAX_AGE = 24 * 3600
+
+
+@app.route("/generated/<path:filename>")
 def serve_file(filename):
-    return send_from_directory(GENERATED_DIR, filename)
+    """
+    Content keys (ab/cd/<sha256>.pdf) are immutable, with the digest as a
+    strong ETag. Range requests are supported. Lazy names (render/<id>.pdf)
+    are rendered on first request. Legacy flat names are revalidated on
+    every use.
+    """
+    lazy = parse_lazy_name(filename)
+    if lazy:
+        return serve_lazy_file(filename, *lazy)
+
+    if not is_key(filename):
+        if "/" in filename:
+            abort(404)
+        return send_from_directory(GENERATED_DIR, filename, max_age=0)
+
+    files = get_file_store()
+    try:
+        source = files.local_path(filename) or files.open(filename)
+        res = send_file(
+            source,
+            mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+            etag=key_digest(filename),
+            max_age=FILE_MAX_AGE,
+            conditional=True,
+        )
+    except FileNotFoundError:
+        abort(404)
+    res.cache_control.public = True
+    res.cache_control.immutable = True
+    return res
+
+
+def serve_lazy_file(filename, cert_id, variant):
+    entry = store.get_certificate(cert_id)
+    if (not entry or entry.get("status") == "failed" or entry.get("file") is None
+            or not entry.get("tx_hash") or not entry.get("token_name")):
+        abort(404)
+    try:
+        path, key = get_render_cache().get(entry, variant)
+    except RenderError as e:
+        log_event("lazy_render_failed", level="error", cert_id=cert_id, error=str(e))
+        return jsonify({"ok": False, "error": "Failed to generate certificate"}), 500
+    res = send_file(
+        path,
+        mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+        etag=key,
+        max_age=LAZY_FILE_MAX_AGE,
+        conditional=True,
+    )
+    res.cache_control.public = True
+    return res
 
 
 # ==========================================================
 #                  RUN SERVER
 # ==========================================================
 if __name__ == "__main__":
-    app.run(port=5000, debug=True)
+    # Development server; production runs wsgi.py under gunicorn (see gunicorn.conf.py)
+    app.run(port=int(os.getenv("PORT", "5000")), debug=True)
 
@@ -0,0 +1,371 @@
+# backend/batch_jobs.py
+
+import os
+import io
+import csv
+import uuid
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+from storage import get_database, owner_alive, owner_id, new_certificate_id
+from anchoring import anchor_mode, get_anchorer
+from issuance import IssuanceError, mint_step, anchor_step, anchor_result, complete_issuance
+from render_pool import get_render_pool
+
+
+# Enough threads to keep every render process and the mint window busy
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "0")) or max(4, 2 * (os.cpu_count() or 1))
+BATCH_MAX_ROWS = int(os.getenv("BATCH_MAX_ROWS", "10000"))
+# Only the issuer lease holder runs rows (issuer_lease); it picks up jobs
+# submitted by the other processes at least this often
+BATCH_POLL_INTERVAL = float(os.getenv("BATCH_POLL_INTERVAL", "1"))
+
+REQUIRED_FIELDS = ("student_name", "student_email", "course_name")
+
+# Row lifecycle: queued -> minting -> minted -> rendering -> done | failed
+# With CERT_ANCHOR_MODE=merkle, "anchoring" takes the place of "minting"
+# and cert_id is assigned when the row's leaf joins a batch; otherwise it
+# is assigned before rendering, so a re-run finds the entry it stored.
+# "owner" is the worker process holding a minting/anchoring/rendering row
+# (storage.owner_id).
+JOBS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS issue_jobs (
+    id          TEXT PRIMARY KEY,
+    created_by  TEXT,
+    created_at  TEXT NOT NULL,
+    total       INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS issue_job_rows (
+    job_id         TEXT NOT NULL REFERENCES issue_jobs(id),
+    row_no         INTEGER NOT NULL,
+    student_name   TEXT,
+    student_email  TEXT,
+    course_name    TEXT,
+    status         TEXT NOT NULL,
+    tx_hash        TEXT,
+    token_name     TEXT,
+    cert_id        TEXT,
+    error          TEXT,
+    owner          TEXT,
+    updated_at     TEXT,
+    PRIMARY KEY (job_id, row_no)
+);
+CREATE INDEX IF NOT EXISTS idx_job_rows_status ON issue_job_rows(status);
+"""
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+# ============================================================
+#                       INPUT PARSING
+# ============================================================
+
+def parse_csv(text):
+    reader = csv.DictReader(io.StringIO(text))
+    return [
+        {k.strip(): (v or "").strip() for k, v in row.items() if k}
+        for row in reader
+    ]
+
+
+def validate_row(row):
+    for f in REQUIRED_FIELDS:
+        if not str(row.get(f) or "").strip():
+            return f"Missing field: {f}"
+    return None
+
+
+# ============================================================
+#                      BATCH ISSUER
+# ============================================================
+
+class BatchIssuer:
+    """
+    Runs bulk issuance jobs on a worker pool.
+
+    Any process can submit a job; the one that called start() picks its
+    queued rows up from the database.
+    Every row's progress is persisted before and after the mint, so
+    after a restart resume() picks up where the job stopped: queued
+    rows are re-run, minted rows continue from rendering, and rows
+    that were mid-mint are failed rather than minted a second time.
+    A row interrupted after its certificate was stored keeps that
+    certificate and its one email (complete_issuance is idempotent on
+    the row's cert_id).
+    """
+
+    def __init__(self, store, workers=BATCH_WORKERS, mailer=None):
+        self.store = store
+        self.mailer = mailer
+        self.db = get_database()
+        self.db.ensure_schema(JOBS_SCHEMA)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch")
+
+        # Last issue_job_rows rowid handed to the pool
+        self._seen = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._poller = None
+        self._start_lock = threading.Lock()
+
+    # ---- lifecycle ----
+    def start(self):
+        with self._start_lock:
+            if self._poller:
+                return self
+            # resume() runs every row up to here, the poller the rest
+            self._seen = self.db.execute(
+                "SELECT COALESCE(MAX(rowid), 0) AS n FROM issue_job_rows"
+            ).fetchone()["n"]
+            self.resume()
+            self._stop.clear()
+            self._poller = threading.Thread(target=self._poll, name="batch-poll", daemon=True)
+            self._poller.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._poller:
+            self._poller.join(timeout=10)
+            self._poller = None
+
+    # ---- submission ----
+    def submit(self, rows, created_by=None):
+        job_id = uuid.uuid4().hex
+        now = _now()
+
+        with self.db.transaction() as c:
+            c.execute(
+                "INSERT INTO issue_jobs (id, created_by, created_at, total) VALUES (?, ?, ?, ?)",
+                (job_id, created_by, now, len(rows)),
+            )
+            for i, row in enumerate(rows):
+                error = validate_row(row)
+                c.execute(
+                    "INSERT INTO issue_job_rows (job_id, row_no, student_name, student_email, "
+                    "course_name, status, error, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        job_id, i,
+                        str(row.get("student_name") or "").strip(),
+                        str(row.get("student_email") or "").strip(),
+                        str(row.get("course_name") or "").strip(),
+                        "failed" if error else "queued",
+                        error, now,
+                    ),
+                )
+
+        self._wake.set()
+        return job_id
+
+    def resume(self):
+        """
+        Re-queue unfinished rows after a restart. Rows held by a live
+        process (another server worker) are left alone. Returns the
+        number of rows re-queued.
+        """
+        stale = [
+            r for r in self.db.execute(
+                "SELECT job_id, row_no, status, owner FROM issue_job_rows "
+                "WHERE status IN ('minting', 'anchoring', 'rendering')"
+            ).fetchall()
+            if not owner_alive(r["owner"])
+        ]
+
+        with self.db.transaction() as c:
+            for r in stale:
+                if r["status"] == "anchoring":
+                    continue
+                if r["status"] == "minting":
+                    c.execute(
+                        "UPDATE issue_job_rows SET status = 'failed', owner = NULL, updated_at = ?, "
+                        "error = 'Interrupted during minting; not retried to avoid a double mint' "
+                        "WHERE job_id = ? AND row_no = ? AND status = 'minting'",
+                        (_now(), r["job_id"], r["row_no"]),
+                    )
+                else:
+                    c.execute(
+                        "UPDATE issue_job_rows SET status = 'minted', owner = NULL, updated_at = ? "
+                        "WHERE job_id = ? AND row_no = ? AND status = 'rendering'",
+                        (_now(), r["job_id"], r["row_no"]),
+                    )
+
+        # Anchoring rows wait for their batch; adding a leaf is idempotent,
+        # so a row interrupted before its leaf was stored is added now
+        anchoring = 0
+        for r in stale:
+            if (r["status"] == "anchoring"
+                    and self._claim(r["job_id"], r["row_no"], "anchoring", "anchoring")):
+                self._anchor_row(r["job_id"], r["row_no"])
+                anchoring += 1
+
+        rows = self.db.execute(
+            "SELECT job_id, row_no FROM issue_job_rows WHERE status IN ('queued', 'minted') "
+            "ORDER BY job_id, row_no"
+        ).fetchall()
+        for r in rows:
+            self.pool.submit(self._run_row, r["job_id"], r["row_no"])
+        return len(rows) + anchoring
+
+    def _poll(self):
+        """Runs queued rows written since the last pass."""
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                rows = self.db.execute(
+                    "SELECT rowid, job_id, row_no FROM issue_job_rows "
+                    "WHERE rowid > ? AND status = 'queued' ORDER BY rowid",
+                    (self._seen,),
+                ).fetchall()
+                for r in rows:
+                    self.pool.submit(self._run_row, r["job_id"], r["row_no"])
+                    self._seen = r["rowid"]
+            except Exception as e:
+                print("[BATCH POLL ERROR]", e)
+            self._wake.wait(BATCH_POLL_INTERVAL)
+
+    # ---- status ----
+    def status(self, job_id, offset=0, limit=None):
+        job = self.db.execute("SELECT * FROM issue_jobs WHERE id = ?", (job_id,)).fetchone()
+        if not job:
+            return None
+
+        counts = {
+            r["status"]: r["n"]
+            for r in self.db.execute(
+                "SELECT status, COUNT(*) AS n FROM issue_job_rows WHERE job_id = ? GROUP BY status",
+                (job_id,),
+            )
+        }
+        finished = counts.get("done", 0) + counts.get("failed", 0)
+
+        result = {
+            "job_id": job["id"],
+            "created_by": job["created_by"],
+            "created_at": job["created_at"],
+            "total": job["total"],
+            "counts": counts,
+            "finished": finished == job["total"],
+        }
+
+        if limit is not None:
+            rows = self.db.execute(
+                "SELECT row_no, student_name, student_email, course_name, status, tx_hash, "
+                "cert_id, error FROM issue_job_rows WHERE job_id = ? ORDER BY row_no "
+                "LIMIT ? OFFSET ?",
+                (job_id, limit, offset),
+            ).fetchall()
+            result["rows"] = [dict(r) for r in rows]
+
+        return result
+
+    # ---- worker ----
+    def _update_row(self, job_id, row_no, **fields):
+        fields["updated_at"] = _now()
+        cols = ", ".join(f"{k} = ?" for k in fields)
+        with self.db.transaction() as c:
+            c.execute(
+                f"UPDATE issue_job_rows SET {cols} WHERE job_id = ? AND row_no = ?",
+                (*fields.values(), job_id, row_no),
+            )
+
+    def _claim(self, job_id, row_no, from_status, to_status):
+        """Atomically move a row between states; False if another worker got it first."""
+        with self.db.transaction() as c:
+            cur = c.execute(
+                "UPDATE issue_job_rows SET status = ?, owner = ?, updated_at = ? "
+                "WHERE job_id = ? AND row_no = ? AND status = ?",
+                (to_status, owner_id(), _now(), job_id, row_no, from_status),
+            )
+            return cur.rowcount == 1
+
+    def _anchor_row(self, job_id, row_no):
+        row = self.db.execute(
+            "SELECT * FROM issue_job_rows WHERE job_id = ? AND row_no = ?", (job_id, row_no)
+        ).fetchone()
+        cert_id = row["cert_id"]
+        if not cert_id:
+            cert_id = new_certificate_id()
+            self._update_row(job_id, row_no, cert_id=cert_id)
+        self._watch(job_id, row_no, anchor_step(
+            cert_id, row["student_name"], row["course_name"], row["student_email"]))
+
+    def _watch(self, job_id, row_no, future):
+        # The row goes back on the pool once its batch is anchored, so no
+        # worker thread waits out the anchor window
+        future.add_done_callback(
+            lambda f: self.pool.submit(self._anchored, job_id, row_no, f))
+
+    def _anchored(self, job_id, row_no, future):
+        try:
+            tx, token_name, _ = anchor_result(future)
+        except IssuanceError as e:
+            self._update_row(job_id, row_no, status="failed", owner=None, error=str(e))
+            return
+        with self.db.transaction() as c:
+            cur = c.execute(
+                "UPDATE issue_job_rows SET status = 'minted', tx_hash = ?, token_name = ?, "
+                "owner = NULL, updated_at = ? WHERE job_id = ? AND row_no = ? AND status = 'anchoring'",
+                (tx, token_name, _now(), job_id, row_no),
+            )
+            if cur.rowcount != 1:
+                return
+        self._run_row(job_id, row_no)
+
+    def _run_row(self, job_id, row_no):
+        try:
+            row = self.db.execute(
+                "SELECT * FROM issue_job_rows WHERE job_id = ? AND row_no = ?",
+                (job_id, row_no),
+            ).fetchone()
+            if row is None:
+                return
+
+            name, email, course = row["student_name"], row["student_email"], row["course_name"]
+            tx, token_name = row["tx_hash"], row["token_name"]
+
+            if row["status"] == "queued" and anchor_mode():
+                if not self._claim(job_id, row_no, "queued", "anchoring"):
+                    return
+                self._anchor_row(job_id, row_no)
+                return
+            elif row["status"] == "queued":
+                if not self._claim(job_id, row_no, "queued", "minting"):
+                    return
+                tx, token_name = mint_step(name, course, email)
+                self._update_row(job_id, row_no, status="minted", tx_hash=tx, token_name=token_name)
+            elif row["status"] != "minted":
+                return
+
+            if not self._claim(job_id, row_no, "minted", "rendering"):
+                return
+
+            # Anchored rows keep the id their leaf was built from, plus
+            # its inclusion proof
+            cert_id = row["cert_id"]
+            anchored = get_anchorer().lookup(cert_id) if cert_id and anchor_mode() else None
+            if not cert_id:
+                cert_id = new_certificate_id()
+                self._update_row(job_id, row_no, cert_id=cert_id)
+
+            # Rendering runs in the process pool so a batch can use every core
+            entry, warning = complete_issuance(
+                self.store, name, email, course, tx, token_name,
+                render=get_render_pool().render_files,
+                mailer=self.mailer,
+                cert_id=cert_id,
+                anchor=anchored["anchor"] if anchored else None,
+            )
+            self._update_row(job_id, row_no, status="done", owner=None,
+                             cert_id=entry["id"], error=warning)
+
+        except IssuanceError as e:
+            self._update_row(job_id, row_no, status="failed", owner=None, error=str(e))
+        except Exception as e:
+            print("[BATCH ERROR]", job_id, row_no, e)
+            self._update_row(job_id, row_no, status="failed", owner=None,
+                             error=f"Unexpected error: {e}")
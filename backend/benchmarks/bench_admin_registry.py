@@ -0,0 +1,57 @@
+# backend/benchmarks/bench_admin_registry.py
+# Admin registry (admin_registry.py): auth-check latency against reading
+# the store per request, for both store backends. Parallel binding and
+# reload across processes are covered by tests/test_admin_registry.py.
+#
+#   python benchmarks/bench_admin_registry.py
+#   python benchmarks/bench_admin_registry.py -n 100000
+#
+# Prints a JSON report.
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+
+def open_backend(backend, work):
+    from storage import JsonCertificateStore, SqliteCertificateStore
+    if backend == "json":
+        return JsonCertificateStore(os.path.join(work, "db.json"), os.path.join(work, "admin.json"))
+    return SqliteCertificateStore(os.path.join(work, "credlytic.db"))
+
+
+def latency(backend, n):
+    work = tempfile.mkdtemp(prefix=f"credlytic-admins-{backend}-")
+    store = open_backend(backend, work)
+    from admin_registry import AdminRegistry
+    registry = AdminRegistry(store)
+    for i in range(50):
+        registry.bind(f"admin-{i}@example.edu", {"wallet": f"0x{i:04x}", "verified": True})
+
+    def per_call(fn):
+        t0 = time.perf_counter()
+        for i in range(n):
+            fn(f"admin-{i % 50}@example.edu")
+        return round((time.perf_counter() - t0) / n * 1e6, 2)
+
+    return {"backend": backend, "store_get_admin_us": per_call(store.get_admin),
+            "registry_get_us": per_call(registry.get)}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Admin registry auth-check latency")
+    ap.add_argument("-n", type=int, default=20000, help="lookups per backend")
+    args = ap.parse_args()
+
+    report = {"latency": [latency(b, args.n) for b in ("json", "sqlite")]}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# backend/benchmarks/bench_anchor.py
+# One token per certificate (CERT_ANCHOR_MODE=mint) against Merkle-batched
+# anchoring (CERT_ANCHOR_MODE=merkle), against mock_aptos_node.py: each
+# mode issues the same certificates through the issuance pipeline in a
+# fresh process (the mode is read at import) and reports the chain
+# transactions it took, the time until every certificate was confirmed
+# on chain (tx_hash set) and the proof sizes. Every certificate is then
+# verified with check_chain rules (inclusion proof + anchored root), and
+# a tampered entry must fail.
+#
+#   python benchmarks/bench_anchor.py -n 200 --window 2
+#
+# Rendering is lazy and email goes to mock_smtp_server.py; the clock
+# stops when the last certificate is on chain, before its email.
+# Prints a JSON report; exits 1 if any check fails.
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+
+def run_child(args):
+    from aptos_sdk.account import Account
+    from mock_aptos_node import MockAptosNode
+    from mock_smtp_server import MockSmtpServer
+
+    node = MockAptosNode(block_time=args.block_time, seed=1).start()
+    smtp = MockSmtpServer().start()
+    work = tempfile.mkdtemp(prefix="credlytic-anchor-")
+    os.environ.update({
+        "APTOS_NODE_URL": node.url,
+        "UNIVERSITY_PRIVATE_KEY": str(Account.generate().private_key),
+        "CREDLYTIC_DB": os.path.join(work, "credlytic.db"),
+        "CERT_FILES_DIR": os.path.join(work, "files"),
+        "CERT_RENDER_MODE": "lazy",
+        "SMTP_HOST": "127.0.0.1", "SMTP_PORT": str(smtp.port), "SMTP_SSL": "0",
+        "EMAIL_ADDRESS": "registrar@example.edu", "EMAIL_PASSWORD": "x",
+    })
+
+    from storage import open_store
+    from pipeline import IssuancePipeline
+    from anchoring import check_inclusion, proof_root
+    from chain_state import ChainState
+
+    store = open_store()
+    pipeline = IssuancePipeline(store).start()
+    failures = []
+
+    def check(name, cond):
+        if not cond:
+            failures.append(name)
+
+    emails = [f"student{i}@example.edu" for i in range(args.n)]
+    start_version = node.chain.version
+    t0 = time.perf_counter()
+    ids = [pipeline.submit(f"Student {i}", e, "Distributed Systems")["id"]
+           for i, e in enumerate(emails)]
+    deadline = time.time() + args.timeout
+    while time.time() < deadline:
+        entries = [store.get_certificate(i) for i in ids]
+        if all(e.get("tx_hash") or e["status"] == "failed" for e in entries):
+            break
+        time.sleep(0.05)
+    seconds = time.perf_counter() - t0
+    check("all on chain", all(e.get("tx_hash") for e in entries))
+
+    chain = ChainState(node.url).start()
+    verified = 0
+    for e in entries:
+        if not e.get("tx_hash"):
+            continue
+        anchor = e.get("anchor") or {}
+        ok = check_inclusion(e)[0] and chain.verify(e["email"], e["tx_hash"], anchor.get("root"))[0]
+        verified += ok
+
+    proofs = [len(e["anchor"]["proof"]) for e in entries if e.get("anchor")]
+    report = {
+        "mode": args.mode,
+        "certificates": args.n,
+        "chain_transactions": node.chain.version - start_version,
+        "seconds_until_on_chain": round(seconds, 3),
+        "verified": verified,
+        "proof_hashes_max": max(proofs) if proofs else None,
+        "proof_bytes_max": max(proofs) * 32 if proofs else None,
+    }
+    check("all verified", verified == args.n)
+
+    if args.mode == "merkle" and entries[0].get("anchor"):
+        # Changing any anchored field breaks the proof; a root that was
+        # never anchored is refused by the chain check
+        tampered = dict(entries[0], course="Forged Course")
+        check("tampered entry rejected", not check_inclusion(tampered)[0])
+        forged = "00" * 32
+        check("forged proof rejected",
+              proof_root(entries[0]["anchor"]["leaf"], [["R", forged]]) != entries[0]["anchor"]["root"])
+        check("wrong root rejected",
+              not chain.verify(entries[0]["email"], entries[0]["tx_hash"], forged)[0])
+
+    report["failures"] = failures
+    print(json.dumps(report))
+    sys.stdout.flush()
+    # Render workers (lazy renders for the emails) would outlive os._exit
+    # and hold the parent's pipe open
+    from render_pool import shutdown_render_pool
+    shutdown_render_pool()
+    # Skip teardown of the pipeline, anchorer, node and SMTP threads
+    os._exit(0)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Per-certificate minting vs Merkle anchoring")
+    ap.add_argument("-n", type=int, default=200, help="certificates to issue")
+    ap.add_argument("--window", type=float, default=2.0, help="ANCHOR_WINDOW for merkle mode (s)")
+    ap.add_argument("--block-time", type=float, default=0.2, help="mock node block time (s)")
+    ap.add_argument("--timeout", type=float, default=300)
+    ap.add_argument("--modes", default="mint,merkle")
+    ap.add_argument("--mode", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.mode:
+        return run_child(args)
+
+    results, failed = [], False
+    for mode in args.modes.split(","):
+        env = dict(os.environ, CERT_ANCHOR_MODE=mode, ANCHOR_WINDOW=str(args.window),
+                   ANCHOR_POLL_INTERVAL="0.1", LOG_REQUESTS="0")
+        with tempfile.TemporaryFile("w+") as out:
+            subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--mode", mode, "-n", str(args.n),
+                 "--block-time", str(args.block_time), "--timeout", str(args.timeout)],
+                cwd=BACKEND, env=env, stdout=out, stderr=subprocess.DEVNULL,
+            )
+            out.seek(0)
+            result = json.loads(out.read().strip().splitlines()[-1])
+        failed = failed or bool(result["failures"])
+        results.append(result)
+        print(json.dumps(result), file=sys.stderr)
+
+    print(json.dumps({"results": results}, indent=2))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
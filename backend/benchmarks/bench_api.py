@@ -0,0 +1,491 @@
+# backend/benchmarks/bench_api.py
+# End-to-end benchmark of the issue, student lookup, employer verify and
+# certificate rendering paths through the Flask test client, at several
+# database sizes and concurrency levels.
+#
+#   python benchmarks/bench_api.py --out bench.json
+#   python benchmarks/bench_api.py --db-sizes 1000,10000 --concurrency 1,8 -n 500
+#   python benchmarks/bench_api.py --baseline bench.json      # exit 1 on regression
+#
+# Aptos is replaced by a stub admin_mint module (fixed latency, no chain)
+# and SMTP by mock_smtp_server.py. Each database size runs in its own
+# process, so startup cost and peak memory are measured per size. Seeded
+# databases are kept in --work-dir and reused by later runs.
+#
+# Output is JSON: one result per (db_size, scenario, concurrency) with
+# p50/p99/mean latency, throughput, errors and peak RSS.
+
+import os
+import sys
+import json
+import time
+import types
+import random
+import sqlite3
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+SCENARIOS = ["get_certificates", "employer_verify", "generate_certificate_png", "issue"]
+# Rendering is ~100x slower than the API paths; it gets fewer requests
+RENDER_REQUESTS = 40
+
+ADMIN_EMAIL = "bench-admin@credlytic.local"
+ADMIN_WALLET = "0xbe4c"
+
+
+def tx_hash_for(i):
+    return "0x%064x" % (i + 1)
+
+
+def student_email(i, students):
+    return f"student{i % students}@bench.local"
+
+
+# ============================================================
+#                        MEMORY
+# ============================================================
+
+def rss_kib():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        return 0
+
+
+def peak_rss_kib():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+class RssSampler:
+    """Highest RSS seen while the block runs (ru_maxrss only ever grows)."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, rss_kib())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = rss_kib()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_kib())
+
+
+# ============================================================
+#                     SEEDING / STUBS
+# ============================================================
+
+def seed_database(path, size, students):
+    """Creates a database with `size` delivered certificates (bulk insert)."""
+    from storage import SQLITE_SCHEMA
+
+    tmp = path + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    conn = sqlite3.connect(tmp)
+    conn.executescript(SQLITE_SCHEMA)
+    conn.execute("PRAGMA journal_mode=WAL")
+
+    def rows(start, stop):
+        for i in range(start, stop):
+            email = student_email(i, students)
+            tx = tx_hash_for(i)
+            cert_id = "%032x" % (i + 1)
+            entry = {
+                "id": cert_id,
+                "status": "delivered",
+                "file": f"cert_{cert_id}.pdf",
+                "files": {"pdf": f"cert_{cert_id}.pdf"},
+                "thumbnail": f"cert_{cert_id}_thumb.webp",
+                "student": f"Student {i % students}",
+                "email": email,
+                "course": f"Course {i % 50}",
+                "tx_hash": tx,
+                "token_name": f"Certificate: Student {i % students} - Course {i % 50}",
+                "explorer_url": f"https://explorer.aptoslabs.com/txn/{tx}?network=devnet",
+                "issued_at": "2025-01-01T00:00:00+00:00",
+                "email_status": "sent",
+            }
+            yield cert_id, email, tx, entry["issued_at"], json.dumps(entry)
+
+    step = 50_000
+    for start in range(0, size, step):
+        with conn:
+            conn.executemany(
+                "INSERT INTO certificates (id, email, tx_hash, issued_at, data) VALUES (?, ?, ?, ?, ?)",
+                rows(start, min(start + step, size)),
+            )
+    with conn:
+        conn.execute(
+            "INSERT INTO admins (email, data) VALUES (?, ?)",
+            (ADMIN_EMAIL, json.dumps({"wallet": ADMIN_WALLET, "verified": True})),
+        )
+    conn.close()
+    os.replace(tmp, path)
+
+
+def install_aptos_stub(latency):
+    """Stand-in for admin_mint: sleeps like a confirmed transaction, no chain access."""
+    stub = types.ModuleType("admin_mint")
+    counter = iter(range(10**12, 10**13))
+    lock = threading.Lock()
+
+    def mint_certificate_with_email(student_name, course_name, student_email):
+        with lock:
+            n = next(counter)
+        time.sleep(latency)
+        return "0x%064x" % n, f"Certificate: {student_name} - {course_name} #{n}"
+
+    stub.mint_certificate_with_email = mint_certificate_with_email
+    sys.modules["admin_mint"] = stub
+
+
+# ============================================================
+#                     SCENARIO RUNNER
+# ============================================================
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    k = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def run_scenario(make_call, requests, concurrency):
+    """Runs `requests` calls over `concurrency` threads; each thread gets its own call()."""
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def worker():
+        nonlocal errors
+        call = make_call()
+        local, failed = [], 0
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            t0 = time.perf_counter()
+            try:
+                ok = call(i)
+            except Exception:
+                ok = False
+            local.append(time.perf_counter() - t0)
+            failed += not ok
+        with lock:
+            latencies.extend(local)
+            errors += failed
+
+    with RssSampler() as mem:
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as ex:
+            for f in [ex.submit(worker) for _ in range(concurrency)]:
+                f.result()
+        elapsed = time.perf_counter() - t0
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "peak_rss_mib": round(mem.peak / 1024, 1),
+    }
+
+
+def scenario_calls(app_module, db_size, students, out_dir):
+    from renderer import generate_certificate_png
+
+    app = app_module.app
+
+    def get_certificates():
+        client = app.test_client()
+        rng = random.Random()
+
+        def call(i):
+            email = student_email(rng.randrange(db_size), students)
+            r = client.get("/api/student/certificates", query_string={"email": email})
+            return r.status_code == 200
+        return call
+
+    def employer_verify():
+        client = app.test_client()
+        rng = random.Random()
+
+        def call(i):
+            n = rng.randrange(db_size)
+            r = client.post("/api/employer/verify", json={
+                "email": student_email(n, students), "tx_hash": tx_hash_for(n),
+            })
+            return r.status_code == 200
+        return call
+
+    def render():
+        def call(i):
+            path = os.path.join(out_dir, f"render_{threading.get_ident()}_{i}.pdf")
+            return generate_certificate_png(
+                f"Student {i}", "Distributed Systems", tx_hash_for(i), "t", path
+            ) is not None
+        return call
+
+    def issue():
+        client = app.test_client()
+
+        def call(i):
+            r = client.post("/api/admin/issue", json={
+                "admin_email": ADMIN_EMAIL,
+                "admin_wallet": ADMIN_WALLET,
+                "student_name": f"New Student {i}",
+                "student_email": f"new{i}@bench.local",
+                "course_name": "Distributed Systems",
+            })
+            return r.status_code == 202
+        return call
+
+    return {
+        "get_certificates": get_certificates,
+        "employer_verify": employer_verify,
+        "generate_certificate_png": render,
+        "issue": issue,
+    }
+
+
+def wait_for_pipeline(app_module, timeout):
+    """Seconds until every issued certificate left the pipeline (None on timeout)."""
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < timeout:
+        counts = app_module.pipeline.stats()["counts"]
+        if not set(counts) - {"done", "failed"}:
+            return round(time.perf_counter() - t0, 2)
+        time.sleep(0.1)
+    return None
+
+
+# ============================================================
+#                   CHILD: ONE DB SIZE
+# ============================================================
+
+# Result lines are prefixed so the app's own JSON logs on stdout are not mistaken for them
+RESULT_PREFIX = "BENCH "
+
+
+def emit(row):
+    print(RESULT_PREFIX + json.dumps(row), flush=True)
+
+
+def run_child(args):
+    db_size = args.db_size
+    students = max(1, db_size // 2)
+    db_path = os.path.join(args.work_dir, f"bench_{db_size}.db")
+
+    out_dir = tempfile.mkdtemp(prefix="credlytic-bench-", dir=args.work_dir)
+    run_db = os.path.join(out_dir, "credlytic.db")
+    # Read by storage/file_store at import, so set before anything imports them
+    os.environ["CREDLYTIC_DB"] = run_db
+    os.environ["CERT_FILES_DIR"] = out_dir
+
+    t0 = time.perf_counter()
+    if not os.path.exists(db_path):
+        seed_database(db_path, db_size, students)
+    seed_seconds = round(time.perf_counter() - t0, 2)
+
+    # Issue writes to the database; work on a copy so the seed stays reusable
+    src = sqlite3.connect(db_path)
+    dst = sqlite3.connect(run_db)
+    src.backup(dst)
+    src.close()
+    dst.close()
+
+    install_aptos_stub(args.mint_latency)
+
+    from mock_smtp_server import MockSmtpServer
+
+    smtp = MockSmtpServer().start()
+    os.environ.update(SMTP_HOST="127.0.0.1", SMTP_PORT=str(smtp.port), SMTP_SSL="0",
+                      EMAIL_ADDRESS="bench@credlytic.local", EMAIL_PASSWORD="", MAIL_RATE="0",
+                      LOG_REQUESTS="0")
+
+    rss_before = rss_kib()
+    t0 = time.perf_counter()
+    import app as app_module
+    startup = {
+        "startup_seconds": round(time.perf_counter() - t0, 2),
+        "startup_rss_mib": round((rss_kib() - rss_before) / 1024, 1),
+    }
+
+    calls = scenario_calls(app_module, db_size, students, out_dir)
+    for scenario in args.scenarios:
+        for concurrency in args.concurrency:
+            n = min(args.requests, RENDER_REQUESTS) if scenario == "generate_certificate_png" \
+                else args.requests
+            result = run_scenario(calls[scenario], n, concurrency)
+            if scenario == "issue":
+                result["pipeline_drain_seconds"] = wait_for_pipeline(app_module, args.drain_timeout)
+            emit({
+                "db_size": db_size,
+                "scenario": scenario,
+                "concurrency": concurrency,
+                **result,
+                "seed_seconds": seed_seconds,
+                **startup,
+            })
+
+    emit({"db_size": db_size, "process_peak_rss_mib": round(peak_rss_kib() / 1024, 1)})
+
+    # Spawned render workers would otherwise keep our stdout pipe open
+    from render_pool import shutdown_render_pool
+    app_module.pipeline.stop()
+    app_module.mailer.stop()
+    shutdown_render_pool()
+    smtp.stop()
+    os._exit(0)
+
+
+# ============================================================
+#                  DRIVER / REGRESSION CHECK
+# ============================================================
+
+def compare(results, baseline_path, tolerance):
+    """Regressions beyond `tolerance` (fraction) in p99 latency or throughput."""
+    with open(baseline_path) as f:
+        baseline = {
+            (r["db_size"], r["scenario"], r["concurrency"]): r for r in json.load(f)["results"]
+        }
+    regressions = []
+    for r in results:
+        base = baseline.get((r["db_size"], r["scenario"], r["concurrency"]))
+        if not base:
+            continue
+        if r["p99_ms"] > base["p99_ms"] * (1 + tolerance):
+            regressions.append({**_key(r), "metric": "p99_ms",
+                                "baseline": base["p99_ms"], "current": r["p99_ms"]})
+        if r["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append({**_key(r), "metric": "throughput_rps",
+                                "baseline": base["throughput_rps"], "current": r["throughput_rps"]})
+    return regressions
+
+
+def _key(r):
+    return {"db_size": r["db_size"], "scenario": r["scenario"], "concurrency": r["concurrency"]}
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def int_list(value):
+    return [int(float(v)) for v in value.split(",") if v.strip()]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="End-to-end API benchmark through the Flask test client")
+    ap.add_argument("--db-sizes", type=int_list, default=[1000, 10000, 100000, 1000000],
+                    help="comma separated entry counts (default 1000,10000,100000,1000000)")
+    ap.add_argument("--concurrency", type=int_list, default=[1, 4, 16, 64],
+                    help="comma separated thread counts (default 1,4,16,64)")
+    ap.add_argument("--scenarios", type=lambda v: v.split(","), default=SCENARIOS,
+                    help=f"comma separated subset of {','.join(SCENARIOS)}")
+    ap.add_argument("-n", "--requests", type=int, default=1000,
+                    help=f"requests per scenario and concurrency (rendering: at most {RENDER_REQUESTS})")
+    ap.add_argument("--mint-latency", type=float, default=0.05, help="stub Aptos seconds per mint")
+    ap.add_argument("--drain-timeout", type=float, default=300,
+                    help="seconds to wait for issued certificates to finish")
+    ap.add_argument("--work-dir", default=os.path.join(tempfile.gettempdir(), "credlytic-bench"),
+                    help="seeded databases and run output (reused between runs)")
+    ap.add_argument("--out", help="write the JSON report here (default stdout)")
+    ap.add_argument("--baseline", help="earlier report; exit 1 if p99/throughput regressed")
+    ap.add_argument("--tolerance", type=float, default=0.25,
+                    help="allowed regression against --baseline (fraction, default 0.25)")
+    ap.add_argument("--db-size", type=int, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        ap.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    os.makedirs(args.work_dir, exist_ok=True)
+
+    if args.db_size is not None:
+        run_child(args)
+        return
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "requests": args.requests,
+            "mint_latency": args.mint_latency,
+        },
+        "results": [],
+        "processes": [],
+    }
+
+    for size in args.db_sizes:
+        cmd = [sys.executable, os.path.abspath(__file__), "--db-size", str(size),
+               "--concurrency", ",".join(map(str, args.concurrency)),
+               "--scenarios", ",".join(args.scenarios), "-n", str(args.requests),
+               "--mint-latency", str(args.mint_latency), "--drain-timeout", str(args.drain_timeout),
+               "--work-dir", args.work_dir]
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True, cwd=BACKEND)
+        for line in proc.stdout:
+            if not line.startswith(RESULT_PREFIX):
+                continue    # the app's own logs
+            row = json.loads(line[len(RESULT_PREFIX):])
+            if "scenario" in row:
+                report["results"].append(row)
+                print(f"[BENCH] size={row['db_size']:>8} {row['scenario']:<25} c={row['concurrency']:<3}"
+                      f" p50={row['p50_ms']:>9.2f}ms p99={row['p99_ms']:>9.2f}ms"
+                      f" {row['throughput_rps']:>8.1f}/s err={row['errors']}", file=sys.stderr)
+            else:
+                report["processes"].append(row)
+        if proc.wait() != 0:
+            print(f"[BENCH ERROR] db_size={size} exited with {proc.returncode}", file=sys.stderr)
+
+    if args.baseline:
+        report["regressions"] = compare(report["results"], args.baseline, args.tolerance)
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if report.get("regressions"):
+        print(f"[BENCH] {len(report['regressions'])} regression(s) against {args.baseline}",
+              file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
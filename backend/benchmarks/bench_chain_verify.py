@@ -0,0 +1,123 @@
+# backend/benchmarks/bench_chain_verify.py
+# On-chain verification (chain_state.py) against mock_aptos_node.py:
+# mints real create_token_script transactions with a throwaway key, then
+# measures cold lookups, cached lookups, coalescing of concurrent lookups
+# for one hash, the persistent cache across instances, negative-entry
+# expiry and the student_id check.
+#
+#   python benchmarks/bench_chain_verify.py -n 50 --latency 0.05
+#
+# Prints a JSON report; exits 1 if any check fails.
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="On-chain verification against the mock Aptos node")
+    ap.add_argument("-n", type=int, default=50, help="tokens to mint and verify")
+    ap.add_argument("--latency", type=float, default=0.05, help="mock node latency per request (s)")
+    ap.add_argument("--callers", type=int, default=32, help="concurrent callers for one hash")
+    args = ap.parse_args()
+
+    from aptos_sdk.account import Account
+    from mock_aptos_node import MockAptosNode
+
+    node = MockAptosNode(block_time=0.05, latency=args.latency, seed=1).start()
+    work = tempfile.mkdtemp(prefix="credlytic-chain-")
+    os.environ.update({
+        "APTOS_NODE_URL": node.url,
+        "UNIVERSITY_PRIVATE_KEY": str(Account.generate().private_key),
+        "CREDLYTIC_DB": os.path.join(work, "credlytic.db"),
+    })
+
+    import admin_mint
+    from chain_state import ChainState, confirms
+
+    emails = [f"student{i}@example.edu" for i in range(args.n)]
+    futures = [
+        admin_mint.get_mint_engine().submit(admin_mint.build_mint_payload("Student", "Course", e)[0])
+        for e in emails
+    ]
+    hashes = [f.result(timeout=60) for f in futures]
+
+    chain = ChainState(node.url, negative_ttl=0.5).start()
+    report, failures = {"tokens": args.n, "latency": args.latency}, []
+
+    def check(name, cond):
+        if not cond:
+            failures.append(name)
+
+    # Cold: every hash goes to the fullnode once
+    before = node.chain.lookups
+    t0 = time.perf_counter()
+    results = dict(chain.check_many(hashes))
+    report["cold_seconds"] = round(time.perf_counter() - t0, 4)
+    report["cold_fullnode_requests"] = node.chain.lookups - before
+    check("cold lookups", report["cold_fullnode_requests"] == args.n)
+    check("student_id matches", all(confirms(results[h], e)[0] for h, e in zip(hashes, emails)))
+    check("student_id mismatch rejected", not confirms(results[hashes[0]], "someone@else.edu")[0])
+
+    # Warm: served from the cache, no fullnode traffic
+    before = node.chain.lookups
+    t0 = time.perf_counter()
+    for h, e in zip(hashes, emails):
+        chain.verify(e, h)
+    report["cached_us_per_verify"] = round((time.perf_counter() - t0) / args.n * 1e6, 1)
+    check("cached lookups", node.chain.lookups == before)
+
+    # A fresh instance on the same database still has the final entries
+    other = ChainState(node.url).start()
+    before = node.chain.lookups
+    other.check(hashes[0])
+    check("persistent cache", node.chain.lookups == before)
+    other.stop()
+
+    # Concurrent callers for an uncached hash share one request
+    chain.forget(hashes[0])
+    before = node.chain.lookups
+    barrier = threading.Barrier(args.callers)
+
+    def caller():
+        barrier.wait()
+        chain.check(hashes[0])
+
+    threads = [threading.Thread(target=caller) for _ in range(args.callers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    report["coalesced_callers"] = args.callers
+    report["coalesced_fullnode_requests"] = node.chain.lookups - before
+    check("coalescing", report["coalesced_fullnode_requests"] == 1)
+
+    # Not found is cached only for negative_ttl
+    missing = "0x" + "ab" * 32
+    before = node.chain.lookups
+    check("not found", chain.check(missing)["status"] == "not_found")
+    chain.check(missing)
+    check("negative entry cached", node.chain.lookups - before == 1)
+    time.sleep(0.6)
+    chain.check(missing)
+    check("negative entry expires", node.chain.lookups - before == 2)
+
+    report["stats"] = chain.stats
+    report["failures"] = failures
+    print(json.dumps(report, indent=2))
+
+    chain.stop()
+    admin_mint.get_mint_engine().stop()
+    node.stop()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# backend/benchmarks/bench_formats.py
+# Encode time and file size for each certificate output format
+# (CERT_OUTPUT_FORMATS) and for the thumbnail variants, so storage and
+# email size can be traded against issuance latency.
+#
+#   python benchmarks/bench_formats.py -n 10
+
+import os
+import io
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import features  # noqa: E402
+
+from renderer import CertificateRenderer, encoder_options  # noqa: E402
+
+
+SAMPLE = (
+    "Ada Lovelace",
+    "Distributed Systems Engineering",
+    "0x" + "9f3c" * 16,
+    "Certificate: Ada Lovelace #1700000000000",
+)
+
+
+def encode(img, fmt, n):
+    _, pil_format, options = encoder_options()[fmt]
+    size = 0
+    t0 = time.perf_counter()
+    for _ in range(n):
+        buf = io.BytesIO()
+        img.save(buf, pil_format, **options)
+        size = buf.tell()
+    return (time.perf_counter() - t0) / n, size
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=5, help="encodes per format")
+    ap.add_argument("--thumb-width", type=int, default=480)
+    args = ap.parse_args()
+
+    r = CertificateRenderer(thumb_width=args.thumb_width)
+    img = r.render(*SAMPLE)
+    thumb = r.thumbnail(img)
+
+    formats = [f for f in encoder_options() if f != "webp" or features.check("webp")]
+
+    full = []
+    for fmt in formats:
+        secs, size = encode(img, fmt, args.n)
+        full.append({"format": fmt, "ms": round(secs * 1000, 1), "kib": round(size / 1024, 1)})
+
+    thumbs = []
+    for fmt in formats:
+        if fmt == "pdf":
+            continue
+        secs, size = encode(thumb, fmt, args.n)
+        thumbs.append({"format": fmt, "ms": round(secs * 1000, 2), "kib": round(size / 1024, 1)})
+
+    # The old behaviour: PNG and PDF for every certificate
+    by_fmt = {row["format"]: row for row in full}
+    legacy = {
+        "ms": round(by_fmt["png"]["ms"] + by_fmt["pdf"]["ms"], 1),
+        "kib": round(by_fmt["png"]["kib"] + by_fmt["pdf"]["kib"], 1),
+    }
+
+    print(json.dumps({
+        "image": list(img.size),
+        "thumbnail": list(thumb.size),
+        "full_size": full,
+        "thumbnails": thumbs,
+        "legacy_png_plus_pdf": legacy,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# backend/benchmarks/bench_mail_memory.py
+# Peak RSS and throughput while sending many certificate emails to the
+# local mock SMTP server: the old message construction (f-string bodies,
+# whole attachment read and encoded in memory, new SSL context per
+# message) vs the streamed CertificateMessage.
+#
+#   python benchmarks/bench_mail_memory.py -n 10000
+#   python benchmarks/bench_mail_memory.py -n 2000 --attachment-mb 20
+#
+# Each mode runs in its own process so peak RSS is not shared. Linux/macOS
+# only (uses the resource module; RSS samples need /proc).
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+
+def rss_kib():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        return None
+
+
+def peak_rss_kib():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+# ============================================================
+#                       SENDER (CHILD)
+# ============================================================
+
+def legacy_message(to_email, attachment_path):
+    """Message construction as email_utils did it before streaming."""
+    import ssl
+    import mimetypes
+    from email.message import EmailMessage
+    from email_utils import EMAIL_ADDRESS
+
+    ssl.create_default_context()
+
+    student_name, course_name = "Ada Lovelace", "Distributed Systems"
+    explorer_url, tx_hash_display = "https://explorer.aptoslabs.com/txn/0x1", "0x1"
+
+    msg = EmailMessage()
+    msg["Subject"] = "Your Credlytic Blockchain Certificate"
+    msg["From"] = EMAIL_ADDRESS
+    msg["To"] = to_email
+    msg.set_content(f"""
+Hello {student_name},
+
+Your certificate for "{course_name}" has been successfully issued.
+
+Blockchain Explorer:
+{explorer_url}
+
+Transaction Hash:
+{tx_hash_display}
+""")
+    msg.add_alternative(f"""
+<html><body><p>Hello <strong>{student_name}</strong>,</p>
+<p>Your certificate for <strong>{course_name}</strong> has been issued.</p>
+<a href="{explorer_url}">{explorer_url}</a><code>{tx_hash_display}</code></body></html>
+""", subtype="html")
+
+    with open(attachment_path, "rb") as f:
+        file_data = f.read()
+        file_name = os.path.basename(attachment_path)
+        ctype = mimetypes.guess_type(file_name)[0] or "application/pdf"
+        maintype, subtype = ctype.split("/", 1)
+        msg.add_attachment(file_data, maintype=maintype, subtype=subtype, filename=file_name)
+    return msg
+
+
+def run_sender(mode, n, attachment):
+    import email_utils
+
+    server = email_utils.open_smtp_connection()
+    samples = []
+    step = max(1, n // 10)
+
+    t0 = time.perf_counter()
+    for i in range(n):
+        to = f"student{i}@example.com"
+        if mode == "legacy":
+            server.send_message(legacy_message(to, attachment))
+        else:
+            email_utils.build_certificate_message(
+                to, "Ada Lovelace", "Distributed Systems",
+                "https://explorer.aptoslabs.com/txn/0x1", attachment, tx_hash="0x1",
+            ).send(server)
+        if i % step == 0:
+            samples.append(rss_kib())
+    dt = time.perf_counter() - t0
+    server.quit()
+
+    print(json.dumps({
+        "mode": mode,
+        "seconds": round(dt, 2),
+        "msgs_per_sec": round(n / dt, 1),
+        "peak_rss_mib": round(peak_rss_kib() / 1024, 1),
+        "rss_samples_mib": [round(s / 1024, 1) for s in samples if s],
+    }))
+
+
+# ============================================================
+#                        DRIVER
+# ============================================================
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=10000)
+    ap.add_argument("--attachment-mb", type=float, default=0,
+                    help="random attachment of this size instead of a rendered PDF")
+    ap.add_argument("--mode", choices=["legacy", "streaming"], help=argparse.SUPPRESS)
+    ap.add_argument("--attachment", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.mode:
+        run_sender(args.mode, args.n, args.attachment)
+        return
+
+    from mock_smtp_server import MockSmtpServer
+
+    tmp = tempfile.mkdtemp(prefix="credlytic-mailmem-")
+    if args.attachment_mb:
+        attachment = os.path.join(tmp, "large.pdf")
+        with open(attachment, "wb") as f:
+            for _ in range(int(args.attachment_mb * 16)):
+                f.write(os.urandom(64 * 1024))
+    else:
+        from renderer import CertificateRenderer
+        attachment = CertificateRenderer(formats="pdf", thumb_width=0).render_to_file(
+            "Ada Lovelace", "Distributed Systems", "0x" + "ab" * 32, "t",
+            os.path.join(tmp, "cert.pdf"),
+        )
+
+    results = {"n": args.n, "attachment_kib": round(os.path.getsize(attachment) / 1024, 1),
+               "modes": []}
+
+    with MockSmtpServer() as smtp:
+        env = dict(os.environ, SMTP_HOST="127.0.0.1", SMTP_PORT=str(smtp.port), SMTP_SSL="0",
+                   EMAIL_ADDRESS=os.getenv("EMAIL_ADDRESS") or "bench@credlytic.local",
+                   EMAIL_PASSWORD="")
+        for mode in ("legacy", "streaming"):
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--mode", mode,
+                 "-n", str(args.n), "--attachment", attachment],
+                env=env, capture_output=True, text=True, check=True,
+            ).stdout
+            results["modes"].append(json.loads(out.strip().splitlines()[-1]))
+        results["server"] = smtp.stats.as_dict()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
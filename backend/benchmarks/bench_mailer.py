@@ -0,0 +1,113 @@
+# backend/benchmarks/bench_mailer.py
+# Certificate email throughput against the local mock SMTP server:
+# one connection + login per message (send_certificate_email) vs the
+# pooled, batched Mailer outbox. --connect-delay stands in for the
+# TLS handshake and login of a real provider.
+#
+#   python benchmarks/bench_mailer.py -n 200 --connect-delay 0.2
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+TMP = tempfile.mkdtemp(prefix="credlytic-mail-")
+
+# Configure before the backend modules read their env vars
+os.environ.update({
+    "CREDLYTIC_DB": os.path.join(TMP, "bench.db"),
+    "SMTP_HOST": "127.0.0.1",
+    "SMTP_SSL": "0",
+    "EMAIL_ADDRESS": os.getenv("EMAIL_ADDRESS") or "bench@credlytic.local",
+    "EMAIL_PASSWORD": "bench",
+})
+
+from mock_smtp_server import MockSmtpServer  # noqa: E402
+
+
+def make_attachment():
+    from renderer import CertificateRenderer
+    files = CertificateRenderer(formats="pdf", thumb_width=0).render_files(
+        "Ada Lovelace", "Distributed Systems Engineering", "0x" + "ab" * 32, "t",
+        os.path.join(TMP, "cert.pdf"),
+    )
+    return files["file"]
+
+
+def run_legacy(n, attachment):
+    import email_utils
+    t0 = time.perf_counter()
+    for i in range(n):
+        email_utils.send_certificate_email(
+            f"student{i}@example.com", "Ada Lovelace", "Distributed Systems",
+            "https://explorer.aptoslabs.com/txn/0x1", attachment, tx_hash="0x1",
+        )
+    return time.perf_counter() - t0
+
+
+def run_mailer(n, attachment, workers, batch_size):
+    from storage import SqliteCertificateStore
+    from mailer import Mailer, SmtpPool
+
+    store = SqliteCertificateStore(os.environ["CREDLYTIC_DB"])
+    # Rate limiting is a provider policy, not part of what is measured here
+    pool = SmtpPool(size=workers, rate=0)
+    mailer = Mailer(store, workers=workers, batch_size=batch_size, pool=pool)
+
+    t0 = time.perf_counter()
+    mailer.start()
+    for i in range(n):
+        entry = store.add_certificate({
+            "student": "Ada Lovelace", "email": f"student{i}@example.com",
+            "course": "Distributed Systems", "tx_hash": f"0x{i:064x}",
+            "explorer_url": "https://explorer.aptoslabs.com/txn/0x1",
+        })
+        mailer.enqueue(entry, attachment)
+    while mailer.status().get("sent", 0) + mailer.status().get("failed", 0) < n:
+        time.sleep(0.02)
+    dt = time.perf_counter() - t0
+
+    mailer.stop()
+    return dt, mailer.status(), dict(mailer.pool.stats)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=100)
+    ap.add_argument("--connect-delay", type=float, default=0.1)
+    ap.add_argument("--workers", type=int, default=2)
+    ap.add_argument("--batch-size", type=int, default=20)
+    args = ap.parse_args()
+
+    attachment = make_attachment()
+    results = {"n": args.n, "connect_delay": args.connect_delay,
+               "attachment_kib": round(os.path.getsize(attachment) / 1024, 1)}
+
+    with MockSmtpServer(connect_delay=args.connect_delay) as smtp:
+        import email_utils
+        email_utils.SMTP_PORT = smtp.port
+
+        dt = run_legacy(args.n, attachment)
+        results["per_message_connection"] = {
+            "seconds": round(dt, 3), "msgs_per_sec": round(args.n / dt, 1),
+            **smtp.stats.as_dict(),
+        }
+
+    with MockSmtpServer(connect_delay=args.connect_delay) as smtp:
+        email_utils.SMTP_PORT = smtp.port
+        dt, status, pool_stats = run_mailer(args.n, attachment, args.workers, args.batch_size)
+        results["pooled_mailer"] = {
+            "seconds": round(dt, 3), "msgs_per_sec": round(args.n / dt, 1),
+            "outbox": status, "pool": pool_stats, **smtp.stats.as_dict(),
+        }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# backend/benchmarks/bench_render.py
+# Certificate rendering throughput: cold (template + fonts loaded per
+# certificate, as generate_certificate_png used to do) vs the cached
+# CertificateRenderer.
+#
+#   python benchmarks/bench_render.py -n 50
+
+import os
+import io
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from renderer import CertificateRenderer  # noqa: E402
+
+
+SAMPLE = (
+    "Ada Lovelace",
+    "Distributed Systems Engineering",
+    "0x" + "9f3c" * 16,
+    "Certificate: Ada Lovelace #1700000000000",
+)
+
+
+def _encode(img):
+    """PNG + PDF into memory, matching what issuance writes to disk."""
+    buf = io.BytesIO()
+    img.save(buf, "PNG")
+    png = buf.tell()
+    buf = io.BytesIO()
+    img.save(buf, "PDF", resolution=100.0)
+    return png, buf.tell()
+
+
+def bench(label, make_image, n):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        _encode(make_image())
+    dt = time.perf_counter() - t0
+    return {"case": label, "n": n, "seconds": round(dt, 3),
+            "per_cert_ms": round(dt / n * 1000, 2), "certs_per_sec": round(n / dt, 2)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=30, help="certificates per case")
+    ap.add_argument("--render-only", action="store_true", help="skip PNG/PDF encoding")
+    args = ap.parse_args()
+
+    if args.render_only:
+        global _encode
+        _encode = lambda img: None  # noqa: E731
+
+    warm = CertificateRenderer()
+    warm.render(*SAMPLE)
+
+    results = [
+        # Before: every certificate re-decodes the template and reloads fonts
+        bench("cold", lambda: CertificateRenderer().render(*SAMPLE), args.n),
+        # After: one decoded base image, fonts cached by size
+        bench("cached", lambda: warm.render(*SAMPLE), args.n),
+    ]
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
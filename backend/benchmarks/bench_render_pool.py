@@ -0,0 +1,70 @@
+# backend/benchmarks/bench_render_pool.py
+# Rendering throughput (PNG + PDF written to disk) for 1..N worker
+# processes, to check that the render pool scales with core count.
+#
+#   python benchmarks/bench_render_pool.py -n 64 --max-workers 8
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from render_pool import RenderPool, RenderJob  # noqa: E402
+
+
+def worker_counts(max_workers):
+    n, out = 1, []
+    while n < max_workers:
+        out.append(n)
+        n *= 2
+    return out + [max_workers]
+
+
+def run(workers, n, out_dir):
+    pool = RenderPool(workers)
+    try:
+        # Warm every worker (spawn + template decode) outside the timing
+        pool.render_many([RenderJob("Warm", "Up", "0x0", "t", os.path.join(out_dir, f"w{i}.pdf"))
+                          for i in range(workers)])
+
+        jobs = [
+            RenderJob(f"Student {i}", "Distributed Systems", "0x" + f"{i:064x}",
+                      f"Certificate: Student {i}", os.path.join(out_dir, f"c{workers}_{i}.pdf"))
+            for i in range(n)
+        ]
+        t0 = time.perf_counter()
+        paths = pool.render_many(jobs)
+        dt = time.perf_counter() - t0
+    finally:
+        pool.shutdown()
+
+    return {"workers": workers, "n": n, "failed": sum(1 for p in paths if not p),
+            "seconds": round(dt, 3), "certs_per_sec": round(n / dt, 2)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=32, help="certificates per run")
+    ap.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args()
+
+    out_dir = tempfile.mkdtemp(prefix="credlytic-bench-")
+    try:
+        results = [run(w, args.n, out_dir) for w in worker_counts(args.max_workers)]
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+    base = results[0]["certs_per_sec"]
+    for r in results:
+        r["speedup"] = round(r["certs_per_sec"] / base, 2)
+
+    print(json.dumps({"cpu_count": os.cpu_count(), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
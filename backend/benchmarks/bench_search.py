@@ -0,0 +1,214 @@
+# backend/benchmarks/bench_search.py
+# Admin dashboard search (search_index.SearchIndex) over a synthetic
+# SQLite store. Loads -n certificates, through the triggers or by the
+# one-time backfill (--backfill), then times a query mix: browsing,
+# course / month drill-down, deep pages, name and email prefixes,
+# multi-word text and tx hash lookups. Reports p50/p99 per query with
+# facets counted from scratch, and p50 of the following page (cached
+# facets).
+#
+#   python benchmarks/bench_search.py -n 1000000
+#
+# Before timing, a small store is searched through SQLite and through
+# the JSON-store scan; every query must give the same totals, facets
+# and pages. Prints a JSON report; exits 1 if any check fails.
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_api import percentile  # noqa: E402
+
+FIRST = ["Ada", "Alan", "Grace", "Edsger", "Barbara", "Donald", "Frances", "Ken", "Margaret",
+         "Dennis", "Radia", "Leslie", "Tony", "Niklaus", "Shafi", "John", "Katherine", "Linus"]
+LAST = ["Lovelace", "Turing", "Hopper", "Dijkstra", "Liskov", "Knuth", "Allen", "Thompson",
+        "Hamilton", "Ritchie", "Perlman", "Lamport", "Hoare", "Wirth", "Goldwasser", "Backus"]
+COURSES = ["Distributed Systems", "Databases", "Compilers", "Operating Systems", "Rust 101",
+           "Machine Learning", "Cryptography", "Computer Graphics", "Algorithms", "Networks"]
+
+
+def certificates(n, seed=1):
+    rnd = random.Random(seed)
+    for i in range(n):
+        first, last = rnd.choice(FIRST), rnd.choice(LAST)
+        month = 1 + rnd.randrange(36)
+        yield {
+            "id": f"{i:032x}",
+            "status": "delivered",
+            "student": f"{first} {last}",
+            # Students share names; addresses get a number half the time
+            "email": f"{first}.{last}{rnd.choice(['', rnd.randrange(100)])}@example.edu".lower(),
+            "course": rnd.choice(COURSES),
+            "token_name": f"Certificate: {first} {last} #{1700000000000 + i}",
+            "tx_hash": "0x" + format(rnd.getrandbits(256), "064x"),
+            "issued_at": f"{2023 + (month - 1) // 12}-{(month - 1) % 12 + 1:02d}-15T12:00:00+00:00",
+        }
+
+
+def load(db, entries, batch=20000):
+    """Bulk insert straight into the certificates table (the triggers still run)."""
+    rows = []
+
+    def flush():
+        with db.transaction() as c:
+            c.executemany(
+                "INSERT INTO certificates (id, email, tx_hash, issued_at, data) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        rows.clear()
+
+    for e in entries:
+        rows.append((e["id"], e["email"], e["tx_hash"], e["issued_at"], json.dumps(e)))
+        if len(rows) >= batch:
+            flush()
+    if rows:
+        flush()
+
+
+def queries(sample):
+    return {
+        "browse": {},
+        "course": {"course": "Databases"},
+        "month": {"month": "2024-06"},
+        "course+month": {"course": "Compilers", "month": "2025-01"},
+        "prefix 'a'": {"q": "a"},
+        "prefix 'ad'": {"q": "ad"},
+        "prefix 'hop'": {"q": "hop"},
+        "typing 'grace h'": {"q": "grace h"},
+        "name 'grace hopper'": {"q": "grace hopper"},
+        "email prefix": {"q": sample["email"][:12]},
+        "text + course": {"q": "turing", "course": "Cryptography"},
+        "token #": {"q": sample["token_name"].rsplit("#", 1)[1]},
+        "tx hash": {"q": sample["tx_hash"]},
+        "no match": {"q": "zzzzqx"},
+    }
+
+
+def check_against_scan(args, failures):
+    """SQLite index and JSON scan must agree on every query and page."""
+    from storage import JsonCertificateStore, SqliteCertificateStore
+    from search_index import SearchIndex
+
+    work = tempfile.mkdtemp(prefix="credlytic-search-check-")
+    entries = list(certificates(args.check_n, seed=2))
+    sqlite_store = SqliteCertificateStore(os.path.join(work, "check.db"))
+    json_store = JsonCertificateStore(os.path.join(work, "db.json"), os.path.join(work, "admin.json"))
+    grouped = {}
+    for e in entries:
+        grouped.setdefault(e["email"], []).append(e)
+    with open(json_store.db_path, "w") as f:
+        json.dump(grouped, f)
+    # JSON iteration order is per email; SQLite's is insertion order
+    order = [e for es in grouped.values() for e in es]
+    load(sqlite_store.db, order)
+    a, b = SearchIndex(sqlite_store), SearchIndex(json_store)
+
+    for name, q in queries(entries[7]).items():
+        ra, rb = a.search(limit=10, **q), b.search(limit=10, **q)
+        ids_a, ids_b = [e["id"] for e in ra["certificates"]], [e["id"] for e in rb["certificates"]]
+        if (ra["total"], ra["facets"], ids_a) != (rb["total"], rb["facets"], ids_b):
+            failures.append(f"scan mismatch: {name}")
+        # Walk every page: no duplicates, nothing missed
+        seen, cursor = [], None
+        while True:
+            page = a.search(limit=50, cursor=cursor, **q)
+            seen += [e["id"] for e in page["certificates"]]
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+        if len(seen) != len(set(seen)) or len(seen) != ra["total"]:
+            failures.append(f"paging: {name}")
+
+    # Index follows updates: a renamed student is found under the new name only
+    target = entries[3]
+    sqlite_store.update_certificate(target["id"], {"student": "Zyxwv Renamed"})
+    if [e["id"] for e in a.search(q="zyxwv")["certificates"]] != [target["id"]]:
+        failures.append("update not indexed")
+    sqlite_store.update_certificate(target["id"], {"status": "failed"})
+    if a.search(q="zyxwv")["total"] != 1:
+        failures.append("status update changed the index")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Admin search latency")
+    ap.add_argument("-n", type=int, default=200000, help="certificates in the store")
+    ap.add_argument("--repeat", type=int, default=50, help="runs per query")
+    ap.add_argument("--backfill", action="store_true",
+                    help="load first, then build the index in one pass")
+    ap.add_argument("--check-n", type=int, default=3000, help="certificates in the scan check")
+    args = ap.parse_args()
+
+    failures = []
+    check_against_scan(args, failures)
+
+    from storage import SqliteCertificateStore
+    from search_index import SearchIndex
+
+    work = tempfile.mkdtemp(prefix="credlytic-search-")
+    store = SqliteCertificateStore(os.path.join(work, "credlytic.db"))
+
+    t0 = time.perf_counter()
+    if args.backfill:
+        load(store.db, certificates(args.n))
+        loaded = time.perf_counter() - t0
+        index = SearchIndex(store)
+    else:
+        index = SearchIndex(store)
+        load(store.db, certificates(args.n))
+        loaded = time.perf_counter() - t0
+    build = time.perf_counter() - t0
+    print(f"loaded {args.n} in {loaded:.1f}s, indexed by {build:.1f}s", file=sys.stderr)
+
+    sample = store.get_certificate(f"{args.n // 2:032x}")
+    results = {}
+    for name, q in queries(sample).items():
+        # Cold: facets counted from scratch; cached: the next page of the same search
+        cold, cached = [], []
+        for _ in range(args.repeat):
+            index.facet_cache.clear()
+            t = time.perf_counter()
+            r = index.search(**q)
+            cold.append((time.perf_counter() - t) * 1000)
+            t = time.perf_counter()
+            index.search(cursor=r["next_cursor"], **q) if r["next_cursor"] else index.search(**q)
+            cached.append((time.perf_counter() - t) * 1000)
+        cold.sort()
+        cached.sort()
+        results[name] = {
+            "total": r["total"], "exact": r["total_exact"],
+            "p50_ms": round(percentile(cold, 50), 2), "p99_ms": round(percentile(cold, 99), 2),
+            "next_page_p50_ms": round(percentile(cached, 50), 2),
+        }
+        print(name, json.dumps(results[name]), file=sys.stderr)
+
+    # Page 40 of a browse, following cursors
+    cursor, t = None, time.perf_counter()
+    for _ in range(40):
+        cursor = index.search(cursor=cursor)["next_cursor"]
+    results["browse, 40 pages"] = {"ms_per_page": round((time.perf_counter() - t) * 1000 / 40, 2)}
+
+    if results["tx hash"]["total"] != 1:
+        failures.append("tx hash lookup")
+
+    print(json.dumps({
+        "certificates": args.n,
+        "load": "backfill" if args.backfill else "triggers",
+        "load_seconds": round(loaded, 1),
+        "index_seconds": round(build, 1),
+        "db_mb": round(sum(os.path.getsize(os.path.join(work, f)) for f in os.listdir(work)) / 2**20),
+        "queries": results,
+        "failures": failures,
+    }, indent=2))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+# backend/benchmarks/bench_serve.py
+# Load test of the real HTTP servers: the Flask dev server (python app.py)
+# against gunicorn (gunicorn -c gunicorn.conf.py wsgi:app), on the same
+# seeded database, over keep-alive connections.
+#
+#   python benchmarks/bench_serve.py
+#   python benchmarks/bench_serve.py --db-size 10000 --concurrency 8,32 -n 2000
+#   python benchmarks/bench_serve.py --servers gunicorn --workers 4 --threads 8
+#
+# Scenarios: student certificate lookup, employer verify, the index page
+# and the Inter font (both gzip-accepting). Nothing is minted, so the
+# servers run with a throwaway university key. Client and servers share
+# the machine; on few cores the client's own CPU use caps the numbers.
+#
+# Prints a JSON report: req/s, p50/p99 latency and errors per
+# (server, scenario, concurrency), plus bytes per response.
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import signal
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_api import seed_database, student_email, tx_hash_for, percentile  # noqa: E402
+
+SCENARIOS = ["get_certificates", "employer_verify", "index_page", "font"]
+
+
+# ============================================================
+#                        SERVERS
+# ============================================================
+
+def server_command(kind, port, args):
+    if kind == "dev":
+        return [sys.executable, "app.py"]
+    cmd = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app",
+           "--bind", f"127.0.0.1:{port}"]
+    if args.workers:
+        cmd += ["--workers", str(args.workers)]
+    if args.threads:
+        cmd += ["--threads", str(args.threads)]
+    return cmd
+
+
+def start_server(kind, port, env, args, log_path):
+    log = open(log_path, "w")
+    # Own session, so the dev server's reloader child goes down with it
+    proc = subprocess.Popen(server_command(kind, port, args), cwd=BACKEND, env=env,
+                            stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{kind} server exited; see {log_path}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/readyz")
+            if conn.getresponse().status == 200:
+                conn.close()
+                return proc
+        except OSError:
+            pass
+        time.sleep(0.25)
+    stop_server(proc)
+    raise RuntimeError(f"{kind} server not ready after 60s; see {log_path}")
+
+
+def stop_server(proc):
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=30)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(proc.pid, signal.SIGKILL)
+
+
+# ============================================================
+#                         CLIENT
+# ============================================================
+
+def make_request(scenario, rng, db_size, students):
+    """(method, path, body, headers) for one request."""
+    if scenario == "get_certificates":
+        email = student_email(rng.randrange(db_size), students)
+        return "GET", f"/api/student/certificates?email={email}", None, {}
+    if scenario == "employer_verify":
+        n = rng.randrange(db_size)
+        body = json.dumps({"email": student_email(n, students), "tx_hash": tx_hash_for(n)})
+        return "POST", "/api/employer/verify", body, {"Content-Type": "application/json"}
+    path = "/" if scenario == "index_page" else "/fonts/inter.ttf"
+    return "GET", path, None, {"Accept-Encoding": "gzip"}
+
+
+def run_load(port, scenario, requests, concurrency, db_size, students):
+    latencies, errors, sizes = [], [0], []
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def worker():
+        rng = random.Random()
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        mine = []
+        while True:
+            with lock:
+                if next(counter, None) is None:
+                    break
+            method, path, body, headers = make_request(scenario, rng, db_size, students)
+            t0 = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                res = conn.getresponse()
+                data = res.read()
+                ok = res.status == 200
+                if res.getheader("Connection", "").lower() == "close":
+                    conn.close()
+            except (OSError, http.client.HTTPException):
+                ok, data = False, b""
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            mine.append(time.perf_counter() - t0)
+            with lock:
+                if not ok:
+                    errors[0] += 1
+                elif len(sizes) < 1:
+                    sizes.append(len(data))
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        for f in [pool.submit(worker) for _ in range(concurrency)]:
+            f.result()
+    wall = time.perf_counter() - t0
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "rps": round(requests / wall, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "errors": errors[0],
+        "response_bytes": sizes[0] if sizes else None,
+    }
+
+
+# ============================================================
+#                          MAIN
+# ============================================================
+
+def int_list(value):
+    return [int(v) for v in value.split(",") if v]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Dev server vs gunicorn load test")
+    ap.add_argument("--servers", default="dev,gunicorn")
+    ap.add_argument("--scenarios", default=",".join(SCENARIOS))
+    ap.add_argument("--db-size", type=int, default=10000)
+    ap.add_argument("--concurrency", type=int_list, default=[1, 16])
+    ap.add_argument("-n", "--requests", type=int, default=1000)
+    ap.add_argument("--workers", type=int, default=0, help="gunicorn workers (default: config)")
+    ap.add_argument("--threads", type=int, default=0, help="gunicorn threads (default: config)")
+    ap.add_argument("--port", type=int, default=5077)
+    args = ap.parse_args()
+
+    from aptos_sdk.account import Account
+
+    work = tempfile.mkdtemp(prefix="credlytic-serve-")
+    students = max(1, args.db_size // 2)
+    seed = os.path.join(work, "seed.db")
+    seed_database(seed, args.db_size, students)
+
+    results = []
+    try:
+        for kind in args.servers.split(","):
+            # Fresh copy per server, so neither sees the other's writes
+            db = os.path.join(work, f"{kind}.db")
+            shutil.copyfile(seed, db)
+            env = dict(
+                os.environ,
+                CREDLYTIC_DB=db,
+                CERT_FILES_DIR=os.path.join(work, f"{kind}-files"),
+                PORT=str(args.port),
+                LOG_REQUESTS="0",
+                UNIVERSITY_PRIVATE_KEY=str(Account.generate().private_key),
+                APTOS_NODE_URL="http://127.0.0.1:9/v1",
+            )
+            proc = start_server(kind, args.port, env, args, os.path.join(work, f"{kind}.log"))
+            try:
+                for scenario in args.scenarios.split(","):
+                    # Warm-up: connections, caches, compressed copies
+                    run_load(args.port, scenario, 50, 4, args.db_size, students)
+                    for concurrency in args.concurrency:
+                        r = run_load(args.port, scenario, args.requests, concurrency,
+                                     args.db_size, students)
+                        results.append({"server": kind, "scenario": scenario,
+                                        "concurrency": concurrency, **r})
+                        print(json.dumps(results[-1]), file=sys.stderr)
+            finally:
+                stop_server(proc)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    print(json.dumps({
+        "machine": {"cpus": os.cpu_count(), "python": platform.python_version()},
+        "db_size": args.db_size,
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
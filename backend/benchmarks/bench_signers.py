@@ -0,0 +1,130 @@
+# backend/benchmarks/bench_signers.py
+# Minting throughput with 1..N signing accounts (mint_engine.SignerPool)
+# against mock_aptos_node.py. Each signer count mints the same number of
+# real create_token_script transactions through a fresh node and pool,
+# with throwaway keys.
+#
+#   python benchmarks/bench_signers.py
+#   python benchmarks/bench_signers.py -n 1000 --signers 1,2,4,8 --drop-rate 0.01
+#
+# --drop-rate makes the node accept and then lose a fraction of
+# transactions: each loss holds back every later sequence number of its
+# account until it expires (--ttl) and is resubmitted, which is the
+# single-account stall a pool spreads out. With --rate, mints arrive
+# over time and new ones are steered away from stalled signers.
+#
+# Prints a JSON report: mints/s, p50/p99 latency, and per-signer counts.
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_api import percentile  # noqa: E402
+
+
+def run(signers, args):
+    from aptos_sdk.account import Account
+    from mock_aptos_node import MockAptosNode
+    from mint_engine import MintEngine, SignerPool
+    import admin_mint
+
+    node = MockAptosNode(block_time=args.block_time, latency=args.latency,
+                         drop_rate=args.drop_rate, seed=1).start()
+    engines = [
+        MintEngine(Account.generate(), node.url, max_in_flight=args.in_flight,
+                   poll_interval=args.poll_interval, tx_ttl=args.ttl)
+        for _ in range(signers)
+    ]
+    pool = SignerPool(engines, stall_seconds=args.stall).start()
+
+    latencies, lock, done = [], threading.Lock(), threading.Event()
+    failed = [0]
+    remaining = [args.n]
+
+    def finished(t0):
+        def callback(f):
+            with lock:
+                if f.exception() is None:
+                    latencies.append(time.perf_counter() - t0)
+                else:
+                    failed[0] += 1
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    done.set()
+        return callback
+
+    t0 = time.perf_counter()
+    for i in range(args.n):
+        if args.rate:
+            # Steady arrivals, so assignment sees each signer's current health
+            time.sleep(max(0, t0 + i / args.rate - time.perf_counter()))
+        token_name = admin_mint.token_name_for(f"Student {i}")
+        email = f"student{i}@example.edu"
+        pool.submit(
+            lambda creator, name=token_name, email=email: admin_mint.build_mint_payload(
+                "Student", "Course", email, creator, name)[0]
+        ).add_done_callback(finished(time.perf_counter()))
+    done.wait(args.timeout)
+    wall = time.perf_counter() - t0
+
+    stats = pool.stats()
+    pool.stop()
+    node.stop()
+
+    latencies.sort()
+    return {
+        "signers": signers,
+        "mints": args.n,
+        "confirmed": len(latencies),
+        "failed": failed[0],
+        "seconds": round(wall, 2),
+        "mints_per_s": round(len(latencies) / wall, 1),
+        "p50_s": round(percentile(latencies, 50), 2) if latencies else None,
+        "p99_s": round(percentile(latencies, 99), 2) if latencies else None,
+        "per_signer": [s["confirmed"] for s in stats.values()],
+        "fallbacks": sum(s["fallbacks"] for s in stats.values()),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Minting throughput per number of signers")
+    ap.add_argument("-n", type=int, default=500, help="mints per signer count")
+    ap.add_argument("--signers", default="1,2,4,8")
+    ap.add_argument("--in-flight", type=int, default=16, help="MINT_MAX_IN_FLIGHT per signer")
+    ap.add_argument("--block-time", type=float, default=0.2)
+    ap.add_argument("--latency", type=float, default=0.0, help="mock node latency per request (s)")
+    ap.add_argument("--poll-interval", type=float, default=0.2)
+    ap.add_argument("--drop-rate", type=float, default=0.0)
+    ap.add_argument("--ttl", type=int, default=10, help="transaction expiry (s)")
+    ap.add_argument("--stall", type=float, default=5, help="SIGNER_STALL_SECONDS")
+    ap.add_argument("--rate", type=float, default=0, help="mints submitted per second (0: all at once)")
+    ap.add_argument("--timeout", type=float, default=600)
+    args = ap.parse_args()
+
+    # admin_mint is only used to build payloads; its own engine never starts
+    from aptos_sdk.account import Account
+    os.environ.setdefault("UNIVERSITY_PRIVATE_KEY", str(Account.generate().private_key))
+
+    results = []
+    for signers in [int(s) for s in args.signers.split(",")]:
+        results.append(run(signers, args))
+        print(json.dumps(results[-1]), file=sys.stderr)
+
+    print(json.dumps({
+        "block_time": args.block_time,
+        "in_flight_per_signer": args.in_flight,
+        "drop_rate": args.drop_rate,
+        "rate": args.rate,
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# backend/benchmarks/bench_startup.py
+# Cold start and memory per server role (CREDLYTIC_ROLE): each role is
+# started in a fresh process against the same seeded database, which
+# reports how long importing app.py and getting ready took, its RSS,
+# and which heavy modules (Aptos client, PIL, email) it loaded. Readers
+# run without UNIVERSITY_PRIVATE_KEY.
+#
+#   python benchmarks/bench_startup.py
+#   python benchmarks/bench_startup.py --db-size 100000 --roles reader,issuer
+#
+# For issuers it also times the lazy loads on first use: the minting
+# module (key + Aptos client), the renderer and the email module.
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_api import seed_database, student_email, tx_hash_for, rss_kib  # noqa: E402
+
+HEAVY = ["aptos_sdk", "PIL", "admin_mint", "mint_engine", "renderer", "email_utils"]
+
+
+def run_child(args):
+    t0 = time.perf_counter()
+    import app as server
+    imported = time.perf_counter() - t0
+    rss_import = rss_kib()
+
+    t0 = time.perf_counter()
+    server.start_background_workers()
+    client = server.app.test_client()
+    ready = client.get("/readyz").status_code == 200
+    ready_seconds = time.perf_counter() - t0
+
+    if server.READER:
+        students = max(1, args.db_size // 2)
+        for i in range(200):
+            client.get("/api/student/certificates",
+                       query_string={"email": student_email(i, students)})
+            client.post("/api/employer/verify",
+                        json={"email": student_email(i, students), "tx_hash": tx_hash_for(i)})
+
+    result = {
+        "role": ",".join(sorted(server.roles)),
+        "ready": ready,
+        "import_seconds": round(imported, 3),
+        "ready_seconds": round(ready_seconds, 3),
+        "rss_after_import_mib": round(rss_import / 1024, 1),
+        "rss_serving_mib": round(rss_kib() / 1024, 1),
+        "heavy_modules_loaded": [m for m in HEAVY if m in sys.modules],
+    }
+
+    if server.ISSUER:
+        first_use = {}
+        for module in ("admin_mint", "renderer", "email_utils"):
+            before, t0 = rss_kib(), time.perf_counter()
+            __import__(module)
+            first_use[module] = {"seconds": round(time.perf_counter() - t0, 3),
+                                 "rss_mib": round((rss_kib() - before) / 1024, 1)}
+        result["first_use"] = first_use
+
+    print(json.dumps(result))
+    sys.stdout.flush()
+    # Skip interpreter teardown; the background workers are daemon threads
+    os._exit(0)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Startup time and RSS per server role")
+    ap.add_argument("--roles", default="reader,issuer,all")
+    ap.add_argument("--db-size", type=int, default=10000)
+    ap.add_argument("--runs", type=int, default=3, help="fresh processes per role; best is kept")
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        return run_child(args)
+
+    from aptos_sdk.account import Account
+
+    work = tempfile.mkdtemp(prefix="credlytic-startup-")
+    db = os.path.join(work, "credlytic.db")
+    seed_database(db, args.db_size, max(1, args.db_size // 2))
+
+    results = []
+    for role in args.roles.split(","):
+        # CREDLYTIC_PRELOAD keeps the import from starting the background
+        # work, so importing and getting ready are timed separately
+        env = dict(os.environ, CREDLYTIC_ROLE=role, CREDLYTIC_PRELOAD="1", CREDLYTIC_DB=db,
+                   CERT_FILES_DIR=os.path.join(work, "files"), LOG_REQUESTS="0",
+                   APTOS_NODE_URL="http://127.0.0.1:9/v1")
+        env.pop("UNIVERSITY_PRIVATE_KEY", None)
+        if role != "reader":
+            env["UNIVERSITY_PRIVATE_KEY"] = str(Account.generate().private_key)
+
+        runs = []
+        for _ in range(args.runs):
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", "--db-size", str(args.db_size)],
+                cwd=BACKEND, env=env, capture_output=True, text=True, check=True,
+            ).stdout
+            runs.append(json.loads(out.strip().splitlines()[-1]))
+        best = min(runs, key=lambda r: r["import_seconds"] + r["ready_seconds"])
+        results.append(best)
+        print(json.dumps(best), file=sys.stderr)
+
+    print(json.dumps({"db_size": args.db_size, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
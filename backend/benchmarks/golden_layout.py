@@ -0,0 +1,216 @@
+# backend/benchmarks/golden_layout.py
+# Golden-image check for text_layout: renders a fixed corpus with the
+# original step-down fitting / char-by-char wrapping and with TextLayout,
+# compares the images pixel for pixel and reports the textbbox calls
+# and time each approach needs.
+#
+#   python benchmarks/golden_layout.py
+#
+# Exits non-zero on any pixel or line-break mismatch.
+#
+# The pytest suite pins the rendered output itself against committed
+# images (tests/test_renderer_golden.py).
+
+import os
+import sys
+import json
+import time
+import textwrap
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import ImageChops, ImageDraw  # noqa: E402
+
+from renderer import CertificateRenderer  # noqa: E402
+
+
+HASHES = [
+    "0x" + "ab" * 32,
+    "0x" + "0123456789abcdef" * 4,
+    "9f3c" * 16,
+    "0x" + "f" * 64,
+    "0x" + "1" * 64,
+    "0x" + "7e" * 40,
+    "0xdeadbeef",
+]
+
+NAMES = [
+    "Ada Lovelace",
+    "José Ñúñez-Gómez",
+    "W",
+    "Maximilian Alexander von Habsburg-Lothringen",
+    "李小龙",
+]
+
+COURSES = [
+    "Rust 101",
+    "Distributed Systems Engineering",
+    "Introduction to Blockchain Based Credential Verification Systems",
+]
+
+
+# ============================================================
+#              REFERENCE (ORIGINAL) IMPLEMENTATION
+# ============================================================
+
+class Counter:
+    def __init__(self, draw):
+        self.draw = draw
+        self.calls = 0
+
+    def textbbox(self, *a, **k):
+        self.calls += 1
+        return self.draw.textbbox(*a, **k)
+
+
+def legacy_fit(draw, font_for, text, start_size, max_width, min_size=12):
+    size = start_size
+    while size >= min_size:
+        f = font_for(size)
+        if draw.textbbox((0, 0), text, font=f)[2] <= max_width:
+            return f
+        size -= 1
+    return font_for(min_size)
+
+
+def legacy_wrap(draw, text, font, max_width):
+    if not text:
+        return [""]
+    final = []
+    for line in textwrap.wrap(text, width=60):
+        if draw.textbbox((0, 0), line, font=font)[2] <= max_width:
+            final.append(line)
+        else:
+            cur = ""
+            for ch in line:
+                if draw.textbbox((0, 0), cur + ch, font=font)[2] <= max_width:
+                    cur += ch
+                else:
+                    final.append(cur)
+                    cur = ch
+            if cur:
+                final.append(cur)
+    return final
+
+
+def legacy_render(r, name, course, tx_hash, stats):
+    """The renderer as it was before TextLayout (name/course never resized)."""
+    img = r._base.copy()
+    draw = Counter(ImageDraw.Draw(img))
+    real = draw.draw
+
+    real.text(r.NAME_XY, name, fill="white", font=r.font(r.NAME_SIZE))
+    real.text(r.COURSE_XY, course, fill="white", font=r.font(r.COURSE_SIZE))
+
+    tx_text = f"Blockchain Verified Tx: {tx_hash}"
+    max_tx_width = int(img.size[0] * 0.70)
+
+    t0 = time.perf_counter()
+    font_tx = legacy_fit(draw, r.font, tx_text, r.TX_SIZE, max_tx_width)
+    lines = legacy_wrap(draw, tx_text, font_tx, max_tx_width)
+    stats["time"] += time.perf_counter() - t0
+    stats["bbox"] += draw.calls
+
+    line_h = real.textbbox((0, 0), "Ay", font=font_tx)[3]
+    start_y = r.TX_XY[1] - (line_h * len(lines) // 2)
+    for i, line in enumerate(lines):
+        real.text((r.TX_XY[0], start_y + i * line_h), line, fill="gray", font=font_tx)
+    return img
+
+
+def new_layout_stats(r, tx_hash, stats):
+    img = r._base.copy()
+    draw = Counter(ImageDraw.Draw(img))
+    tx_text = f"Blockchain Verified Tx: {tx_hash}"
+    max_tx_width = int(img.size[0] * 0.70)
+    t0 = time.perf_counter()
+    font_tx = r.layout.fit_font(draw, tx_text, r.TX_SIZE, max_tx_width, r.MIN_SIZE)
+    r.layout.wrap(draw, tx_text, font_tx, max_tx_width)
+    stats["time"] += time.perf_counter() - t0
+    stats["bbox"] += draw.calls
+
+
+def fits_unscaled(r, name, course):
+    draw = ImageDraw.Draw(r._base.copy())
+    right = min(r.TEXT_RIGHT, r.size[0])
+    return (
+        draw.textbbox((0, 0), name, font=r.font(r.NAME_SIZE))[2] <= right - r.NAME_XY[0]
+        and draw.textbbox((0, 0), course, font=r.font(r.COURSE_SIZE))[2] <= right - r.COURSE_XY[0]
+    )
+
+
+def wrap_equivalence(r, old_stats, new_stats):
+    """Narrow boxes force the char-by-char path on every line."""
+    mismatches = []
+    texts = [f"Blockchain Verified Tx: {h}" for h in HASHES] + NAMES + COURSES
+    draw = ImageDraw.Draw(r._base.copy())
+
+    for size in (12, 22, 45):
+        font = r.font(size)
+        for max_width in (60, 150, 333, 500, 800):
+            for text in texts:
+                d_old, d_new = Counter(draw), Counter(draw)
+
+                t0 = time.perf_counter()
+                expected = legacy_wrap(d_old, text, font, max_width)
+                t1 = time.perf_counter()
+                got = r.layout.wrap(d_new, text, font, max_width)
+                t2 = time.perf_counter()
+
+                old_stats["bbox"] += d_old.calls
+                old_stats["time"] += t1 - t0
+                new_stats["bbox"] += d_new.calls
+                new_stats["time"] += t2 - t1
+
+                if got != expected:
+                    mismatches.append({"text": text, "size": size, "max_width": max_width})
+    return mismatches
+
+
+def main():
+    r = CertificateRenderer()
+    old_stats = {"bbox": 0, "time": 0.0}
+    new_stats = {"bbox": 0, "time": 0.0}
+    compared = skipped = 0
+    failures = []
+
+    for tx in HASHES:
+        for name in NAMES:
+            for course in COURSES:
+                old = legacy_render(r, name, course, tx, old_stats)
+                new_layout_stats(r, tx, new_stats)
+
+                if not fits_unscaled(r, name, course):
+                    # Overflowing name/course is resized on purpose now
+                    skipped += 1
+                    continue
+
+                diff = ImageChops.difference(old, r.render(name, course, tx)).getbbox()
+                compared += 1
+                if diff:
+                    failures.append({"name": name, "course": course, "tx": tx, "diff": diff})
+
+    wrap_old = {"bbox": 0, "time": 0.0}
+    wrap_new = {"bbox": 0, "time": 0.0}
+    wrap_failures = wrap_equivalence(r, wrap_old, wrap_new)
+    failures.extend(wrap_failures)
+
+    print(json.dumps({
+        "compared": compared,
+        "skipped_resized": skipped,
+        "failures": failures,
+        "tx_layout": {
+            "legacy": {"bbox_calls": old_stats["bbox"], "ms": round(old_stats["time"] * 1000, 1)},
+            "text_layout": {"bbox_calls": new_stats["bbox"], "ms": round(new_stats["time"] * 1000, 1)},
+        },
+        "narrow_wrap": {
+            "legacy": {"bbox_calls": wrap_old["bbox"], "ms": round(wrap_old["time"] * 1000, 1)},
+            "text_layout": {"bbox_calls": wrap_new["bbox"], "ms": round(wrap_new["time"] * 1000, 1)},
+        },
+    }, indent=2))
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,547 @@
+# backend/chain_indexer.py
+# Keeps the local registry in step with the chain. Each issuing account's
+# committed transactions are read from a checkpoint stored in SQLite,
+# several pages at a time. Every token transaction is recorded in
+# chain_tokens and its final status goes into chain_cache, so
+# verification of an indexed certificate never asks the fullnode.
+#
+# Reconciliation against the certificate store:
+#   - a token whose certificate has no tx_hash (the process died after
+#     the mint committed, before the entry was updated) is attached to it
+#   - a token with no certificate at all is recreated as one (recovered)
+#   - certificates whose tx_hash was never indexed, or whose transaction
+#     failed on chain, are reported as drift
+#
+# 0x3::token only lets a collection's creator mint into it, so the
+# issuing accounts' transactions cover every Credlytic token.
+#
+# Background passes run in one issuer process at a time, the holder of a
+# lease row in SQLite; the others take over when it stops renewing.
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import threading
+from datetime import datetime, timezone
+
+# aptos_sdk is imported by the first pass, so importing this module
+# does not load the Aptos client
+
+from chain_state import (
+    CHAIN_CACHE_SCHEMA, CHAIN_NODE_URL, MINT_FUNCTION,
+    issuer_accounts, token_property, transaction_status,
+)
+from issuance import explorer_url, file_fields
+from render_cache import lazy_files, lazy_mode
+from storage import get_database, new_certificate_id, normalize_tx_hash
+
+
+# ============================================================
+#                         CONFIG
+# ============================================================
+
+# Seconds between passes; each pass reads up to the chain head
+INDEXER_INTERVAL = float(os.getenv("INDEXER_INTERVAL", "30"))
+# A process that stops passing for this long loses the lease to another
+INDEXER_LEASE = max(3 * INDEXER_INTERVAL, 60)
+INDEXER_PAGE_SIZE = int(os.getenv("INDEXER_PAGE_SIZE", "100"))
+# Pages requested at once per account
+INDEXER_CONCURRENCY = int(os.getenv("INDEXER_CONCURRENCY", "4"))
+# 0: report tokens with no certificate, but don't recreate them
+INDEXER_RECOVER = os.getenv("INDEXER_RECOVER", "1") == "1"
+# Tokens younger than this may still be on their way into the store
+# (pipeline / batch workers), so they are left alone until then
+INDEXER_RECOVER_AFTER = float(os.getenv("INDEXER_RECOVER_AFTER", "600"))
+
+# create_token_script argument positions (see admin_mint.build_mint_payload)
+_TOKEN_NAME_ARG = 1
+_DESCRIPTION_ARG = 2
+
+INDEXER_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chain_index_checkpoint (
+    account     TEXT PRIMARY KEY,
+    next_seq    INTEGER NOT NULL,
+    updated_at  REAL NOT NULL
+);
+
+-- One row per create_token_script transaction of an issuing account;
+-- kind is 'certificate' or 'anchor' (a Merkle root, anchoring.py)
+CREATE TABLE IF NOT EXISTS chain_tokens (
+    tx_hash      TEXT PRIMARY KEY,
+    account      TEXT NOT NULL,
+    seq          INTEGER NOT NULL,
+    version      INTEGER,
+    success      INTEGER NOT NULL,
+    kind         TEXT NOT NULL,
+    token_name   TEXT,
+    student      TEXT,
+    student_id   TEXT,
+    course       TEXT,
+    issued_at    TEXT,
+    cert_id      TEXT,
+    recovered    INTEGER NOT NULL DEFAULT 0,
+    indexed_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_chain_tokens_unmatched ON chain_tokens(cert_id, kind);
+-- Drift counts: both sets stay small
+CREATE INDEX IF NOT EXISTS idx_chain_tokens_failed ON chain_tokens(seq) WHERE success = 0;
+CREATE INDEX IF NOT EXISTS idx_chain_tokens_recovered ON chain_tokens(seq) WHERE recovered = 1;
+
+-- Which process runs background passes, and the last pass's results
+CREATE TABLE IF NOT EXISTS chain_index_state (
+    id           INTEGER PRIMARY KEY CHECK (id = 1),
+    holder       TEXT,
+    lease_until  REAL NOT NULL DEFAULT 0,
+    last_pass    TEXT,
+    last_drift   TEXT
+);
+"""
+
+# SQLite store only: certificates whose tx_hash has no indexed token yet.
+# Triggers on `certificates` queue every new or changed tx_hash; each
+# drift report drops the ones indexed since, so what remains is the
+# drift and a report never reads the whole registry.
+UNINDEXED_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS chain_unindexed ("
+    "seq INTEGER PRIMARY KEY, tx_hash TEXT NOT NULL)",
+
+    """CREATE TRIGGER IF NOT EXISTS chain_unindexed_insert AFTER INSERT ON certificates
+    WHEN new.tx_hash IS NOT NULL BEGIN
+        INSERT OR REPLACE INTO chain_unindexed (seq, tx_hash) VALUES (new.seq, new.tx_hash);
+    END""",
+
+    """CREATE TRIGGER IF NOT EXISTS chain_unindexed_update AFTER UPDATE ON certificates
+    WHEN old.tx_hash IS NOT new.tx_hash BEGIN
+        DELETE FROM chain_unindexed WHERE seq = old.seq;
+        INSERT INTO chain_unindexed (seq, tx_hash)
+            SELECT new.seq, new.tx_hash WHERE new.tx_hash IS NOT NULL;
+    END""",
+
+    """CREATE TRIGGER IF NOT EXISTS chain_unindexed_delete AFTER DELETE ON certificates BEGIN
+        DELETE FROM chain_unindexed WHERE seq = old.seq;
+    END""",
+)
+
+_UNINDEXED_BACKFILL = (
+    "INSERT OR REPLACE INTO chain_unindexed (seq, tx_hash) "
+    "SELECT seq, tx_hash FROM certificates c WHERE tx_hash IS NOT NULL "
+    "AND NOT EXISTS (SELECT 1 FROM chain_tokens t WHERE t.tx_hash = c.tx_hash)"
+)
+
+
+def indexed_accounts():
+    """Addresses to index: the accounts verification accepts (chain_state.issuer_accounts)."""
+    return sorted(issuer_accounts())
+
+
+def parse_token(txn):
+    """chain_tokens fields for a create_token_script transaction, or None."""
+    payload = txn.get("payload") or {}
+    if payload.get("function") != MINT_FUNCTION:
+        return None
+    args = payload.get("arguments") or []
+    token_name = args[_TOKEN_NAME_ARG] if len(args) > _TOKEN_NAME_ARG else ""
+    description = args[_DESCRIPTION_ARG] if len(args) > _DESCRIPTION_ARG else ""
+
+    student = course = None
+    # "Certificate: <student> #<stamp>" (admin_mint.token_name_for)
+    if token_name.startswith("Certificate: "):
+        student = token_name[len("Certificate: "):].rsplit(" #", 1)[0]
+    if description.startswith("Awarded for: "):
+        course = description[len("Awarded for: "):]
+    try:
+        issued_at = datetime.fromtimestamp(int(txn["timestamp"]) / 1e6, timezone.utc).isoformat()
+    except (KeyError, TypeError, ValueError):
+        issued_at = None
+
+    return {
+        "tx_hash": normalize_tx_hash(txn["hash"]),
+        "seq": int(txn["sequence_number"]),
+        "version": int(txn["version"]) if txn.get("version") else None,
+        "success": int(bool(txn.get("success"))),
+        "kind": "anchor" if token_property(payload, "merkle_root") else "certificate",
+        "token_name": token_name,
+        "student": student,
+        "student_id": (token_property(payload, "student_id") or "").lower() or None,
+        "course": course,
+        "issued_at": issued_at,
+    }
+
+
+# ============================================================
+#                         INDEXER
+# ============================================================
+
+class ChainIndexer:
+    """
+    run_once() indexes every account from its checkpoint up to the chain
+    head, then reconciles; start() repeats that every `interval` seconds
+    on a background thread, while this process holds the lease. A pass
+    that dies part way resumes from the last page it stored.
+    """
+
+    def __init__(self, store, accounts=None, node_url=CHAIN_NODE_URL,
+                 interval=INDEXER_INTERVAL, page_size=INDEXER_PAGE_SIZE,
+                 concurrency=INDEXER_CONCURRENCY, recover=INDEXER_RECOVER,
+                 recover_after=INDEXER_RECOVER_AFTER, lease=INDEXER_LEASE):
+        self.store = store
+        self.accounts = accounts
+        self.node_url = node_url
+        self.interval = interval
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.recover = recover
+        self.recover_after = recover_after
+        self.lease = lease
+        self.holder = uuid.uuid4().hex
+
+        self.db = get_database()
+        self.db.ensure_schema(CHAIN_CACHE_SCHEMA)
+        self.db.ensure_schema(INDEXER_SCHEMA)
+        # Drift is tracked incrementally when the registry shares the database
+        self.incremental = self.store.backend == "sqlite" and self.store.db is self.db
+        if self.incremental:
+            with self.db.transaction() as c:
+                for statement in UNINDEXED_SCHEMA:
+                    c.execute(statement)
+                if self.store.get_meta("chain_unindexed") is None:
+                    c.execute(_UNINDEXED_BACKFILL)
+                    self.store.set_meta("chain_unindexed", "1")
+
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._pass_lock = threading.Lock()
+        self._wake = threading.Event()
+
+        self.stats = {"passes": 0, "pages": 0, "transactions": 0, "errors": 0}
+
+    # ---- lifecycle ----
+    def start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="chain-indexer", daemon=True)
+                self._thread.start()
+        return self
+
+    def trigger(self):
+        """Starts the next background pass now, lease or not."""
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            forced = self._wake.is_set()
+            self._wake.clear()
+            try:
+                if forced or self.lead():
+                    self.run_once()
+            except Exception as e:
+                self.stats["errors"] += 1
+                print("[INDEXER ERROR]", e)
+            self._wake.wait(self.interval)
+
+    def lead(self):
+        """Takes or renews the lease; True while this process runs the passes."""
+        now = time.time()
+        with self.db.transaction() as c:
+            return c.execute(
+                "INSERT INTO chain_index_state (id, holder, lease_until) VALUES (1, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET holder = excluded.holder, "
+                "lease_until = excluded.lease_until "
+                "WHERE holder = excluded.holder OR lease_until < ?",
+                (self.holder, now + self.lease, now),
+            ).rowcount == 1
+
+    def run_once(self):
+        """One pass in the calling thread; returns its summary."""
+        with self._pass_lock:
+            started = datetime.now(timezone.utc).isoformat()
+            t0 = time.perf_counter()
+            accounts = self.accounts if self.accounts is not None else indexed_accounts()
+            transactions = asyncio.run(self._index(accounts))
+            summary = {
+                "accounts": len(accounts),
+                "transactions": transactions,
+                **self.reconcile(),
+                "started_at": started,
+                "seconds": round(time.perf_counter() - t0, 3),
+            }
+            self.stats["passes"] += 1
+            drift = self.drift(cutoff=started)
+            with self.db.transaction() as c:
+                c.execute(
+                    "INSERT INTO chain_index_state (id, last_pass, last_drift) VALUES (1, ?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET last_pass = excluded.last_pass, "
+                    "last_drift = excluded.last_drift",
+                    (json.dumps(summary), json.dumps(drift)),
+                )
+            return summary
+
+    @property
+    def last_pass(self):
+        """Summary of the last pass, by whichever process ran it."""
+        return self._saved("last_pass")
+
+    @property
+    def last_drift(self):
+        return self._saved("last_drift")
+
+    def _saved(self, column):
+        row = self.db.execute(f"SELECT {column} FROM chain_index_state WHERE id = 1").fetchone()
+        return json.loads(row[column]) if row and row[column] else {}
+
+    # ---- scanning ----
+    async def _index(self, accounts):
+        from aptos_sdk.async_client import RestClient
+        client = RestClient(self.node_url)
+        try:
+            counts = await asyncio.gather(*(self._index_account(client, a) for a in accounts))
+        finally:
+            await client.close()
+        return sum(counts)
+
+    def checkpoint(self, account):
+        row = self.db.execute(
+            "SELECT next_seq FROM chain_index_checkpoint WHERE account = ?", (account,)
+        ).fetchone()
+        return row["next_seq"] if row else 0
+
+    async def _page(self, client, account, start):
+        from aptos_sdk.async_client import ApiError
+        self.stats["pages"] += 1
+        try:
+            return await client.transactions_by_account(account, limit=self.page_size, start=start)
+        except ApiError as e:
+            # Account not created yet
+            if e.status_code == 404:
+                return []
+            raise
+
+    async def _index_account(self, client, account):
+        """Reads `concurrency` pages at a time until a short one; returns transactions read."""
+        start = self.checkpoint(account)
+        total = 0
+        while True:
+            pages = await asyncio.gather(*(
+                self._page(client, account, start + i * self.page_size)
+                for i in range(self.concurrency)
+            ))
+            txns = []
+            for page in pages:
+                txns += page
+                if len(page) < self.page_size:
+                    break
+            if txns:
+                start = int(txns[-1]["sequence_number"]) + 1
+                self._store(account, txns, start)
+                total += len(txns)
+                self.stats["transactions"] += len(txns)
+            if len(txns) < self.page_size * self.concurrency:
+                return total
+
+    def _store(self, account, txns, next_seq):
+        """Records a batch's tokens and moves the checkpoint past it, atomically."""
+        now = time.time()
+        with self.db.transaction() as c:
+            for txn in txns:
+                token = parse_token(txn)
+                if token is None:
+                    continue
+                c.execute(
+                    "INSERT INTO chain_tokens (tx_hash, account, seq, version, success, kind, "
+                    "token_name, student, student_id, course, issued_at, indexed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(tx_hash) DO NOTHING",
+                    (token["tx_hash"], account, token["seq"], token["version"], token["success"],
+                     token["kind"], token["token_name"], token["student"], token["student_id"],
+                     token["course"], token["issued_at"], now),
+                )
+                # Committed transactions are final (see ChainState)
+                c.execute(
+                    "INSERT OR REPLACE INTO chain_cache (tx_hash, result, expires_at, checked_at) "
+                    "VALUES (?, ?, NULL, ?)",
+                    (token["tx_hash"], json.dumps(transaction_status(txn)), now),
+                )
+            # A manual pass can overlap the background one: never move back
+            c.execute(
+                "INSERT INTO chain_index_checkpoint (account, next_seq, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(account) DO UPDATE SET "
+                "next_seq = MAX(next_seq, excluded.next_seq), updated_at = excluded.updated_at",
+                (account, next_seq, now),
+            )
+
+    # ---- reconciliation ----
+    def reconcile(self):
+        """Matches unmatched tokens to certificates; returns what it changed."""
+        rows = self.db.execute(
+            "SELECT * FROM chain_tokens WHERE cert_id IS NULL AND success = 1 ORDER BY version"
+        ).fetchall()
+        settled = datetime.fromtimestamp(time.time() - self.recover_after, timezone.utc).isoformat()
+        done = {"linked": 0, "attached": 0, "recovered": 0}
+        for token in map(dict, rows):
+            h = token["tx_hash"]
+            existing = self.store.find_by_tx_hash(h)
+            if existing:
+                self._claim(h, existing[0]["id"])
+                done["linked"] += 1
+            elif (token["kind"] != "certificate" or not token["student_id"]
+                    or (token["issued_at"] or "") > settled):
+                # Anchor roots are matched only through their certificates
+                continue
+            elif (entry := self._interrupted_entry(token)) is not None:
+                # Claimed in the same transaction, so with several issuer
+                # processes indexing only one of them writes the certificate
+                with self.db.transaction():
+                    if self._claim(h, entry["id"], recovered=True):
+                        self.store.update_certificate(entry["id"], self._token_fields(token, entry["id"]))
+                        done["attached"] += 1
+            elif self.recover:
+                cert_id = new_certificate_id()
+                with self.db.transaction():
+                    if self._claim(h, cert_id, recovered=True):
+                        self.store.add_certificate({
+                            "id": cert_id,
+                            "file": None,
+                            "student": token["student"],
+                            "email": token["student_id"],
+                            "course": token["course"],
+                            **self._token_fields(token, cert_id),
+                            "issued_at": token["issued_at"],
+                        })
+                        done["recovered"] += 1
+        return done
+
+    def _interrupted_entry(self, token):
+        """
+        This token's certificate if its mint committed but the entry was
+        failed without a tx_hash ("Interrupted during minting").
+        """
+        # Mint payloads carry the email lowercased; the store keeps it as typed
+        for e in self.store.certificates_for(token["student_id"], ignore_case=True):
+            if (not e.get("tx_hash") and e.get("status") == "failed"
+                    and e.get("student") == token["student"] and e.get("course") == token["course"]):
+                return e
+        return None
+
+    @staticmethod
+    def _token_fields(token, cert_id):
+        fields = {
+            "status": "minted",
+            "tx_hash": token["tx_hash"],
+            "token_name": token["token_name"],
+            "explorer_url": explorer_url(token["tx_hash"]),
+            "error": None,
+            "recovered": True,
+        }
+        if lazy_mode():
+            # Downloadable; rendered on first request (render_cache.py)
+            fields.update(file_fields(lazy_files(cert_id)))
+        return fields
+
+    def _claim(self, tx_hash, cert_id, recovered=False):
+        """Matches an unmatched token to cert_id; False if another process already did."""
+        with self.db.transaction() as c:
+            return c.execute(
+                "UPDATE chain_tokens SET cert_id = ?, recovered = ? "
+                "WHERE tx_hash = ? AND cert_id IS NULL",
+                (cert_id, int(recovered), tx_hash),
+            ).rowcount == 1
+
+    # ---- drift ----
+    def drift(self, cutoff=None, examples=20):
+        """
+        Registry vs chain: tokens with no certificate, certificates whose
+        tx_hash was never indexed (only those issued before `cutoff`, the
+        start of the last pass; later ones may not be indexed yet), and
+        certificates whose transaction failed on chain.
+        """
+        def count(sql, params=()):
+            return self.db.execute(f"SELECT COUNT(*) AS n {sql}", params).fetchone()["n"]
+
+        def rows(sql, params=()):
+            return [dict(r) for r in self.db.execute(f"{sql} LIMIT ?", (*params, examples))]
+
+        orphaned = ("FROM chain_tokens WHERE cert_id IS NULL AND success = 1 "
+                    "AND kind = 'certificate'")
+        report = {
+            "orphaned_tokens": count(orphaned),
+            "recovered": count("FROM chain_tokens WHERE recovered = 1"),
+            "examples": {
+                "orphaned_tokens": rows(
+                    f"SELECT tx_hash, token_name, student_id {orphaned} ORDER BY version"),
+            },
+        }
+        if self.incremental:
+            missing, failed = self._drift_sql(cutoff, count, rows)
+        else:
+            missing, failed = self._drift_scan(cutoff, examples)
+        report["missing_on_chain"], report["examples"]["missing_on_chain"] = missing
+        report["failed_on_chain"], report["examples"]["failed_on_chain"] = failed
+        return report
+
+    def _drift_sql(self, cutoff, count, rows):
+        """From chain_unindexed and the failed tokens; no certificate JSON is read."""
+        with self.db.transaction() as c:
+            c.execute(
+                "DELETE FROM chain_unindexed WHERE EXISTS "
+                "(SELECT 1 FROM chain_tokens t WHERE t.tx_hash = chain_unindexed.tx_hash)"
+            )
+        # CROSS JOIN: drive from the short queue, not the registry
+        missing = ("FROM chain_unindexed u CROSS JOIN certificates c ON c.seq = u.seq "
+                   "WHERE c.issued_at < ?")
+        failed = ("FROM chain_tokens t CROSS JOIN certificates c ON c.tx_hash = t.tx_hash "
+                  "WHERE t.success = 0")
+        params = (cutoff or "",)
+        return (
+            (count(missing, params), rows(f"SELECT c.id, c.tx_hash {missing} ORDER BY u.seq", params)),
+            (count(failed), rows(f"SELECT c.id, c.tx_hash {failed} ORDER BY t.seq")),
+        )
+
+    def _drift_scan(self, cutoff, examples):
+        """The same over the legacy JSON store: one pass over every certificate."""
+        indexed = {
+            r["tx_hash"]: r["success"]
+            for r in self.db.execute("SELECT tx_hash, success FROM chain_tokens")
+        }
+        missing, failed = [], []
+        for e in self.store.iter_certificates():
+            h = normalize_tx_hash(e.get("tx_hash"))
+            if not h:
+                continue
+            if h not in indexed:
+                if cutoff and (e.get("issued_at") or "") < cutoff:
+                    missing.append({"id": e["id"], "tx_hash": h})
+            elif not indexed[h]:
+                failed.append({"id": e["id"], "tx_hash": h})
+        return (len(missing), missing[:examples]), (len(failed), failed[:examples])
+
+    def status(self):
+        checkpoints = {
+            r["account"]: {"next_seq": r["next_seq"], "updated_at": r["updated_at"]}
+            for r in self.db.execute("SELECT * FROM chain_index_checkpoint ORDER BY account")
+        }
+        tokens = self.db.execute("SELECT COUNT(*) AS n FROM chain_tokens").fetchone()["n"]
+        state = self.db.execute(
+            "SELECT holder, lease_until FROM chain_index_state WHERE id = 1"
+        ).fetchone()
+        return {
+            "checkpoints": checkpoints,
+            "tokens": tokens,
+            "last_pass": self.last_pass,
+            "leader": bool(state and state["holder"] == self.holder
+                           and state["lease_until"] > time.time()),
+            **self.stats,
+        }
+
+
+_indexer = None
+_indexer_lock = threading.Lock()
+
+
+def get_chain_indexer(store):
+    """Process-wide indexer; start() it to index in the background."""
+    global _indexer
+    with _indexer_lock:
+        if _indexer is None:
+            _indexer = ChainIndexer(store)
+        return _indexer
@@ -0,0 +1,345 @@
+# backend/chain_state.py
+
+import os
+import json
+import time
+import asyncio
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout, as_completed
+
+# aptos_sdk is imported when the first lookup starts the client: importing
+# this module for its helpers (chain_indexer) stays cheap
+
+from storage import get_database, normalize_tx_hash
+
+
+# ============================================================
+#                         CONFIG
+# ============================================================
+
+# Same node as minting (admin_mint.py); not imported from there, since
+# that module needs the university key
+CHAIN_NODE_URL = os.getenv("APTOS_NODE_URL", "https://fullnode.devnet.aptoslabs.com/v1")
+# Fullnode requests in flight at once, across all verifications
+CHAIN_MAX_CONCURRENCY = int(os.getenv("CHAIN_MAX_CONCURRENCY", "8"))
+CHAIN_TIMEOUT = float(os.getenv("CHAIN_TIMEOUT", "10"))
+# Not found / pending / fullnode errors are re-checked after this many seconds;
+# committed transactions are final and cached forever
+CHAIN_NEGATIVE_TTL = float(os.getenv("CHAIN_NEGATIVE_TTL", "30"))
+# Only tokens minted by these accounts verify. Comma-separated; unset,
+# the university account plus its signer pool (UNIVERSITY_PRIVATE_KEY,
+# MINT_SIGNER_KEYS). Readers have no keys, so set it there.
+CHAIN_ISSUER_ADDRESS = os.getenv("CHAIN_ISSUER_ADDRESS", "").lower()
+
+# Every certificate and anchor token is minted into this collection
+COLLECTION_NAME = "Credlytic - Hack"
+
+MINT_FUNCTION = "0x3::token::create_token_script"
+# create_token_script argument positions (see admin_mint.build_mint_payload)
+_COLLECTION_ARG = 0
+_PROPERTY_KEYS_ARG = 10
+_PROPERTY_VALUES_ARG = 11
+
+CHAIN_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chain_cache (
+    tx_hash     TEXT PRIMARY KEY,
+    result      TEXT NOT NULL,
+    expires_at  REAL,
+    checked_at  REAL NOT NULL
+);
+"""
+
+
+def _addr(a):
+    try:
+        return "0x" + format(int(a, 16), "064x")
+    except (TypeError, ValueError):
+        return None
+
+
+_issuers = None
+
+
+def issuer_accounts():
+    """
+    Addresses whose tokens count: CHAIN_ISSUER_ADDRESS if set, otherwise
+    the university account and MINT_SIGNER_KEYS. Derived once.
+    """
+    global _issuers
+    if _issuers is None:
+        if CHAIN_ISSUER_ADDRESS:
+            addrs = [_addr(a) for a in CHAIN_ISSUER_ADDRESS.split(",") if a.strip()]
+        else:
+            from aptos_sdk.account import Account
+            keys = [os.getenv("UNIVERSITY_PRIVATE_KEY", "")] + os.getenv("MINT_SIGNER_KEYS", "").split(",")
+            addrs = [_addr(str(Account.load_key(k.strip()).address())) for k in keys if k.strip()]
+        _issuers = frozenset(a for a in addrs if a)
+    return _issuers
+
+
+def token_property(payload, key):
+    """A string property from a create_token_script payload, or None."""
+    if not payload or payload.get("function") != MINT_FUNCTION:
+        return None
+    args = payload.get("arguments") or []
+    try:
+        keys = args[_PROPERTY_KEYS_ARG]
+        values = args[_PROPERTY_VALUES_ARG]
+        raw = values[keys.index(key)]
+    except (IndexError, ValueError, TypeError):
+        return None
+    if isinstance(raw, str) and raw.startswith("0x"):
+        try:
+            return bytes.fromhex(raw[2:]).decode("utf-8")
+        except ValueError:
+            return None
+    return raw
+
+
+def token_collection(payload):
+    """The collection a create_token_script payload mints into, or None."""
+    if not payload or payload.get("function") != MINT_FUNCTION:
+        return None
+    args = payload.get("arguments") or []
+    return args[_COLLECTION_ARG] if args else None
+
+
+def token_student_id(payload):
+    """The student_id property from a create_token_script payload, or None."""
+    return token_property(payload, "student_id")
+
+
+def transaction_status(txn):
+    """Status dict for a transaction as returned by /transactions/by_hash."""
+    if txn.get("type") == "pending_transaction":
+        return {"status": "pending"}
+    return {
+        "status": "confirmed" if txn.get("success") else "failed",
+        "version": txn.get("version"),
+        "vm_status": txn.get("vm_status"),
+        "sender": _addr(txn.get("sender")),
+        "function": (txn.get("payload") or {}).get("function"),
+        "collection": token_collection(txn.get("payload")),
+        "student_id": token_student_id(txn.get("payload")),
+        # Set on Merkle anchor tokens (anchoring.py)
+        "merkle_root": token_property(txn.get("payload"), "merkle_root"),
+    }
+
+
+def confirms(status, email, root=None, issuers=None):
+    """
+    (ok, reason): does a looked-up transaction prove a certificate for
+    this email? It must be committed successfully, be sent by an issuer
+    account (issuer_accounts() unless given) and mint a token in the
+    Credlytic collection whose student_id is the email. For an anchored
+    certificate, pass the root its inclusion proof folds up to: the
+    token must carry that merkle_root instead.
+    """
+    if status["status"] != "confirmed":
+        return False, f"Transaction {status['status'].replace('_', ' ')} on chain"
+    issuers = issuer_accounts() if issuers is None else issuers
+    if not issuers:
+        return False, "No issuer account configured (CHAIN_ISSUER_ADDRESS)"
+    if status.get("sender") not in issuers:
+        return False, "Token was not minted by the issuer"
+    if status.get("collection") != COLLECTION_NAME:
+        return False, "Token is not in the Credlytic collection"
+    if root is not None:
+        if status.get("merkle_root") != root:
+            return False, "Anchored Merkle root does not match"
+    elif (status.get("student_id") or "").lower() != (email or "").strip().lower():
+        return False, "Token student_id does not match"
+    return True, None
+
+
+# ============================================================
+#                      CHAIN STATE
+# ============================================================
+
+class ChainState:
+    """
+    Read-only transaction lookups against the fullnode, behind a
+    persistent cache.
+
+    - committed transactions (confirmed or failed) are final and stay
+      cached forever; not found / pending / errors expire after
+      negative_ttl
+    - lookups for a hash already being fetched wait for that request
+      instead of sending another
+    - a semaphore caps concurrent fullnode requests however many
+      callers there are
+
+    Runs its own event loop thread with one RestClient. Results are dicts:
+
+        {"status": "confirmed" | "failed" | "pending" | "not_found" | "error",
+         "version", "vm_status", "sender", "function", "collection",
+         "student_id", "error"}
+
+    verify() accepts tokens from `issuers` (default issuer_accounts()).
+    """
+
+    def __init__(self, node_url=CHAIN_NODE_URL, max_concurrency=CHAIN_MAX_CONCURRENCY,
+                 timeout=CHAIN_TIMEOUT, negative_ttl=CHAIN_NEGATIVE_TTL, db=None, issuers=None):
+        self.node_url = node_url
+        self.issuers = issuers
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.negative_ttl = negative_ttl
+
+        self.db = db or get_database()
+        self.db.ensure_schema(CHAIN_CACHE_SCHEMA)
+
+        self.loop = None
+        self.client = None
+        self._thread = None
+        self._window = None
+        self._inflight = {}     # loop-owned: tx_hash -> asyncio.Future
+        self._started = threading.Event()
+        self._start_lock = threading.Lock()
+
+        self.stats = {"cache_hits": 0, "requests": 0, "coalesced": 0}
+
+    # ---- lifecycle ----
+    def start(self):
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return self
+            self._started.clear()
+            self._thread = threading.Thread(target=self._run, name="chain-state", daemon=True)
+            self._thread.start()
+        self._started.wait()
+        return self
+
+    def _run(self):
+        from aptos_sdk.async_client import RestClient
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.client = RestClient(self.node_url)
+        self._window = asyncio.Semaphore(self.max_concurrency)
+        self._started.set()
+        self.loop.run_forever()
+
+    def stop(self):
+        if not self.loop:
+            return
+        asyncio.run_coroutine_threadsafe(self.client.close(), self.loop).result(timeout=10)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=10)
+        self.loop = None
+
+    # ---- public API (any thread) ----
+    def lookup(self, tx_hash):
+        """Concurrent Future of the transaction's status dict."""
+        h = normalize_tx_hash(tx_hash)
+        cached = self.cached(h)
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            done = Future()
+            done.set_result(cached)
+            return done
+        self.start()
+        return asyncio.run_coroutine_threadsafe(self._fetch(h), self.loop)
+
+    def check(self, tx_hash):
+        """
+        Status dict for one hash. Waiting for a request slot counts
+        against the timeout too, so a saturated window answers "error".
+        """
+        try:
+            return self.lookup(tx_hash).result(timeout=self.timeout * 2)
+        except FutureTimeout:
+            return {"status": "error", "error": "Timed out waiting for the fullnode"}
+
+    def check_many(self, tx_hashes):
+        """Yields (tx_hash, status dict) as lookups finish; each hash is looked up once."""
+        futures = {self.lookup(h): h for h in dict.fromkeys(tx_hashes)}
+        for f in as_completed(futures):
+            yield futures[f], f.result()
+
+    def verify(self, email, tx_hash, root=None):
+        """(ok, reason, status) for one certificate; see confirms()."""
+        status = self.check(tx_hash)
+        ok, reason = confirms(status, email, root, self.issuers)
+        return ok, reason, status
+
+    # ---- persistent cache ----
+    def cached(self, tx_hash):
+        row = self.db.execute(
+            "SELECT result, expires_at FROM chain_cache WHERE tx_hash = ?", (tx_hash,)
+        ).fetchone()
+        if row is None or (row["expires_at"] is not None and row["expires_at"] <= time.time()):
+            return None
+        result = json.loads(row["result"])
+        if result.get("function") == MINT_FUNCTION and "collection" not in result:
+            # Cached before the collection was recorded; look it up again
+            return None
+        return result
+
+    def _store(self, tx_hash, status):
+        final = status["status"] in ("confirmed", "failed")
+        now = time.time()
+        with self.db.transaction() as c:
+            c.execute(
+                "INSERT OR REPLACE INTO chain_cache (tx_hash, result, expires_at, checked_at) "
+                "VALUES (?, ?, ?, ?)",
+                (tx_hash, json.dumps(status), None if final else now + self.negative_ttl, now),
+            )
+
+    def forget(self, tx_hash):
+        with self.db.transaction() as c:
+            c.execute("DELETE FROM chain_cache WHERE tx_hash = ?", (normalize_tx_hash(tx_hash),))
+
+    # ---- loop side ----
+    async def _fetch(self, tx_hash):
+        pending = self._inflight.get(tx_hash)
+        if pending is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(pending)
+
+        pending = self._inflight[tx_hash] = self.loop.create_future()
+        try:
+            status = await self._query(tx_hash)
+            try:
+                # SQLite writes block; keep them off the loop thread
+                await self.loop.run_in_executor(None, self._store, tx_hash, status)
+            except Exception as e:
+                print("[CHAIN CACHE ERROR]", tx_hash, e)
+            pending.set_result(status)
+            return status
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            self._inflight.pop(tx_hash, None)
+            # Nobody else waiting: mark the exception as retrieved
+            if pending.done() and not pending.cancelled():
+                pending.exception()
+
+    async def _query(self, tx_hash):
+        from aptos_sdk.async_client import ApiError
+        async with self._window:
+            self.stats["requests"] += 1
+            try:
+                txn = await asyncio.wait_for(
+                    self.client.transaction_by_hash(tx_hash), self.timeout
+                )
+            except ApiError as e:
+                if e.status_code == 404:
+                    return {"status": "not_found"}
+                return {"status": "error", "error": f"Fullnode returned {e.status_code}"}
+            except Exception as e:
+                return {"status": "error", "error": str(e) or type(e).__name__}
+        return transaction_status(txn)
+
+
+_chain = None
+_chain_lock = threading.Lock()
+
+
+def get_chain_state():
+    """Process-wide chain reader, started on first use."""
+    global _chain
+    with _chain_lock:
+        if _chain is None:
+            _chain = ChainState()
+        return _chain
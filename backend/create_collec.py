@@ -1,8 +1,17 @@
 # backend/create_collec.py
 # ONE TIME USE ONLY!!
+#
+#   python create_collec.py                  # university collection
+#   python create_collec.py --signers 4      # + provision a 4-account signer pool
+#   python create_collec.py --signers-only   # provision MINT_SIGNER_KEYS from .env
+#
+# 0x3::token only lets a collection's creator mint into it, so each
+# pool signer gets its own "Credlytic - Hack" collection: the university
+# account funds the signer, and the signer creates the collection.
+# Prints the MINT_SIGNER_KEYS and CHAIN_ISSUER_ADDRESS lines for .env.
 
 import asyncio
-import time
+import argparse
 from dotenv import load_dotenv
 import os
 
@@ -18,22 +27,34 @@ from aptos_sdk.bcs import Serializer
 
 load_dotenv()
 
-NODE_URL = "https://fullnode.devnet.aptoslabs.com/v1"
+NODE_URL = os.getenv("APTOS_NODE_URL", "https://fullnode.devnet.aptoslabs.com/v1")
 PRIVATE_KEY = os.getenv("UNIVERSITY_PRIVATE_KEY")
 
 COLLECTION_NAME = "Credlytic - Hack"
 COLLECTION_DESCRIPTION = "Official NFTs issued by Credlytic"
 COLLECTION_URI = "https://i.imgur.com/T0aCg0C.png"  # or your own
 
+# Octas sent to each new signer for gas (0.1 APT)
+SIGNER_FUNDING = 10_000_000
+
 if not PRIVATE_KEY:
     raise Exception("UNIVERSITY_PRIVATE_KEY missing in .env")
 
 account = Account.load_key(PRIVATE_KEY)
 
 
-async def create_collection():
-    client = RestClient(NODE_URL)
+async def submit(client, signer, payload):
+    raw_txn = await client.create_bcs_transaction(signer, TransactionPayload(payload))
+    signed = SignedTransaction(raw_txn, signer.sign_transaction(raw_txn))
+
+    tx_hash = await client.submit_bcs_transaction(signed)
+    print("Submitted TX:", tx_hash)
+
+    await client.wait_for_transaction(tx_hash)
+    return tx_hash
 
+
+async def create_collection(client, creator):
     payload = EntryFunction.natural(
         "0x3::token",
         "create_collection_script",
@@ -47,26 +68,65 @@ async def create_collection():
         ]
     )
 
-    raw_txn = await client.create_bcs_transaction(
-        account,
-        TransactionPayload(payload)
+    tx_hash = await submit(client, creator, payload)
+    print("\n🎉 SUCCESS!")
+    print(f"Collection '{COLLECTION_NAME}' created for {creator.address()}!")
+    print(f"Explorer: https://explorer.aptoslabs.com/txn/{tx_hash}?network=devnet")
+
+
+async def fund(client, address, amount):
+    payload = EntryFunction.natural(
+        "0x1::aptos_account",
+        "transfer",
+        [],
+        [
+            TransactionArgument(address, Serializer.struct),
+            TransactionArgument(amount, Serializer.u64),
+        ]
     )
+    await submit(client, account, payload)
+    print(f"Funded {address} with {amount} octas")
 
-    signed = SignedTransaction(raw_txn, account.sign_transaction(raw_txn))
 
-    tx_hash = await client.submit_bcs_transaction(signed)
-    print("Submitted TX:", tx_hash)
+async def provision_signers(client, signers, amount):
+    """Funds each signer from the university account, then creates its collection."""
+    for signer in signers:
+        await fund(client, signer.address(), amount)
+        await create_collection(client, signer)
 
-    await client.wait_for_transaction(tx_hash)
-    print("\n🎉 SUCCESS!")
-    print(f"Collection '{COLLECTION_NAME}' created!")
-    print(f"Explorer: https://explorer.aptoslabs.com/txn/{tx_hash}?network=devnet")
+    print("\nAdd to .env:")
+    print("MINT_SIGNER_KEYS=" + ",".join(str(s.private_key) for s in signers))
+    print("CHAIN_ISSUER_ADDRESS=" + ",".join(
+        str(a.address()) for a in [account] + signers))
+
+
+async def main(args):
+    client = RestClient(NODE_URL)
+
+    if args.signers_only:
+        keys = [k.strip() for k in os.getenv("MINT_SIGNER_KEYS", "").split(",") if k.strip()]
+        if not keys:
+            raise Exception("MINT_SIGNER_KEYS missing in .env")
+        signers = [Account.load_key(k) for k in keys]
+    else:
+        await create_collection(client, account)
+        signers = [Account.generate() for _ in range(args.signers)]
+
+    if signers:
+        await provision_signers(client, signers, args.fund)
 
     await client.close()
 
 
 if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Create the Credlytic collection and signer pool")
+    ap.add_argument("--signers", type=int, default=0, help="new signer accounts to provision")
+    ap.add_argument("--signers-only", action="store_true",
+                    help="provision the accounts in MINT_SIGNER_KEYS, skip the university collection")
+    ap.add_argument("--fund", type=int, default=SIGNER_FUNDING, help="octas sent to each signer")
+    args = ap.parse_args()
+
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
-    loop.run_until_complete(create_collection())
+    loop.run_until_complete(main(args))
     loop.close()
@@ -1,52 +1,60 @@
 # backend/email_utils.py
 
 import os
-import smtplib
+import re
 import ssl
-from email.message import EmailMessage
+import html
+import uuid
+import base64
+import smtplib
+import mimetypes
+from string import Template
+from email import policy
+from email.message import MIMEPart
+from email.utils import formatdate, make_msgid
 
 from dotenv import load_dotenv
+
+from metrics import SMTP_SECONDS
+
 load_dotenv()
 
 EMAIL_ADDRESS = os.getenv("EMAIL_ADDRESS")
 EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")  # Gmail App Password
 
+# Point these at a local debugging server (e.g. mock_smtp_server.py with
+# SMTP_SSL=0) to run without Gmail. Login is skipped when no password is set.
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_SSL = os.getenv("SMTP_SSL", "1") == "1"
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "0") == "1"
+SMTP_PORT = int(os.getenv("SMTP_PORT", "465" if SMTP_SSL else "25"))
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))
 
-def send_certificate_email(
-    to_email,
-    student_name,
-    course_name,
-    explorer_url,
-    attachment_path,
-    tx_hash=None
-):
-    """
-    Sends certificate email with attached PNG/PDF.
-    Includes transaction hash for easy copy/paste.
-    """
+# Raw bytes per attachment read; a multiple of 57 so every chunk encodes
+# to whole 76-character base64 lines
+ATTACHMENT_CHUNK = 57 * 1024
 
-    if not EMAIL_ADDRESS or not EMAIL_PASSWORD:
-        raise Exception("Missing EMAIL_ADDRESS or EMAIL_PASSWORD in .env")
+SUBJECT = "Your Credlytic Blockchain Certificate"
 
-    # Fallback if tx_hash missing
-    tx_hash_display = tx_hash if tx_hash else "Not Available"
+# One context for every connection: loading the CA bundle is the
+# expensive part of creating one
+_ssl_context = ssl.create_default_context()
 
-    msg = EmailMessage()
-    msg["Subject"] = "Your Credlytic Blockchain Certificate"
-    msg["From"] = EMAIL_ADDRESS
-    msg["To"] = to_email
 
-    # -------- TEXT VERSION --------
-    msg.set_content(f"""
-Hello {student_name},
+# ============================================================
+#                      MESSAGE TEMPLATES
+# ============================================================
 
-Your certificate for "{course_name}" has been successfully issued.
+TEXT_TEMPLATE = Template("""
+Hello $student_name,
+
+Your certificate for "$course_name" has been successfully issued.
 
 Blockchain Explorer:
-{explorer_url}
+$explorer_url
 
 Transaction Hash:
-{tx_hash_display}
+$tx_hash
 
 Your certificate file is attached.
 
@@ -54,23 +62,23 @@ Regards,
 Credlytic Team
 """)
 
-    # -------- HTML VERSION --------
-    msg.add_alternative(f"""
+# Values are HTML-escaped before substitution
+HTML_TEMPLATE = Template("""
 <html>
   <body>
-    <p>Hello <strong>{student_name}</strong>,</p>
+    <p>Hello <strong>$student_name</strong>,</p>
 
-    <p>Your certificate for <strong>{course_name}</strong> has been issued.</p>
+    <p>Your certificate for <strong>$course_name</strong> has been issued.</p>
 
     <p>
       <strong>Blockchain Explorer:</strong><br>
-      <a href="{explorer_url}" target="_blank">{explorer_url}</a>
+      <a href="$explorer_url" target="_blank">$explorer_url</a>
     </p>
 
     <p>
       <strong>Transaction Hash:</strong><br>
       <code style="padding:6px 10px; background:#f2f2f2; border-radius:6px;">
-        {tx_hash_display}
+        $tx_hash
       </code>
     </p>
 
@@ -80,29 +88,205 @@ Credlytic Team
        <strong>Credlytic Team</strong></p>
   </body>
 </html>
-""", subtype="html")
+""")
+
+_LEADING_DOT = re.compile(rb"^\.", re.MULTILINE)
+
+
+def _header_bytes(headers):
+    return b"".join(policy.SMTP.fold_binary(name, value) for name, value in headers)
+
+
+def _dot_stuff(data):
+    return _LEADING_DOT.sub(b"..", data)
+
+
+# ============================================================
+#                  STREAMED CERTIFICATE MESSAGE
+# ============================================================
+
+class CertificateMessage:
+    """
+    multipart/mixed certificate email whose attachment is never held
+    in memory: the file is read and base64-encoded one chunk at a time
+    while the DATA command is being written to the socket.
+    """
+
+    def __init__(self, sender, to_email, subject, text, html_body, attachment_path):
+        self.sender = sender
+        self.to_email = to_email
+        self.attachment_path = attachment_path
+
+        # Fails early (and permanently) if the attachment is gone
+        self.attachment_size = os.stat(attachment_path).st_size
+
+        boundary = f"===============_{uuid.uuid4().hex}=="
+        self._close = f"--{boundary}--\r\n".encode()
+
+        body = MIMEPart(policy=policy.SMTP)
+        body.set_content(text, cte="quoted-printable")
+        body.add_alternative(html_body, subtype="html", cte="quoted-printable")
 
-    # -------- ATTACHMENT --------
-    with open(attachment_path, "rb") as f:
-        file_data = f.read()
         file_name = os.path.basename(attachment_path)
+        # PDF, PNG, JPEG or WebP depending on CERT_OUTPUT_FORMATS
+        ctype = mimetypes.guess_type(file_name)[0] or "application/pdf"
+        attachment = MIMEPart(policy=policy.SMTP)
+        attachment["Content-Type"] = ctype
+        attachment["Content-Transfer-Encoding"] = "base64"
+        attachment.add_header("Content-Disposition", "attachment", filename=file_name)
+
+        # Everything except the attachment payload is small and built up front
+        self._head = b"".join([
+            _header_bytes([
+                ("Subject", subject),
+                ("From", sender),
+                ("To", to_email),
+                ("Date", formatdate(localtime=True)),
+                ("Message-ID", make_msgid(domain="credlytic")),
+                ("MIME-Version", "1.0"),
+                ("Content-Type", f'multipart/mixed; boundary="{boundary}"'),
+            ]),
+            b"\r\n",
+            f"--{boundary}\r\n".encode(),
+            _dot_stuff(body.as_bytes(policy=policy.SMTP)),
+            b"\r\n",
+            f"--{boundary}\r\n".encode(),
+            _header_bytes(attachment.items()),
+            b"\r\n",
+        ])
+
+    def iter_chunks(self):
+        """The message as CRLF, dot-stuffed DATA chunks."""
+        yield self._head
+        with open(self.attachment_path, "rb") as f:
+            while True:
+                chunk = f.read(ATTACHMENT_CHUNK)
+                if not chunk:
+                    break
+                # base64 lines never start with "." so need no stuffing
+                yield base64.encodebytes(chunk).replace(b"\n", b"\r\n")
+        yield self._close
+
+    def as_bytes(self):
+        """Whole message in memory (debugging only)."""
+        return b"".join(self.iter_chunks())
+
+    def send(self, server):
+        """
+        MAIL / RCPT / DATA on an open smtplib connection, streaming the
+        body. Raises the same exceptions as smtplib's sendmail().
+        """
+        with SMTP_SECONDS.time(op="send"):
+            server.ehlo_or_helo_if_needed()
 
-        # If user sends PDF, detect and attach properly.
-        subtype = "png" if file_name.lower().endswith(".png") else "pdf"
+            code, resp = server.mail(self.sender)
+            if code != 250:
+                _reset(server)
+                raise smtplib.SMTPSenderRefused(code, resp, self.sender)
 
-        msg.add_attachment(
-            file_data,
-            maintype="application" if subtype == "pdf" else "image",
-            subtype=subtype,
-            filename=file_name
-        )
+            code, resp = server.rcpt(self.to_email)
+            if code not in (250, 251):
+                _reset(server)
+                raise smtplib.SMTPRecipientsRefused({self.to_email: (code, resp)})
 
-    # -------- SEND EMAIL --------
-    context = ssl.create_default_context()
+            code, resp = server.docmd("data")
+            if code != 354:
+                _reset(server)
+                raise smtplib.SMTPDataError(code, resp)
+
+            for chunk in self.iter_chunks():
+                server.send(chunk)
+            server.send(b".\r\n")
+
+            code, resp = server.getreply()
+            if code != 250:
+                _reset(server)
+                raise smtplib.SMTPDataError(code, resp)
+            return resp
+
+
+def _reset(server):
+    try:
+        server.rset()
+    except smtplib.SMTPServerDisconnected:
+        pass
+
+
+# ============================================================
+#                          SMTP
+# ============================================================
+
+def open_smtp_connection():
+    """Connected (and logged in, if configured) smtplib client."""
+    with SMTP_SECONDS.time(op="connect"):
+        if SMTP_SSL:
+            server = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, context=_ssl_context, timeout=SMTP_TIMEOUT)
+        else:
+            server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+            if SMTP_STARTTLS:
+                server.starttls(context=_ssl_context)
+    try:
+        if EMAIL_PASSWORD:
+            with SMTP_SECONDS.time(op="login"):
+                server.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
+    except Exception:
+        server.close()
+        raise
+    return server
+
+
+def build_certificate_message(
+    to_email,
+    student_name,
+    course_name,
+    explorer_url,
+    attachment_path,
+    tx_hash=None
+):
+    """
+    Certificate email with the certificate file attached.
+    Includes transaction hash for easy copy/paste.
+    """
+
+    if not EMAIL_ADDRESS:
+        raise Exception("Missing EMAIL_ADDRESS in .env")
+
+    # Fallback if tx_hash missing
+    fields = {
+        "student_name": student_name,
+        "course_name": course_name,
+        "explorer_url": explorer_url,
+        "tx_hash": tx_hash if tx_hash else "Not Available",
+    }
+
+    return CertificateMessage(
+        EMAIL_ADDRESS,
+        to_email,
+        SUBJECT,
+        TEXT_TEMPLATE.substitute(fields),
+        HTML_TEMPLATE.substitute({k: html.escape(str(v)) for k, v in fields.items()}),
+        attachment_path,
+    )
+
+
+def send_certificate_email(
+    to_email,
+    student_name,
+    course_name,
+    explorer_url,
+    attachment_path,
+    tx_hash=None
+):
+    """
+    Sends one certificate email on its own connection. Issuance goes
+    through mailer.Mailer instead; this is kept for one-off sends.
+    """
+    msg = build_certificate_message(
+        to_email, student_name, course_name, explorer_url, attachment_path, tx_hash
+    )
 
-    with smtplib.SMTP_SSL("smtp.gmail.com", 465, context=context) as server:
-        server.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
-        server.send_message(msg)
+    with open_smtp_connection() as server:
+        msg.send(server)
 
     print(f"📧 Email sent to {to_email} with attachment {attachment_path}")
     return True
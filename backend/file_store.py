@@ -0,0 +1,356 @@
+# backend/file_store.py
+# Content-addressed storage for certificate files. A file's key is the
+# SHA-256 of its bytes plus its extension, sharded two levels deep:
+#
+#   3f/a9/3fa9...c2.pdf
+#
+# Identical files are stored once, two certificates can never overwrite
+# each other, and a key always names the same bytes, so it can be
+# cached forever. Renderers write into a staging area; put() moves the
+# finished file to its key.
+#
+#   python file_store.py gc [--dry-run] [--grace SECONDS]
+#   python file_store.py migrate     # move pre-hashing flat files in
+
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import argparse
+import threading
+
+from storage import get_database, open_store
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# ============================================================
+#                         CONFIG
+# ============================================================
+
+CERT_FILES_BACKEND = os.getenv("CERT_FILES_BACKEND", "local")
+# Also where pre-hashing flat files ({email}_{timestamp}.pdf) live
+CERT_FILES_DIR = os.getenv("CERT_FILES_DIR") or os.path.join(BASE_DIR, "generated")
+# The collector leaves unreferenced files younger than this alone: they
+# may belong to an issuance that has not saved its entry yet
+CERT_FILES_GC_GRACE = float(os.getenv("CERT_FILES_GC_GRACE", "86400"))
+
+KEY_RE = re.compile(r"^([0-9a-f]{2})/([0-9a-f]{2})/([0-9a-f]{64})(\.[a-z0-9]{1,8})?$")
+STAGING = ".staging"
+
+
+def is_key(name):
+    m = KEY_RE.match(name or "")
+    return bool(m) and m.group(3).startswith(m.group(1) + m.group(2))
+
+
+def key_digest(key):
+    """The SHA-256 hex digest a key names (its strong ETag)."""
+    return KEY_RE.match(key).group(3)
+
+
+def make_key(digest, ext):
+    return f"{digest[:2]}/{digest[2:4]}/{digest}{ext.lower()}"
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def entry_keys(entry):
+    """Content keys a certificate entry references (legacy flat names are skipped)."""
+    names = [entry.get("file"), entry.get("thumbnail"), *(entry.get("files") or {}).values()]
+    return {n for n in names if n and is_key(n)}
+
+
+# ============================================================
+#                        BACKENDS
+# ============================================================
+
+class FileStore:
+    """
+    Backend interface. Renderers always write to a local staging path;
+    put() consumes it. Backends without a local copy of stored files
+    return None from local_path() and are served through open().
+    """
+
+    backend = None
+
+    def staging_path(self, suffix=""):
+        """A fresh local path to write a file to before put()."""
+        raise NotImplementedError
+
+    def put(self, path):
+        """Stores the file at path under its content key (consuming it); returns the key."""
+        raise NotImplementedError
+
+    def exists(self, key):
+        raise NotImplementedError
+
+    def open(self, key):
+        """Binary file object; FileNotFoundError if missing."""
+        raise NotImplementedError
+
+    def local_path(self, key):
+        return None
+
+    def delete(self, key):
+        """Removes a key; returns the bytes freed (0 if it was already gone)."""
+        raise NotImplementedError
+
+    def iter_keys(self):
+        """Yields (key, size, mtime) for every stored file."""
+        raise NotImplementedError
+
+    def iter_staged(self):
+        """Yields (path, size, mtime) for staged files not yet put()."""
+        raise NotImplementedError
+
+    def put_files(self, files):
+        """
+        Stores a render_files() result; returns it with every path
+        replaced by its key.
+        """
+        keys = {fmt: self.put(p) for fmt, p in files["formats"].items()}
+        primary = next(fmt for fmt, p in files["formats"].items() if p == files["file"])
+        return {
+            "file": keys[primary],
+            "formats": keys,
+            "thumbnail": self.put(files["thumbnail"]) if files.get("thumbnail") else None,
+        }
+
+
+class LocalFileStore(FileStore):
+    """Sharded directory tree under root, staging in root/.staging."""
+
+    backend = "local"
+
+    def __init__(self, root=CERT_FILES_DIR):
+        self.root = root
+        self.staging = os.path.join(root, STAGING)
+        os.makedirs(self.staging, exist_ok=True)
+
+    def _path(self, key):
+        if not is_key(key):
+            raise FileNotFoundError(key)
+        return os.path.join(self.root, *key.split("/"))
+
+    def staging_path(self, suffix=""):
+        return os.path.join(self.staging, uuid.uuid4().hex + suffix)
+
+    def put(self, path):
+        key = make_key(file_digest(path), os.path.splitext(path)[1])
+        dest = self._path(key)
+        if os.path.exists(dest):
+            # Already stored: drop the copy, and refresh the mtime so the
+            # collector's grace period covers the new reference too
+            os.unlink(path)
+            os.utime(dest)
+        else:
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            # Same filesystem, so this is an atomic rename
+            os.replace(path, dest)
+        return key
+
+    def exists(self, key):
+        try:
+            return os.path.exists(self._path(key))
+        except FileNotFoundError:
+            return False
+
+    def open(self, key):
+        return open(self._path(key), "rb")
+
+    def local_path(self, key):
+        return self._path(key)
+
+    def delete(self, key):
+        path = self._path(key)
+        try:
+            size = os.path.getsize(path)
+            os.unlink(path)
+        except FileNotFoundError:
+            return 0
+        for d in (os.path.dirname(path), os.path.dirname(os.path.dirname(path))):
+            try:
+                os.rmdir(d)
+            except OSError:
+                break
+        return size
+
+    def iter_keys(self):
+        for a in sorted(os.listdir(self.root)):
+            top = os.path.join(self.root, a)
+            if len(a) != 2 or not os.path.isdir(top):
+                continue
+            for b in sorted(os.listdir(top)):
+                shard = os.path.join(top, b)
+                if not os.path.isdir(shard):
+                    continue
+                with os.scandir(shard) as it:
+                    for e in it:
+                        key = f"{a}/{b}/{e.name}"
+                        if e.is_file() and is_key(key):
+                            st = e.stat()
+                            yield key, st.st_size, st.st_mtime
+
+    def iter_staged(self):
+        with os.scandir(self.staging) as it:
+            for e in it:
+                if e.is_file():
+                    st = e.stat()
+                    yield e.path, st.st_size, st.st_mtime
+
+
+# Other backends (object storage, ...) register here
+FILE_STORES = {"local": LocalFileStore}
+
+
+def open_file_store(backend=None):
+    backend = (backend or CERT_FILES_BACKEND).lower()
+    if backend not in FILE_STORES:
+        raise ValueError(f"Unknown CERT_FILES_BACKEND: {backend}")
+    return FILE_STORES[backend]()
+
+
+_files = None
+_files_lock = threading.Lock()
+
+
+def get_file_store():
+    """Process-wide file store."""
+    global _files
+    with _files_lock:
+        if _files is None:
+            _files = open_file_store()
+        return _files
+
+
+# ============================================================
+#                  GARBAGE COLLECTION
+# ============================================================
+
+def referenced_keys(store):
+    """Keys referenced by any certificate entry or unfinished pipeline row."""
+    keys = set()
+    for entry in store.iter_certificates():
+        keys |= entry_keys(entry)
+
+    # Rendered but not yet persisted to the entry
+    try:
+        rows = get_database().execute(
+            "SELECT files FROM issue_pipeline "
+            "WHERE stage IN ('rendered', 'persisted') AND files IS NOT NULL"
+        ).fetchall()
+    except Exception:
+        rows = []
+    for r in rows:
+        files = json.loads(r["files"])
+        keys |= entry_keys({"file": files.get("file"), "thumbnail": files.get("thumbnail"),
+                            "files": files.get("formats")})
+    return keys
+
+
+def collect_garbage(store, files=None, grace=CERT_FILES_GC_GRACE, dry_run=False):
+    """
+    Deletes stored files no entry references, and abandoned staged
+    files, once they are older than `grace` seconds. Returns counts.
+    """
+    files = files or get_file_store()
+    cutoff = time.time() - grace
+    live = referenced_keys(store)
+
+    stats = {"scanned": 0, "referenced": 0, "deleted": 0, "bytes_freed": 0, "staged_deleted": 0}
+    for key, size, mtime in files.iter_keys():
+        stats["scanned"] += 1
+        if key in live:
+            stats["referenced"] += 1
+        elif mtime < cutoff:
+            stats["deleted"] += 1
+            stats["bytes_freed"] += size if dry_run else files.delete(key)
+
+    for path, size, mtime in files.iter_staged():
+        if mtime < cutoff:
+            stats["staged_deleted"] += 1
+            stats["bytes_freed"] += size
+            if not dry_run:
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+    return stats
+
+
+def migrate_legacy(store, files=None, legacy_dir=CERT_FILES_DIR):
+    """
+    Moves pre-hashing flat files ({email}_{timestamp}.pdf) into the
+    store and rewrites the entries that name them. Returns how many
+    entries changed.
+    """
+    files = files or get_file_store()
+
+    def move(name):
+        if not name or is_key(name):
+            return name
+        path = os.path.join(legacy_dir, os.path.basename(name))
+        if not os.path.isfile(path):
+            return name
+        staged = files.staging_path(os.path.splitext(path)[1])
+        shutil.copyfile(path, staged)
+        return files.put(staged)
+
+    changed, moved = 0, set()
+    for entry in list(store.iter_certificates()):
+        fields = {}
+        if entry.get("file") and not is_key(entry["file"]):
+            fields["file"] = move(entry["file"])
+        if entry.get("thumbnail") and not is_key(entry["thumbnail"]):
+            fields["thumbnail"] = move(entry["thumbnail"])
+        if entry.get("files") and not all(is_key(n) for n in entry["files"].values()):
+            fields["files"] = {fmt: move(n) for fmt, n in entry["files"].items()}
+        fields = {k: v for k, v in fields.items() if v != entry.get(k)}
+        if fields:
+            store.update_certificate(entry["id"], fields)
+            moved |= {n for n in (entry.get("file"), entry.get("thumbnail"),
+                                  *(entry.get("files") or {}).values()) if n and not is_key(n)}
+            changed += 1
+
+    # Originals go only after every entry naming them was rewritten
+    for name in moved:
+        try:
+            os.unlink(os.path.join(legacy_dir, os.path.basename(name)))
+        except FileNotFoundError:
+            pass
+    return changed
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Certificate file store maintenance")
+    sub = ap.add_subparsers(dest="command", required=True)
+    gc = sub.add_parser("gc", help="delete files no certificate references")
+    gc.add_argument("--grace", type=float, default=CERT_FILES_GC_GRACE,
+                    help="keep unreferenced files younger than this (seconds)")
+    gc.add_argument("--dry-run", action="store_true")
+    sub.add_parser("migrate", help="move flat legacy files into the content store")
+    args = ap.parse_args()
+
+    store = open_store()
+
+    if args.command == "gc":
+        stats = collect_garbage(store, grace=args.grace, dry_run=args.dry_run)
+        prefix = "[GC DRY RUN]" if args.dry_run else "[GC]"
+        print(prefix, ", ".join(f"{k}={v}" for k, v in stats.items()))
+    else:
+        print(f"[MIGRATE] {migrate_legacy(store)} certificates moved to the content store")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+# backend/gunicorn.conf.py
+# gunicorn settings for wsgi.py; run from backend/:
+#
+#   gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Worker processes get past the GIL for request handling; threads per
+# worker cover requests that wait on SQLite, SMTP or the chain. Every
+# setting can be overridden on the command line.
+
+import os
+import sys
+import multiprocessing
+
+# Import the app without starting background threads in the master;
+# post_fork starts them in each worker. Only one worker, the holder of the
+# issuer lease (issuer_lease.py), runs the mint/pipeline/batch/mail workers;
+# the others write rows for it to pick up.
+os.environ["CREDLYTIC_PRELOAD"] = "1"
+
+_cpus = multiprocessing.cpu_count()
+
+bind = os.getenv("BIND", f"0.0.0.0:{os.getenv('PORT', '5000')}")
+workers = int(os.getenv("WEB_WORKERS", "0")) or min(2 * _cpus + 1, 9)
+threads = int(os.getenv("WEB_THREADS", "4"))
+worker_class = "gthread"
+preload_app = True
+
+# Each worker has its own render pool; split the cores between them
+# instead of spawning cpu_count renderers per worker
+os.environ.setdefault("RENDER_WORKERS", str(max(1, _cpus // workers)))
+
+timeout = int(os.getenv("WEB_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers now and then so slow leaks cannot accumulate; the issuer
+# lease holder is exempt, as its exit would fail the rows it is minting
+max_requests = int(os.getenv("WEB_MAX_REQUESTS", "10000"))
+max_requests_jitter = max_requests // 10
+
+# app.py logs every request as a JSON line already
+accesslog = None
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    import app
+
+    def on_lead():
+        worker.max_requests = sys.maxsize
+
+    app.start_background_workers(on_lead=on_lead)
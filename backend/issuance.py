@@ -0,0 +1,187 @@
+# backend/issuance.py
+
+import os
+from datetime import datetime, timezone
+
+# Minting (admin_mint), rendering (renderer) and email (email_utils) are
+# imported where they are used: loading admin_mint needs the university
+# key and the Aptos client, which processes that never issue do without
+from anchoring import AnchorError, anchor_mode, get_anchorer, leaf_hash
+from file_store import CERT_FILES_DIR, get_file_store, is_key
+from render_cache import LAZY_PREFIX, lazy_files, lazy_mode, resolve_attachment
+from storage import new_certificate_id
+
+
+# Content-addressed store; legacy flat files also live in this directory
+GENERATED_DIR = CERT_FILES_DIR
+
+
+class IssuanceError(Exception):
+    """A certificate could not be issued; str(e) is safe to return to the admin."""
+
+
+def explorer_url(tx_hash):
+    return f"https://explorer.aptoslabs.com/txn/{tx_hash}?network=devnet"
+
+
+def certificate_path():
+    """
+    Fresh staging path for a render (the renderer picks the extensions).
+    store_files() then moves the files to their content keys.
+    """
+    return get_file_store().staging_path(".pdf")
+
+
+def store_files(files):
+    """Moves a render_files() result into the file store; returns it keyed."""
+    return get_file_store().put_files(files)
+
+
+def file_fields(files):
+    """Entry fields for a store_files() result."""
+    return {
+        "file": files["file"],
+        "files": dict(files["formats"]),
+        "thumbnail": files["thumbnail"],
+    }
+
+
+def file_path(name):
+    """
+    Local path for an entry's file name: a content key or a legacy flat
+    name. Lazy names (render/<id>.pdf) are returned as they are and
+    rendered when the email is sent (resolve_attachment).
+    """
+    if is_key(name):
+        return get_file_store().local_path(name)
+    if name.startswith(LAZY_PREFIX):
+        return name
+    return os.path.join(GENERATED_DIR, os.path.basename(name))
+
+
+# ============================================================
+#                     ISSUANCE STEPS
+# ============================================================
+
+def mint_step(student_name, course_name, student_email):
+    try:
+        from admin_mint import mint_certificate_with_email
+        return mint_certificate_with_email(student_name, course_name, student_email)
+    except Exception as e:
+        raise IssuanceError(f"Minting failed: {e}") from e
+
+
+def anchor_step(cert_id, student_name, course_name, student_email):
+    """
+    Adds the certificate's leaf to the open Merkle batch (anchoring.py);
+    returns a Future of {"tx_hash", "token_name", "anchor"}.
+    """
+    leaf = leaf_hash({"id": cert_id, "student": student_name,
+                      "email": student_email, "course": course_name})
+    return get_anchorer().anchor(cert_id, leaf)
+
+
+def anchor_result(future, timeout=None):
+    """Waits for an anchor_step() Future; (tx_hash, token_name, anchor)."""
+    try:
+        result = future.result(timeout=timeout)
+    except AnchorError as e:
+        raise IssuanceError(str(e)) from e
+    return result["tx_hash"], result["token_name"], result["anchor"]
+
+
+def complete_issuance(store, student_name, student_email, course_name, tx, token_name,
+                      render=None, mailer=None, cert_id=None, anchor=None):
+    """
+    Everything after the chain confirmed: render, persist, email.
+    `render` has generate_certificate_files' signature (e.g. RenderPool.render_files;
+    default: render in this thread).
+    With a mailer the email is queued; otherwise it is sent inline.
+    An anchored certificate passes the id its leaf was built from and
+    its inclusion proof (`anchor`).
+    Idempotent on cert_id: if that certificate is already stored (a
+    re-run after a crash), it is reused and its email not sent again.
+    Returns (entry, warning) where warning is set if only the email failed.
+    """
+    existing = store.get_certificate(cert_id) if cert_id else None
+    if existing:
+        if mailer is not None:
+            # The outbox holds at most one email per certificate
+            return mailer.enqueue(existing, file_path(existing["file"])), None
+        if existing.get("email_status") == "sent":
+            return existing, None
+        return deliver_inline(store, existing, file_path(existing["file"]))
+
+    cert_id = cert_id or new_certificate_id()
+    if lazy_mode():
+        # Rendered on first download (render_cache.py)
+        files = lazy_files(cert_id)
+    else:
+        if render is None:
+            from renderer import generate_certificate_files as render
+        files = render(student_name, course_name, tx, token_name, certificate_path())
+        if not files:
+            raise IssuanceError("Failed to generate certificate")
+        files = store_files(files)
+
+    primary_path = file_path(files["file"])
+
+    explorer = explorer_url(tx)
+
+    entry = {
+        "id": cert_id,
+        **file_fields(files),
+        "status": "rendered",
+        "student": student_name,
+        "email": student_email,
+        "course": course_name,
+        "token_name": token_name,
+        "tx_hash": tx,
+        "explorer_url": explorer,
+        "issued_at": datetime.now(timezone.utc).isoformat()
+    }
+    if anchor:
+        entry["anchor"] = anchor
+    entry = store.add_certificate(entry)
+
+    if mailer is not None:
+        return mailer.enqueue(entry, primary_path), None
+
+    return deliver_inline(store, entry, primary_path)
+
+
+def deliver_inline(store, entry, attachment_path):
+    """Sends the email in the calling thread; returns (entry, warning)."""
+    try:
+        from email_utils import send_certificate_email
+        attachment_path = resolve_attachment(attachment_path, store)
+        send_certificate_email(
+            entry["email"],
+            entry["student"],
+            entry["course"],
+            entry["explorer_url"],
+            attachment_path,
+            tx_hash=entry["tx_hash"]
+        )
+    except Exception as e:
+        warning = f"Email failed: {e}"
+        return store.update_certificate(entry["id"], {
+            "email_status": "failed", "email_error": warning,
+        }) or entry, warning
+
+    return store.update_certificate(entry["id"], {
+        "status": "delivered", "email_status": "sent",
+    }) or entry, None
+
+
+def issue_certificate(store, student_name, student_email, course_name, mailer=None):
+    if anchor_mode():
+        # Blocks until the batch is anchored (up to ANCHOR_WINDOW)
+        cert_id = new_certificate_id()
+        tx, token_name, anchor = anchor_result(
+            anchor_step(cert_id, student_name, course_name, student_email))
+        return complete_issuance(store, student_name, student_email, course_name, tx, token_name,
+                                 mailer=mailer, cert_id=cert_id, anchor=anchor)
+    tx, token_name = mint_step(student_name, course_name, student_email)
+    return complete_issuance(store, student_name, student_email, course_name, tx, token_name,
+                             mailer=mailer)
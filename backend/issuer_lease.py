@@ -0,0 +1,103 @@
+# backend/issuer_lease.py
+# One issuer process at a time runs the background workers (mint engine,
+# pipeline, bulk jobs, anchoring, mail): the holder of a lease row in
+# SQLite. A mint engine assigns its account's sequence numbers locally,
+# so two processes minting with the same key keep invalidating each
+# other's transactions. The other issuer processes only write the rows
+# (issue_pipeline, issue_job_rows) that the holder's workers pick up,
+# and one of them takes over once the holder stops renewing.
+
+import os
+import time
+import threading
+
+from storage import get_database, owner_id
+from tracing import log_event
+
+
+# A holder that has not renewed for this long is presumed dead
+ISSUER_LEASE = float(os.getenv("ISSUER_LEASE", "30"))
+
+LEASE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS worker_lease (
+    name         TEXT PRIMARY KEY,
+    holder       TEXT,
+    lease_until  REAL NOT NULL DEFAULT 0
+);
+"""
+
+
+class IssuerLease:
+    """
+    Takes and renews the "issuer" lease every lease/3 seconds.
+    on_acquire runs once, in the renewing thread, when this process
+    becomes the holder; on_lost runs if another process took the lease
+    while this one still held it (it stalled for longer than the lease).
+    """
+
+    def __init__(self, on_acquire, on_lost=None, lease=ISSUER_LEASE, name="issuer"):
+        self.on_acquire = on_acquire
+        self.on_lost = on_lost
+        self.lease = lease
+        self.name = name
+        self.holder = owner_id()
+        self.held = False
+
+        self.db = get_database()
+        self.db.ensure_schema(LEASE_SCHEMA)
+
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """First attempt in the calling thread, so a lone process starts its workers at once."""
+        with self._start_lock:
+            if self._thread is not None:
+                return self
+            self.renew()
+            self._thread = threading.Thread(target=self._run, name="issuer-lease", daemon=True)
+            self._thread.start()
+        return self
+
+    def lead(self):
+        """Takes or renews the lease; True while this process holds it."""
+        now = time.time()
+        with self.db.transaction() as c:
+            return c.execute(
+                "INSERT INTO worker_lease (name, holder, lease_until) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, "
+                "lease_until = excluded.lease_until "
+                "WHERE holder = excluded.holder OR lease_until < ?",
+                (self.name, self.holder, now + self.lease, now),
+            ).rowcount == 1
+
+    def renew(self):
+        try:
+            leading = self.lead()
+        except Exception as e:
+            # Busy database: try again next round; the lease outlasts a few misses
+            print("[ISSUER LEASE ERROR]", e)
+            return
+        if leading and not self.held:
+            self.held = True
+            log_event("issuer_lease_acquired", holder=self.holder)
+            self.on_acquire()
+        elif not leading and self.held:
+            self.held = False
+            log_event("issuer_lease_lost", level="error", holder=self.holder)
+            if self.on_lost:
+                self.on_lost()
+
+    def _run(self):
+        while True:
+            time.sleep(self.lease / 3)
+            self.renew()
+
+    def status(self):
+        row = self.db.execute(
+            "SELECT holder, lease_until FROM worker_lease WHERE name = ?", (self.name,)
+        ).fetchone()
+        return {
+            "held": self.held,
+            "holder": row["holder"] if row and row["lease_until"] > time.time() else None,
+        }
@@ -0,0 +1,440 @@
+# backend/mailer.py
+
+import os
+import time
+import random
+import smtplib
+import threading
+from datetime import datetime, timezone
+
+from storage import get_database, owner_alive, owner_id
+# email_utils (SMTP settings, TLS context) is imported by the first send
+from metrics import EMAILS
+
+
+# ============================================================
+#                         CONFIG
+# ============================================================
+
+MAIL_WORKERS = int(os.getenv("MAIL_WORKERS", "2"))
+# Messages a worker sends on one connection before picking new work
+MAIL_BATCH_SIZE = int(os.getenv("MAIL_BATCH_SIZE", "20"))
+# Messages per second per connection (0 = unlimited)
+MAIL_RATE = float(os.getenv("MAIL_RATE", "2"))
+MAIL_MAX_ATTEMPTS = int(os.getenv("MAIL_MAX_ATTEMPTS", "6"))
+MAIL_BACKOFF_BASE = float(os.getenv("MAIL_BACKOFF_BASE", "30"))
+MAIL_BACKOFF_MAX = float(os.getenv("MAIL_BACKOFF_MAX", "3600"))
+# Reconnect after this many messages (providers cap messages per session)
+MAIL_CONN_MAX_MESSAGES = int(os.getenv("MAIL_CONN_MAX_MESSAGES", "100"))
+# Idle connections older than this are checked with NOOP before reuse
+MAIL_CONN_IDLE_CHECK = float(os.getenv("MAIL_CONN_IDLE_CHECK", "30"))
+MAIL_POLL_INTERVAL = float(os.getenv("MAIL_POLL_INTERVAL", "5"))
+
+# Row lifecycle: queued -> sending -> sent | failed (queued again on a retryable error)
+# "owner" is the process sending the row (storage.owner_id).
+OUTBOX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS mail_outbox (
+    id               INTEGER PRIMARY KEY AUTOINCREMENT,
+    cert_id          TEXT,
+    to_email         TEXT NOT NULL,
+    student_name     TEXT,
+    course_name      TEXT,
+    explorer_url     TEXT,
+    tx_hash          TEXT,
+    attachment_path  TEXT,
+    status           TEXT NOT NULL,
+    attempts         INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at  REAL NOT NULL,
+    last_error       TEXT,
+    owner            TEXT,
+    created_at       TEXT NOT NULL,
+    updated_at       TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON mail_outbox(status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS idx_outbox_cert ON mail_outbox(cert_id);
+"""
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _is_permanent(err):
+    """5xx replies (bad recipient, rejected content) will not succeed on retry."""
+    if isinstance(err, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in err.recipients.values())
+    code = getattr(err, "smtp_code", None)
+    return isinstance(code, int) and code >= 500
+
+
+# ============================================================
+#                     CONNECTION POOL
+# ============================================================
+
+class SmtpConnection:
+    def __init__(self, server, rate=MAIL_RATE):
+        self.server = server
+        self.sent = 0
+        self.last_used = time.monotonic()
+        self._interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_send = 0.0
+
+    def send(self, msg):
+        # Per-connection rate limit
+        wait = self._next_send - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self._next_send = time.monotonic() + self._interval
+
+        msg.send(self.server)
+        self.sent += 1
+        self.last_used = time.monotonic()
+
+    def healthy(self):
+        if time.monotonic() - self.last_used < MAIL_CONN_IDLE_CHECK:
+            return True
+        try:
+            return self.server.noop()[0] == 250
+        except Exception:
+            return False
+
+    def close(self):
+        try:
+            self.server.quit()
+        except Exception:
+            try:
+                self.server.close()
+            except Exception:
+                pass
+
+
+class SmtpPool:
+    """
+    Authenticated SMTP connections kept open between messages, so the
+    TCP/TLS handshake and login are paid once per connection instead
+    of once per email. At most `size` connections exist at a time.
+    """
+
+    def __init__(self, size=MAIL_WORKERS, connect=None, rate=MAIL_RATE,
+                 max_messages=MAIL_CONN_MAX_MESSAGES):
+        self.connect = connect
+        self.rate = rate
+        self.max_messages = max_messages
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self.stats = {"opened": 0, "reused": 0, "discarded": 0}
+
+    def acquire(self):
+        self._slots.acquire()
+        try:
+            while True:
+                with self._lock:
+                    conn = self._idle.pop() if self._idle else None
+                if conn is None:
+                    break
+                if conn.healthy():
+                    self.stats["reused"] += 1
+                    return conn
+                self.discard(conn, release=False)
+
+            connect = self.connect
+            if connect is None:
+                from email_utils import open_smtp_connection as connect
+            conn = SmtpConnection(connect(), self.rate)
+            self.stats["opened"] += 1
+            return conn
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn):
+        if conn.sent >= self.max_messages:
+            self.discard(conn)
+            return
+        with self._lock:
+            self._idle.append(conn)
+        self._slots.release()
+
+    def discard(self, conn, release=True):
+        self.stats["discarded"] += 1
+        conn.close()
+        if release:
+            self._slots.release()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+# ============================================================
+#                         MAILER
+# ============================================================
+
+class Mailer:
+    """
+    Persistent outbox for certificate emails.
+
+    enqueue() only writes an outbox row, so issuance never waits on
+    SMTP. Background workers claim due rows in batches, send each batch
+    over one pooled connection and record the outcome on the
+    certificate entry (email_status: queued / sent / failed).
+    Temporary failures are retried with exponential backoff; the
+    outbox survives restarts.
+    """
+
+    def __init__(self, store, workers=MAIL_WORKERS, batch_size=MAIL_BATCH_SIZE,
+                 max_attempts=MAIL_MAX_ATTEMPTS, pool=None, resolve_attachment=None):
+        self.store = store
+        # Maps a stored attachment name to a local path at send time
+        # (lazily rendered certificates); paths are used as they are by default
+        self.resolve_attachment = resolve_attachment
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.pool = pool or SmtpPool(size=workers)
+
+        self.db = get_database()
+        self.db.ensure_schema(OUTBOX_SCHEMA)
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._start_lock = threading.Lock()
+
+    # ---- lifecycle ----
+    def start(self):
+        with self._start_lock:
+            if self._threads:
+                return self
+            self.resume()
+            self._stop.clear()
+            for i in range(self.workers):
+                t = threading.Thread(target=self._worker, name=f"mailer-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+        return self
+
+    def stop(self, timeout=10):
+        self._stop.set()
+        self._wake.set()
+        for t in self._threads:
+            t.join(timeout=timeout)
+        self._threads = []
+        self.pool.close()
+
+    def resume(self):
+        """Rows left 'sending' by a dead process go back to the queue."""
+        stale = [
+            r["id"] for r in self.db.execute(
+                "SELECT id, owner FROM mail_outbox WHERE status = 'sending'"
+            ).fetchall()
+            if not owner_alive(r["owner"])
+        ]
+        with self.db.transaction() as c:
+            for outbox_id in stale:
+                c.execute(
+                    "UPDATE mail_outbox SET status = 'queued', owner = NULL, updated_at = ? "
+                    "WHERE id = ? AND status = 'sending'",
+                    (_now(), outbox_id),
+                )
+        return len(stale)
+
+    # ---- producer side ----
+    def enqueue(self, entry, attachment_path):
+        """
+        Queue the certificate email for `entry`; returns the entry with
+        email_status set. A certificate already in the outbox (issuance
+        re-run after a crash) is not queued again.
+        """
+        with self.db.transaction() as c:
+            queued = c.execute(
+                "INSERT INTO mail_outbox (cert_id, to_email, student_name, course_name, "
+                "explorer_url, tx_hash, attachment_path, status, next_attempt_at, created_at) "
+                "SELECT ?, ?, ?, ?, ?, ?, ?, 'queued', ?, ? "
+                "WHERE NOT EXISTS (SELECT 1 FROM mail_outbox WHERE cert_id = ?)",
+                (
+                    entry.get("id"), entry["email"], entry.get("student"), entry.get("course"),
+                    entry.get("explorer_url"), entry.get("tx_hash"), attachment_path,
+                    time.time(), _now(), entry.get("id"),
+                ),
+            ).rowcount
+        if not queued:
+            return entry
+        entry = self._record(entry.get("id"), {"email_status": "queued"}) or entry
+        self._wake.set()
+        return entry
+
+    def status(self):
+        return {
+            r["status"]: r["n"]
+            for r in self.db.execute(
+                "SELECT status, COUNT(*) AS n FROM mail_outbox GROUP BY status"
+            )
+        }
+
+    # ---- worker side ----
+    def _worker(self):
+        while not self._stop.is_set():
+            try:
+                rows = self._claim_due()
+                if rows:
+                    self._deliver(rows)
+                    continue
+            except Exception as e:
+                print("[MAILER ERROR]", e)
+
+            self._wake.wait(self._idle_timeout())
+            self._wake.clear()
+
+    def _idle_timeout(self):
+        row = self.db.execute(
+            "SELECT MIN(next_attempt_at) AS t FROM mail_outbox WHERE status = 'queued'"
+        ).fetchone()
+        if row is None or row["t"] is None:
+            return MAIL_POLL_INTERVAL
+        return min(MAIL_POLL_INTERVAL, max(0.05, row["t"] - time.time()))
+
+    def _claim_due(self):
+        """Atomically take up to batch_size due rows for this process."""
+        with self.db.transaction() as c:
+            rows = c.execute(
+                "SELECT * FROM mail_outbox WHERE status = 'queued' AND next_attempt_at <= ? "
+                "ORDER BY next_attempt_at, id LIMIT ?",
+                (time.time(), self.batch_size),
+            ).fetchall()
+            for r in rows:
+                c.execute(
+                    "UPDATE mail_outbox SET status = 'sending', owner = ?, updated_at = ? "
+                    "WHERE id = ?",
+                    (owner_id(), _now(), r["id"]),
+                )
+        return rows
+
+    def _deliver(self, rows):
+        try:
+            conn = self.pool.acquire()
+        except Exception as e:
+            for row in rows:
+                self._retry(row, f"Connect failed: {e}")
+            return
+
+        for i, row in enumerate(rows):
+            attachment = row["attachment_path"]
+            if self.resolve_attachment:
+                try:
+                    attachment = self.resolve_attachment(attachment)
+                except Exception as e:
+                    self._retry(row, f"Attachment unavailable: {e}")
+                    continue
+            try:
+                from email_utils import build_certificate_message
+                msg = build_certificate_message(
+                    row["to_email"], row["student_name"], row["course_name"],
+                    row["explorer_url"], attachment, tx_hash=row["tx_hash"],
+                )
+            except Exception as e:
+                # Missing attachment or sender config: retrying will not help
+                self._fail(row, f"Could not build message: {e}")
+                continue
+
+            try:
+                conn.send(msg)
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused,
+                    smtplib.SMTPDataError) as e:
+                # Rejected message; smtplib has reset the session, so the
+                # connection stays usable for the rest of the batch
+                if _is_permanent(e):
+                    self._fail(row, str(e))
+                else:
+                    self._retry(row, str(e))
+                continue
+            except Exception as e:
+                # Connection is broken: drop it and hand the rest of the batch back
+                self.pool.discard(conn)
+                self._retry(row, str(e))
+                for rest in rows[i + 1:]:
+                    self._requeue(rest)
+                return
+
+            self._sent(row)
+
+        self.pool.release(conn)
+
+    # ---- outcomes ----
+    def _sent(self, row):
+        attempts = row["attempts"] + 1
+        with self.db.transaction() as c:
+            c.execute(
+                "UPDATE mail_outbox SET status = 'sent', attempts = ?, owner = NULL, "
+                "last_error = NULL, updated_at = ? WHERE id = ?",
+                (attempts, _now(), row["id"]),
+            )
+        self._record(row["cert_id"], {
+            "status": "delivered",
+            "email_status": "sent",
+            "email_attempts": attempts,
+            "email_error": None,
+            "email_sent_at": _now(),
+        })
+        EMAILS.inc(outcome="sent")
+        from email_utils import EMAIL_ADDRESS
+        print(f"📧 Email sent to {row['to_email']} (from {EMAIL_ADDRESS})")
+
+    def _retry(self, row, error):
+        attempts = row["attempts"] + 1
+        if attempts >= self.max_attempts:
+            self._fail(row, error, attempts)
+            return
+
+        delay = min(MAIL_BACKOFF_BASE * 2 ** (attempts - 1), MAIL_BACKOFF_MAX)
+        delay *= random.uniform(0.8, 1.2)
+        with self.db.transaction() as c:
+            c.execute(
+                "UPDATE mail_outbox SET status = 'queued', attempts = ?, next_attempt_at = ?, "
+                "owner = NULL, last_error = ?, updated_at = ? WHERE id = ?",
+                (attempts, time.time() + delay, error, _now(), row["id"]),
+            )
+        EMAILS.inc(outcome="retry")
+        self._record(row["cert_id"], {
+            "email_status": "queued",
+            "email_attempts": attempts,
+            "email_error": error,
+        })
+
+    def _requeue(self, row):
+        """Back to the queue untouched (the row was never attempted)."""
+        with self.db.transaction() as c:
+            c.execute(
+                "UPDATE mail_outbox SET status = 'queued', owner = NULL, updated_at = ? "
+                "WHERE id = ?",
+                (_now(), row["id"]),
+            )
+        self._wake.set()
+
+    def _fail(self, row, error, attempts=None):
+        attempts = attempts or row["attempts"] + 1
+        with self.db.transaction() as c:
+            c.execute(
+                "UPDATE mail_outbox SET status = 'failed', attempts = ?, owner = NULL, "
+                "last_error = ?, updated_at = ? WHERE id = ?",
+                (attempts, error, _now(), row["id"]),
+            )
+        EMAILS.inc(outcome="failed")
+        self._record(row["cert_id"], {
+            "email_status": "failed",
+            "email_attempts": attempts,
+            "email_error": error,
+        })
+        print("[MAIL FAILED]", row["to_email"], error)
+
+    def _record(self, cert_id, fields):
+        if not cert_id:
+            return None
+        try:
+            return self.store.update_certificate(cert_id, fields)
+        except Exception as e:
+            print("[MAILER STATUS ERROR]", cert_id, e)
+            return None
@@ -0,0 +1,220 @@
+# backend/metrics.py
+# Process-local counters and histograms in the Prometheus text format.
+# Each server process exposes its own values; scrape every worker, or
+# aggregate with the usual sum()/histogram_quantile() queries.
+
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from tracing import log_event
+
+
+# Seconds; spans sub-millisecond DB calls up to multi-second chain waits
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels_text(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    pairs += [f'{n}="{_escape(v)}"' for n, v in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _num(v):
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+# ============================================================
+#                        METRIC TYPES
+# ============================================================
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=(), registry=None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=(), registry=None):
+        super().__init__(name, help, labelnames, registry)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def collect(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_labels_text(self.labelnames, k)} {_num(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        super().__init__(name, help, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}   # key -> [bucket counts..., sum, count]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def count(self, **labels):
+        s = self._series.get(self._key(labels))
+        return s[-1] if s else 0
+
+    def collect(self):
+        with self._lock:
+            items = [(k, list(s)) for k, s in self._series.items()]
+        lines = []
+        for key, s in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, s):
+                cumulative += n
+                lines.append(f"{self.name}_bucket"
+                             f"{_labels_text(self.labelnames, key, [('le', _num(bound))])} {cumulative}")
+            lines.append(f"{self.name}_bucket"
+                         f"{_labels_text(self.labelnames, key, [('le', '+Inf')])} {s[-1]}")
+            lines.append(f"{self.name}_sum{_labels_text(self.labelnames, key)} {_num(s[-2])}")
+            lines.append(f"{self.name}_count{_labels_text(self.labelnames, key)} {s[-1]}")
+        return lines
+
+
+class Callback(_Metric):
+    """
+    Gauge or counter read from existing state at scrape time (queue
+    depths, cache stats). `fn` returns a number, or {label values: number}.
+    """
+
+    def __init__(self, name, help, fn, labelnames=(), kind="gauge", registry=None):
+        self.kind = kind
+        self.fn = fn
+        super().__init__(name, help, labelnames, registry)
+
+    def collect(self):
+        try:
+            values = self.fn()
+        except Exception as e:
+            log_event("metrics_callback_failed", level="error", metric=self.name, error=str(e))
+            return []
+        if not isinstance(values, dict):
+            values = {(): values}
+        lines = []
+        for key, v in values.items():
+            key = key if isinstance(key, tuple) else (key,)
+            lines.append(f"{self.name}{_labels_text(self.labelnames, key)} {_num(v)}")
+        return lines
+
+
+# ============================================================
+#                          REGISTRY
+# ============================================================
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            # Re-registering (e.g. a second app instance) replaces the old source
+            self._metrics[metric.name] = metric
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for m in metrics:
+            body = m.collect()
+            if body:
+                lines += m.header() + body
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ============================================================
+#                    HOT-PATH INSTRUMENTS
+# ============================================================
+
+HTTP_SECONDS = Histogram(
+    "credlytic_http_request_seconds", "HTTP request latency",
+    ["method", "endpoint", "status"],
+)
+STORE_SECONDS = Histogram(
+    "credlytic_store_seconds", "Certificate store operation latency", ["backend", "op"],
+)
+APTOS_SECONDS = Histogram(
+    "credlytic_aptos_seconds", "Aptos build/submit latency and submit-to-commit wait", ["op"],
+)
+APTOS_TRANSACTIONS = Counter(
+    "credlytic_aptos_transactions_total", "Transactions by outcome", ["outcome"],
+)
+RENDER_SECONDS = Histogram(
+    "credlytic_render_seconds", "Certificate rendering phases", ["phase"],
+)
+ENCODE_SECONDS = Histogram(
+    "credlytic_encode_seconds", "Certificate file encoding by format", ["format"],
+)
+SMTP_SECONDS = Histogram(
+    "credlytic_smtp_seconds", "SMTP connect/login/send latency", ["op"],
+)
+EMAILS = Counter(
+    "credlytic_emails_total", "Certificate emails by outcome", ["outcome"],
+)
+STAGE_SECONDS = Histogram(
+    "credlytic_pipeline_stage_seconds", "Issuance pipeline stage duration", ["stage"],
+)
@@ -0,0 +1,44 @@
+# backend/migrate_db.py
+# Move the legacy db.json / admin.json into the SQLite store,
+# or export the SQLite store back to that layout.
+#
+#   python migrate_db.py                 # import db.json + admin.json
+#   python migrate_db.py --export out/   # write out/db.json + out/admin.json
+
+import os
+import argparse
+
+from storage import (
+    SqliteCertificateStore,
+    SQLITE_PATH,
+    LEGACY_DB_FILE,
+    LEGACY_ADMINS_FILE,
+)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Credlytic store migration")
+    ap.add_argument("--sqlite", default=SQLITE_PATH, help="SQLite database file")
+    ap.add_argument("--db", default=LEGACY_DB_FILE, help="legacy db.json")
+    ap.add_argument("--admins", default=LEGACY_ADMINS_FILE, help="legacy admin.json")
+    ap.add_argument("--export", metavar="DIR", help="export SQLite store as JSON into DIR")
+    args = ap.parse_args()
+
+    store = SqliteCertificateStore(args.sqlite)
+
+    if args.export:
+        os.makedirs(args.export, exist_ok=True)
+        n = store.export_json(
+            os.path.join(args.export, "db.json"),
+            os.path.join(args.export, "admin.json"),
+        )
+        print(f"Exported {n} certificates to {args.export}")
+        return
+
+    n = store.import_json(args.db, args.admins)
+    store.set_meta("legacy_imported", "1")
+    print(f"Imported {n} new certificates into {args.sqlite} ({store.count()} total)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,549 @@
+# backend/mint_engine.py
+
+import os
+import time
+import heapq
+import hashlib
+import asyncio
+import threading
+import concurrent.futures
+
+import httpx
+from aptos_sdk.async_client import ApiError, ClientConfig, RestClient
+from aptos_sdk.transactions import SignedTransaction
+
+from metrics import APTOS_SECONDS, APTOS_TRANSACTIONS
+
+
+# ============================================================
+#                         CONFIG
+# ============================================================
+
+MINT_MAX_IN_FLIGHT = int(os.getenv("MINT_MAX_IN_FLIGHT", "16"))
+MINT_CONFIRM_BATCH = int(os.getenv("MINT_CONFIRM_BATCH", "32"))
+MINT_POLL_INTERVAL = float(os.getenv("MINT_POLL_INTERVAL", "0.5"))
+MINT_MAX_RETRIES = int(os.getenv("MINT_MAX_RETRIES", "5"))
+# Short expiry so a dropped transaction frees its sequence number quickly
+MINT_TX_TTL = int(os.getenv("MINT_TX_TTL", "60"))
+MINT_TIMEOUT = float(os.getenv("MINT_TIMEOUT", "300"))
+
+# Seconds past expiration before a missing transaction is declared dead
+EXPIRY_GRACE = 5
+
+_TX_PREFIX = hashlib.sha3_256(b"APTOS::Transaction").digest()
+
+
+class MintError(Exception):
+    """
+    `retry_safe` is set when the mint provably did not happen and never
+    will: nothing reached the node, or the transaction is gone (expired,
+    replaced, committed as aborted). Otherwise it may still commit, and
+    sending the payload again could mint the certificate twice.
+    """
+
+    def __init__(self, message, retry_safe=False, tx_hash=None):
+        super().__init__(message)
+        self.retry_safe = retry_safe
+        self.tx_hash = tx_hash
+
+
+def transaction_hash(signed):
+    """The hash the node reports for a signed user transaction."""
+    return "0x" + hashlib.sha3_256(_TX_PREFIX + b"\x00" + signed.bytes()).hexdigest()
+
+
+def _error_kind(err):
+    """Classify a submission failure by the node's vm status / HTTP code."""
+    text = str(err).upper()
+    if "SEQUENCE_NUMBER_TOO_OLD" in text:
+        return "too_old"
+    if "SEQUENCE_NUMBER_TOO_NEW" in text:
+        return "too_new"
+    if "TRANSACTION_EXPIRED" in text:
+        return "expired"
+    if isinstance(err, ApiError) and err.status_code < 500 and err.status_code != 429:
+        return "fatal"
+    # 5xx, 429, timeouts, connection resets
+    return "transient"
+
+
+def _maybe_accepted(err):
+    """Whether a transient submit failure could hide an accepted transaction."""
+    if isinstance(err, httpx.ConnectError):
+        return False   # no connection, nothing sent
+    if isinstance(err, ApiError) and err.status_code == 429:
+        return False
+    return True
+
+
+class _Pending:
+    __slots__ = ("payload", "future", "seq", "signed", "tx_hash", "expires_at", "attempts",
+                 "submitted_at", "maybe_sent")
+
+    def __init__(self, payload, future):
+        self.payload = payload
+        self.future = future
+        self.seq = None
+        self.signed = None
+        self.tx_hash = None
+        self.expires_at = 0
+        self.attempts = 0
+        self.submitted_at = None
+        # The node may have accepted `signed` even though no submit succeeded
+        self.maybe_sent = False
+
+
+# ============================================================
+#                      MINTING ENGINE
+# ============================================================
+
+class MintEngine:
+    """
+    Long-lived, pipelined transaction submitter for one signing account.
+
+    - one event loop thread and one pooled RestClient for the process
+    - sequence numbers are handed out locally, so up to `max_in_flight`
+      transactions are in the mempool at once
+    - a single confirmer polls pending hashes in batches
+    - a sequence number whose transaction was rejected or expired is
+      reused by the next submission, so no gap stalls later transactions
+    - a payload is only signed again once its previous transaction is
+      known not to be on chain (an "error" may have been a lost reply)
+    """
+
+    def __init__(self, account, node_url, max_in_flight=MINT_MAX_IN_FLIGHT,
+                 confirm_batch=MINT_CONFIRM_BATCH, poll_interval=MINT_POLL_INTERVAL,
+                 max_retries=MINT_MAX_RETRIES, tx_ttl=MINT_TX_TTL, confirm_timeout=MINT_TIMEOUT):
+        self.account = account
+        self.node_url = node_url
+        self.max_in_flight = max_in_flight
+        self.confirm_batch = confirm_batch
+        self.poll_interval = poll_interval
+        self.max_retries = max_retries
+        self.tx_ttl = tx_ttl
+        self.confirm_timeout = confirm_timeout
+
+        self.loop = None
+        self.client = None
+        self._thread = None
+        self._started = threading.Event()
+        self._start_lock = threading.Lock()
+
+        # Loop-owned state (only touched from the engine thread)
+        self._next_seq = None
+        self._free_seqs = []
+        self._seq_lock = None
+        self._window = None
+        self._pending = {}
+        self._confirmer = None
+
+        self.stats = {"submitted": 0, "confirmed": 0, "failed": 0, "resubmitted": 0, "resyncs": 0,
+                      "adopted": 0, "unconfirmed": 0}
+
+    # ---- lifecycle ----
+    def start(self):
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return self
+            self._started.clear()
+            self._thread = threading.Thread(target=self._run, name="mint-engine", daemon=True)
+            self._thread.start()
+        self._started.wait()
+        return self
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+        config = ClientConfig()
+        config.expiration_ttl = self.tx_ttl
+        self.client = RestClient(self.node_url, config)
+        self._seq_lock = asyncio.Lock()
+        self._window = asyncio.Semaphore(self.max_in_flight)
+        self._confirmer = self.loop.create_task(self._confirm_loop())
+
+        self._started.set()
+        self.loop.run_forever()
+
+    def stop(self):
+        if not self.loop:
+            return
+
+        async def _shutdown():
+            self._confirmer.cancel()
+            await self.client.close()
+
+        asyncio.run_coroutine_threadsafe(_shutdown(), self.loop).result(timeout=10)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=10)
+        self.loop = None
+
+    # ---- public API (any thread) ----
+    def submit(self, payload):
+        """Queue a TransactionPayload; returns a concurrent Future of the committed tx hash."""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(self._submit(payload), self.loop)
+
+    def submit_and_wait(self, payload, timeout=MINT_TIMEOUT):
+        return self.submit(payload).result(timeout=timeout)
+
+    # ---- sequence numbers ----
+    async def _allocate_seq(self):
+        async with self._seq_lock:
+            if self._next_seq is None:
+                self._next_seq = await self.client.account_sequence_number(self.account.address())
+            if self._free_seqs:
+                return heapq.heappop(self._free_seqs)
+            seq = self._next_seq
+            self._next_seq += 1
+            return seq
+
+    def _release_seq(self, seq):
+        if seq is not None and (self._next_seq is None or seq < self._next_seq):
+            heapq.heappush(self._free_seqs, seq)
+
+    async def _resync(self):
+        """Chain moved past our counter (account used elsewhere): drop stale numbers."""
+        async with self._seq_lock:
+            on_chain = await self.client.account_sequence_number(self.account.address())
+            self._next_seq = max(self._next_seq or 0, on_chain)
+            self._free_seqs = [s for s in self._free_seqs if s >= on_chain]
+            heapq.heapify(self._free_seqs)
+            self.stats["resyncs"] += 1
+
+    # ---- submission ----
+    async def _submit(self, payload):
+        await self._window.acquire()
+        p = _Pending(payload, self.loop.create_future())
+        try:
+            await self._send(p)
+        except BaseException:
+            self._window.release()
+            raise
+
+        try:
+            return await p.future
+        finally:
+            self._window.release()
+
+    async def _send(self, p):
+        while True:
+            p.attempts += 1
+            built = False
+            try:
+                if p.seq is None:
+                    p.seq = await self._allocate_seq()
+                    t0 = time.perf_counter()
+                    raw = await self.client.create_bcs_transaction(self.account, p.payload, p.seq)
+                    p.signed = SignedTransaction(raw, self.account.sign_transaction(raw))
+                    p.expires_at = raw.expiration_timestamps_secs
+                    p.maybe_sent = False
+                    APTOS_SECONDS.observe(time.perf_counter() - t0, op="build")
+                built = True
+
+                t0 = time.perf_counter()
+                p.tx_hash = await self.client.submit_bcs_transaction(p.signed)
+                APTOS_SECONDS.observe(time.perf_counter() - t0, op="submit")
+            except Exception as e:
+                kind = _error_kind(e)
+
+                if not built:
+                    # Failed while building (e.g. chain_id lookup): nothing was sent
+                    self._release_seq(p.seq)
+                    p.seq = None
+                elif kind == "transient" and _maybe_accepted(e):
+                    # A timeout or 5xx can hide an accepted submission
+                    p.maybe_sent = True
+
+                if built and p.maybe_sent and kind in ("too_old", "expired"):
+                    # The sequence number is used up or the transaction
+                    # expired: either ours landed, or it never will
+                    state = await self._lookup(p)
+                    if state == "found":
+                        self.stats["adopted"] += 1
+                        break
+                    if state == "missing":
+                        p.maybe_sent = False
+
+                if p.attempts > self.max_retries or kind == "fatal":
+                    self._release_seq(p.seq)
+                    self.stats["failed"] += 1
+                    APTOS_TRANSACTIONS.inc(outcome="rejected")
+                    if p.maybe_sent:
+                        raise MintError(f"Submission failed, transaction may still commit: {e}",
+                                        tx_hash=transaction_hash(p.signed)) from e
+                    raise MintError(f"Submission failed: {e}", retry_safe=True) from e
+
+                if p.maybe_sent and kind in ("too_old", "expired"):
+                    # Lookup failed: the old transaction can't be ruled out yet
+                    await asyncio.sleep(min(0.25 * 2 ** p.attempts, 5))
+                elif kind == "too_old":
+                    p.seq = None
+                    await self._resync()
+                elif kind == "expired":
+                    self._release_seq(p.seq)
+                    p.seq = None
+                else:
+                    # too_new / transient: same signed transaction, after a pause
+                    await asyncio.sleep(min(0.25 * 2 ** p.attempts, 5))
+                continue
+            break
+
+        self.stats["submitted"] += 1
+        APTOS_TRANSACTIONS.inc(outcome="submitted")
+        p.submitted_at = time.perf_counter()
+        self._pending[p.tx_hash] = p
+
+    async def _lookup(self, p):
+        """Whether the node knows p.signed: "found", "missing" or "unknown"."""
+        tx_hash = transaction_hash(p.signed)
+        try:
+            await self.client.transaction_by_hash(tx_hash)
+        except ApiError as e:
+            return "missing" if e.status_code == 404 else "unknown"
+        except Exception:
+            return "unknown"
+        p.tx_hash = tx_hash
+        return "found"
+
+    # ---- confirmation ----
+    async def _check(self, p):
+        try:
+            txn = await self.client.transaction_by_hash(p.tx_hash)
+        except ApiError as e:
+            if e.status_code == 404:
+                return "missing", None
+            return "unknown", None
+        except Exception:
+            return "unknown", None
+
+        if txn.get("type") == "pending_transaction":
+            return "pending", txn
+        return ("success" if txn.get("success") else "failed"), txn
+
+    async def _confirm_loop(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if not self._pending:
+                continue
+
+            batch = list(self._pending.values())[: self.confirm_batch]
+            results = await asyncio.gather(*(self._check(p) for p in batch))
+            now = time.time()
+
+            for p, (state, txn) in zip(batch, results):
+                if p.future.done():
+                    self._pending.pop(p.tx_hash, None)
+                    continue
+
+                # Round-robin: still-open hashes go to the back of the queue
+                if p.tx_hash in self._pending:
+                    self._pending[p.tx_hash] = self._pending.pop(p.tx_hash)
+
+                if state == "success":
+                    self._pending.pop(p.tx_hash, None)
+                    self.stats["confirmed"] += 1
+                    APTOS_TRANSACTIONS.inc(outcome="confirmed")
+                    APTOS_SECONDS.observe(time.perf_counter() - p.submitted_at, op="wait")
+                    p.future.set_result(p.tx_hash)
+
+                elif state == "failed":
+                    # Committed but aborted: the sequence number is used up
+                    self._pending.pop(p.tx_hash, None)
+                    self.stats["failed"] += 1
+                    APTOS_TRANSACTIONS.inc(outcome="aborted")
+                    p.future.set_exception(MintError(
+                        f"Transaction {p.tx_hash} failed: {txn.get('vm_status')}",
+                        retry_safe=True, tx_hash=p.tx_hash,
+                    ))
+
+                elif state == "missing" and now > p.expires_at + EXPIRY_GRACE:
+                    # Expired without landing: it can never commit, so resubmit
+                    self._pending.pop(p.tx_hash, None)
+                    self._release_seq(p.seq)
+                    p.seq = None
+                    p.attempts = 0
+                    self.stats["resubmitted"] += 1
+                    APTOS_TRANSACTIONS.inc(outcome="resubmitted")
+                    self.loop.create_task(self._resend(p))
+
+                elif time.perf_counter() - p.submitted_at > self.confirm_timeout:
+                    # Pending or unanswered for too long: stop polling, but
+                    # it may still commit, so the mint is not retried
+                    self._pending.pop(p.tx_hash, None)
+                    self.stats["unconfirmed"] += 1
+                    APTOS_TRANSACTIONS.inc(outcome="unconfirmed")
+                    p.future.set_exception(MintError(
+                        f"Transaction {p.tx_hash} not confirmed after {self.confirm_timeout:.0f}s",
+                        tx_hash=p.tx_hash,
+                    ))
+
+    async def _resend(self, p):
+        try:
+            await self._send(p)
+        except Exception as e:
+            if not p.future.done():
+                p.future.set_exception(e)
+
+
+# ============================================================
+#                       SIGNER POOL
+# ============================================================
+
+# A signer is taken out of rotation for SIGNER_COOLDOWN seconds after
+# SIGNER_MAX_FAILURES failed mints in a row, and while its oldest
+# unconfirmed mint is older than SIGNER_STALL_SECONDS (e.g. a dropped
+# transaction holding back every later sequence number until it expires)
+SIGNER_MAX_FAILURES = int(os.getenv("SIGNER_MAX_FAILURES", "3"))
+SIGNER_COOLDOWN = float(os.getenv("SIGNER_COOLDOWN", "30"))
+SIGNER_STALL_SECONDS = float(os.getenv("SIGNER_STALL_SECONDS", "20"))
+
+
+class _Signer:
+    __slots__ = ("engine", "index", "address", "in_flight", "started", "confirmed", "failed",
+                 "fallbacks", "consecutive_failures", "cooldown_until", "last_error")
+
+    def __init__(self, engine, index):
+        self.engine = engine
+        self.index = index
+        self.address = str(engine.account.address())
+        self.in_flight = 0
+        self.started = {}   # attempt -> submit time, for each unconfirmed mint
+        self.confirmed = 0
+        self.failed = 0
+        self.fallbacks = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0
+        self.last_error = None
+
+    def healthy(self, now, stall_seconds):
+        if now < self.cooldown_until:
+            return False
+        oldest = min(self.started.values(), default=now)
+        return now - oldest < stall_seconds
+
+
+class SignerPool:
+    """
+    Spreads mints over several signing accounts, one MintEngine each, so
+    each account's sequence numbers and mempool window only carry part of
+    the stream and one stuck transaction stalls only its own account.
+
+    submit(build) calls build(address) for the chosen signer, since a
+    0x3::token payload names its collection's creator. New mints go to
+    the healthy signer with the fewest in flight. A mint whose error is
+    retry_safe (never reached the node, or its transaction expired
+    unseen or aborted) is sent again through another signer. Any other
+    failure may still commit on its account, so it is returned to the
+    caller instead of risking a second token.
+    """
+
+    def __init__(self, engines, max_failures=SIGNER_MAX_FAILURES, cooldown=SIGNER_COOLDOWN,
+                 stall_seconds=SIGNER_STALL_SECONDS):
+        if not engines:
+            raise ValueError("SignerPool needs at least one engine")
+        self.signers = [_Signer(e, i) for i, e in enumerate(engines)]
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.stall_seconds = stall_seconds
+        self._lock = threading.Lock()
+        self._turn = 0
+
+    @property
+    def addresses(self):
+        return [s.address for s in self.signers]
+
+    def start(self):
+        for s in self.signers:
+            s.engine.start()
+        return self
+
+    def stop(self):
+        for s in self.signers:
+            s.engine.stop()
+
+    # ---- public API (any thread) ----
+    def submit(self, build):
+        """Concurrent Future of the committed tx hash; build(address) -> TransactionPayload."""
+        future = concurrent.futures.Future()
+        self._attempt(build, future, tried=set())
+        return future
+
+    def submit_and_wait(self, build, timeout=MINT_TIMEOUT):
+        return self.submit(build).result(timeout=timeout)
+
+    # ---- assignment ----
+    def _pick(self, tried):
+        now = time.time()
+        n = len(self.signers)
+        with self._lock:
+            candidates = [s for s in self.signers if s.address not in tried]
+            if not candidates:
+                return None
+            # With every signer unhealthy, keep minting on the least loaded
+            healthy = [s for s in candidates if s.healthy(now, self.stall_seconds)] or candidates
+            # Ties rotate, so idle signers share the load instead of the first taking it all
+            self._turn += 1
+            signer = min(healthy, key=lambda s: (s.in_flight, (s.index - self._turn) % n))
+            signer.in_flight += 1
+            return signer
+
+    def _attempt(self, build, future, tried):
+        signer = self._pick(tried)
+        if signer is None:
+            future.set_exception(MintError(f"All {len(tried)} signers failed"))
+            return
+        tried.add(signer.address)
+        attempt = object()
+        with self._lock:
+            signer.started[attempt] = time.time()
+
+        try:
+            inner = signer.engine.submit(build(signer.engine.account.address()))
+        except Exception as e:
+            inner = concurrent.futures.Future()
+            inner.set_exception(MintError(f"Submission failed: {e}", retry_safe=True))
+
+        def done(f):
+            with self._lock:
+                signer.in_flight -= 1
+                signer.started.pop(attempt, None)
+                error = f.exception()
+                if error is None:
+                    signer.confirmed += 1
+                    signer.consecutive_failures = 0
+                else:
+                    signer.failed += 1
+                    signer.consecutive_failures += 1
+                    signer.last_error = str(error)
+                    if signer.consecutive_failures >= self.max_failures:
+                        signer.cooldown_until = time.time() + self.cooldown
+            if error is None:
+                future.set_result(f.result())
+                return
+            print("[SIGNER ERROR]", signer.address, error)
+            if getattr(error, "retry_safe", False) and len(tried) < len(self.signers):
+                with self._lock:
+                    signer.fallbacks += 1
+                self._attempt(build, future, tried)
+            else:
+                future.set_exception(error)
+
+        inner.add_done_callback(done)
+
+    # ---- status ----
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            return {
+                s.address: {
+                    "healthy": s.healthy(now, self.stall_seconds),
+                    "in_flight": s.in_flight,
+                    "confirmed": s.confirmed,
+                    "failed": s.failed,
+                    "fallbacks": s.fallbacks,
+                    "consecutive_failures": s.consecutive_failures,
+                    "last_error": s.last_error,
+                }
+                for s in self.signers
+            }
@@ -0,0 +1,323 @@
+# backend/mock_aptos_node.py
+# Minimal stand-in for an Aptos fullnode REST API, for local testing and
+# benchmarks of the minting/verification code without devnet.
+#
+#   python mock_aptos_node.py --port 8090 --block-time 0.2 --drop-rate 0.05
+#   APTOS_NODE_URL=http://127.0.0.1:8090/v1 python app.py
+#
+# Implements only what Credlytic uses: ledger info, account sequence
+# numbers, BCS submission, lookup by hash and per-account transactions.
+# Transactions are not executed; they commit in sequence-number order.
+
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from aptos_sdk.account_address import AccountAddress
+from aptos_sdk.bcs import Deserializer
+from aptos_sdk.transactions import SignedTransaction
+
+
+CHAIN_ID = 4
+MEMPOOL_WINDOW = 100   # max seq ahead of the account accepted into mempool
+
+TX_PREFIX = hashlib.sha3_256(b"APTOS::Transaction").digest()
+
+
+def _addr(a):
+    return "0x" + format(int(a, 16), "064x")
+
+
+# ============================================================
+#                  ENTRY FUNCTION ARGUMENT DECODING
+# ============================================================
+
+def _vec(d, item):
+    return [item(d) for _ in range(d.uleb128())]
+
+
+def _bytes_hex(d):
+    return "0x" + d.to_bytes().hex()
+
+
+_ARG_DECODERS = {
+    "0x3::token::create_token_script": [
+        Deserializer.str, Deserializer.str, Deserializer.str,
+        lambda d: str(d.u64()), lambda d: str(d.u64()), Deserializer.str,
+        lambda d: str(AccountAddress.deserialize(d)),
+        lambda d: str(d.u64()), lambda d: str(d.u64()),
+        lambda d: _vec(d, Deserializer.bool),
+        lambda d: _vec(d, Deserializer.str),
+        lambda d: _vec(d, _bytes_hex),
+        lambda d: _vec(d, Deserializer.str),
+    ],
+    "0x3::token::create_collection_script": [
+        Deserializer.str, Deserializer.str, Deserializer.str,
+        lambda d: str(d.u64()), lambda d: _vec(d, Deserializer.bool),
+    ],
+    "0x1::aptos_account::transfer": [
+        lambda d: str(AccountAddress.deserialize(d)), lambda d: str(d.u64()),
+    ],
+}
+
+
+def decode_payload(payload):
+    fn = payload.value
+    function = f"{fn.module.address}::{fn.module.name}::{fn.function}"
+    decoders = _ARG_DECODERS.get(function)
+    if decoders and len(decoders) == len(fn.args):
+        args = [dec(Deserializer(raw)) for dec, raw in zip(decoders, fn.args)]
+    else:
+        args = ["0x" + raw.hex() for raw in fn.args]
+    return {
+        "type": "entry_function_payload",
+        "function": function,
+        "type_arguments": [str(t) for t in fn.ty_args],
+        "arguments": args,
+    }
+
+
+# ============================================================
+#                        CHAIN STATE
+# ============================================================
+
+class MockChain:
+
+    def __init__(self, block_time=0.2, drop_rate=0.0, abort_rate=0.0, seed=None):
+        self.block_time = block_time
+        self.drop_rate = drop_rate
+        self.abort_rate = abort_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+        self.sequence = {}   # addr -> next sequence number
+        self.mempool = {}    # addr -> {seq: txn}
+        self.by_hash = {}    # hash -> txn json
+        self.by_account = {} # addr -> [committed txn json]
+        self.version = 0
+        self.lookups = 0     # by_hash requests served
+
+    def account_seq(self, addr):
+        with self.lock:
+            return self.sequence.get(_addr(addr), 0)
+
+    def submit(self, body):
+        signed = SignedTransaction.deserialize(Deserializer(body))
+        raw = signed.transaction
+        sender = _addr(str(raw.sender))
+        seq = raw.sequence_number
+        tx_hash = "0x" + hashlib.sha3_256(TX_PREFIX + b"\x00" + body).hexdigest()
+
+        with self.lock:
+            current = self.sequence.get(sender, 0)
+            if seq < current:
+                return 400, {"message": "Invalid transaction: Type: Validation Code: SEQUENCE_NUMBER_TOO_OLD",
+                             "error_code": "vm_error", "vm_error_code": 3}
+            if seq >= current + MEMPOOL_WINDOW:
+                return 400, {"message": "Invalid transaction: Type: Validation Code: SEQUENCE_NUMBER_TOO_NEW",
+                             "error_code": "vm_error", "vm_error_code": 4}
+            if raw.expiration_timestamps_secs <= time.time():
+                return 400, {"message": "Invalid transaction: Type: Validation Code: TRANSACTION_EXPIRED",
+                             "error_code": "vm_error", "vm_error_code": 6}
+
+            if tx_hash in self.by_hash:
+                return 202, self.by_hash[tx_hash]
+
+            txn = {
+                "type": "pending_transaction",
+                "hash": tx_hash,
+                "sender": sender,
+                "sequence_number": str(seq),
+                "max_gas_amount": str(raw.max_gas_amount),
+                "gas_unit_price": str(raw.gas_unit_price),
+                "expiration_timestamp_secs": str(raw.expiration_timestamps_secs),
+                "payload": decode_payload(raw.payload),
+            }
+
+            if self.rng.random() < self.drop_rate:
+                # Accepted, then lost: never visible again, never committed
+                return 202, dict(txn)
+
+            # A replacement for the same seq evicts the old mempool entry
+            old = self.mempool.setdefault(sender, {}).get(seq)
+            if old:
+                self.by_hash.pop(old["hash"], None)
+            self.mempool[sender][seq] = txn
+            self.by_hash[tx_hash] = txn
+            return 202, dict(txn)
+
+    def commit_block(self):
+        now = time.time()
+        with self.lock:
+            for sender, pool in self.mempool.items():
+                for seq in list(pool):
+                    if int(pool[seq]["expiration_timestamp_secs"]) <= now:
+                        self.by_hash.pop(pool.pop(seq)["hash"], None)
+
+                seq = self.sequence.get(sender, 0)
+                while seq in pool:
+                    txn = pool.pop(seq)
+                    self.version += 1
+                    ok = self.rng.random() >= self.abort_rate
+                    txn.update({
+                        "type": "user_transaction",
+                        "version": str(self.version),
+                        "success": ok,
+                        "vm_status": "Executed successfully" if ok else "Move abort: mock abort",
+                        "timestamp": str(int(now * 1_000_000)),
+                    })
+                    self.by_account.setdefault(sender, []).append(txn)
+                    seq += 1
+                self.sequence[sender] = seq
+
+    def account_transactions(self, addr, start, limit):
+        with self.lock:
+            txns = self.by_account.get(_addr(addr), [])
+            return [t for t in txns if int(t["sequence_number"]) >= start][:limit]
+
+    def run(self, stop):
+        while not stop.wait(self.block_time):
+            self.commit_block()
+
+
+# ============================================================
+#                        HTTP LAYER
+# ============================================================
+
+def make_handler(chain, latency=0.0, fail_rate=0.0):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _prelude(self):
+            if latency:
+                time.sleep(latency)
+            if fail_rate and chain.rng.random() < fail_rate:
+                self._send(503, {"message": "mock: injected failure"})
+                return False
+            return True
+
+        def do_GET(self):
+            if not self._prelude():
+                return
+            url = urlparse(self.path)
+            parts = [p for p in url.path.split("/") if p]
+            q = parse_qs(url.query)
+
+            if parts == ["v1"]:
+                return self._send(200, {
+                    "chain_id": CHAIN_ID,
+                    "ledger_version": str(chain.version),
+                    "ledger_timestamp": str(int(time.time() * 1_000_000)),
+                })
+
+            if len(parts) == 3 and parts[:2] == ["v1", "accounts"]:
+                return self._send(200, {
+                    "sequence_number": str(chain.account_seq(parts[2])),
+                    "authentication_key": _addr(parts[2]),
+                })
+
+            if len(parts) == 4 and parts[:2] == ["v1", "accounts"] and parts[3] == "transactions":
+                start = int(q.get("start", ["0"])[0])
+                limit = int(q.get("limit", ["25"])[0])
+                return self._send(200, chain.account_transactions(parts[2], start, limit))
+
+            if len(parts) == 4 and parts[1:3] == ["transactions", "by_hash"]:
+                with chain.lock:
+                    chain.lookups += 1
+                    txn = chain.by_hash.get(parts[3].lower())
+                if txn is None:
+                    return self._send(404, {"message": "Transaction not found", "error_code": "transaction_not_found"})
+                return self._send(200, txn)
+
+            self._send(404, {"message": f"mock: unsupported path {url.path}"})
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if not self._prelude():
+                return
+            if urlparse(self.path).path.rstrip("/") != "/v1/transactions":
+                return self._send(404, {"message": "mock: unsupported path"})
+            try:
+                status, res = chain.submit(body)
+            except Exception as e:
+                return self._send(400, {"message": f"Invalid BCS: {e}"})
+            self._send(status, res)
+
+    return Handler
+
+
+class MockAptosNode:
+    """In-process mock node: `with MockAptosNode() as node: node.url`"""
+
+    def __init__(self, host="127.0.0.1", port=0, block_time=0.2, latency=0.0,
+                 fail_rate=0.0, drop_rate=0.0, abort_rate=0.0, seed=None):
+        self.chain = MockChain(block_time, drop_rate, abort_rate, seed)
+        self.server = ThreadingHTTPServer((host, port), make_handler(self.chain, latency, fail_rate))
+        self.server.daemon_threads = True
+        self._stop = threading.Event()
+        self._threads = []
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        for target in (self.server.serve_forever, lambda: self.chain.run(self._stop)):
+            t = threading.Thread(target=target, daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Mock Aptos fullnode")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8090)
+    ap.add_argument("--block-time", type=float, default=0.2)
+    ap.add_argument("--latency", type=float, default=0.0, help="added seconds per request")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered 503")
+    ap.add_argument("--drop-rate", type=float, default=0.0, help="fraction of accepted txns silently lost")
+    ap.add_argument("--abort-rate", type=float, default=0.0, help="fraction of txns committed as failed")
+    args = ap.parse_args()
+
+    node = MockAptosNode(args.host, args.port, args.block_time, args.latency,
+                         args.fail_rate, args.drop_rate, args.abort_rate).start()
+    print(f"Mock Aptos node at {node.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        node.stop()
+
+
+if __name__ == "__main__":
+    main()
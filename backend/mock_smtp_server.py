@@ -0,0 +1,233 @@
+# backend/mock_smtp_server.py
+# Local debugging SMTP server for testing and benchmarking the mailer
+# without a real mail provider.
+#
+#   python mock_smtp_server.py --port 1025 --save-dir /tmp/mail
+#   SMTP_HOST=127.0.0.1 SMTP_PORT=1025 SMTP_SSL=0 python app.py
+#
+# Speaks plain SMTP (no TLS): EHLO/HELO, AUTH PLAIN/LOGIN (any
+# credentials), MAIL, RCPT, DATA, RSET, NOOP, QUIT. Messages are
+# counted and optionally written to --save-dir as .eml files.
+
+import os
+import time
+import random
+import argparse
+import threading
+import socketserver
+
+
+class MockSmtpStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.logins = 0
+        self.messages = 0
+        self.bytes = 0
+        self.rejected = 0
+        self.recipients = []
+
+    def as_dict(self):
+        with self.lock:
+            return {
+                "connections": self.connections,
+                "logins": self.logins,
+                "messages": self.messages,
+                "bytes": self.bytes,
+                "rejected": self.rejected,
+            }
+
+
+def make_handler(stats, save_dir=None, connect_delay=0.0, fail_rate=0.0,
+                 reject_rate=0.0, drop_rate=0.0, rng=None):
+    rng = rng or random.Random()
+
+    class Handler(socketserver.StreamRequestHandler):
+        def reply(self, line):
+            self.wfile.write(line.encode() + b"\r\n")
+            self.wfile.flush()
+
+        def readline(self):
+            line = self.rfile.readline(65536)
+            if not line:
+                raise ConnectionError("client went away")
+            return line.rstrip(b"\r\n").decode("utf-8", "replace")
+
+        def read_data(self):
+            if not save_dir:
+                return self.skip_data(), b""
+            size = 0
+            chunks = []
+            while True:
+                line = self.rfile.readline(1 << 20)
+                if not line:
+                    raise ConnectionError("client went away")
+                if line in (b".\r\n", b".\n"):
+                    break
+                if line.startswith(b".."):
+                    line = line[1:]
+                size += len(line)
+                chunks.append(line)
+            return size, b"".join(chunks)
+
+        def skip_data(self):
+            """Counts and discards the body in blocks (fast path when not saving)."""
+            size = 0
+            tail = b"\r\n"
+            while True:
+                block = self.rfile.read1(1 << 16)
+                if not block:
+                    raise ConnectionError("client went away")
+                data = tail + block
+                end = data.find(b"\r\n.\r\n")
+                if end >= 0:
+                    return size + end + 2 - len(tail)
+                size += len(block)
+                tail = data[-4:]
+
+        def handle(self):
+            with stats.lock:
+                stats.connections += 1
+            # Stand-in for the TCP/TLS handshake cost of a real provider
+            if connect_delay:
+                time.sleep(connect_delay)
+            self.reply("220 mock-smtp ready")
+
+            rcpts = []
+            try:
+                while True:
+                    line = self.readline()
+                    cmd = line[:4].upper()
+
+                    if cmd in ("EHLO", "HELO"):
+                        if cmd == "EHLO":
+                            self.wfile.write(b"250-mock-smtp\r\n250-8BITMIME\r\n")
+                            self.reply("250 AUTH PLAIN LOGIN")
+                        else:
+                            self.reply("250 mock-smtp")
+                    elif cmd == "AUTH":
+                        parts = line.split()
+                        if len(parts) == 2 and parts[1].upper() == "LOGIN":
+                            self.reply("334 VXNlcm5hbWU6")
+                            self.readline()
+                            self.reply("334 UGFzc3dvcmQ6")
+                            self.readline()
+                        elif len(parts) == 2:
+                            self.reply("334 ")
+                            self.readline()
+                        with stats.lock:
+                            stats.logins += 1
+                        self.reply("235 Authentication successful")
+                    elif cmd == "MAIL":
+                        rcpts = []
+                        self.reply("250 OK")
+                    elif cmd == "RCPT":
+                        if reject_rate and rng.random() < reject_rate:
+                            with stats.lock:
+                                stats.rejected += 1
+                            self.reply("550 No such user")
+                        else:
+                            rcpts.append(line.split(":", 1)[-1].strip(" <>"))
+                            self.reply("250 OK")
+                    elif cmd == "DATA":
+                        if not rcpts:
+                            self.reply("503 No valid recipients")
+                            continue
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        size, body = self.read_data()
+                        if drop_rate and rng.random() < drop_rate:
+                            return
+                        if fail_rate and rng.random() < fail_rate:
+                            self.reply("451 Temporary failure, try again")
+                            continue
+                        with stats.lock:
+                            stats.messages += 1
+                            stats.bytes += size
+                            stats.recipients.extend(rcpts)
+                            n = stats.messages
+                        if save_dir:
+                            with open(os.path.join(save_dir, f"{n:06d}.eml"), "wb") as f:
+                                f.write(body)
+                        rcpts = []
+                        self.reply("250 OK queued")
+                    elif cmd == "RSET":
+                        rcpts = []
+                        self.reply("250 OK")
+                    elif cmd == "NOOP":
+                        self.reply("250 OK")
+                    elif cmd == "QUIT":
+                        self.reply("221 Bye")
+                        return
+                    else:
+                        self.reply("502 Command not implemented")
+            except (ConnectionError, OSError):
+                return
+
+    return Handler
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class MockSmtpServer:
+    """In-process mock server: `with MockSmtpServer() as smtp: smtp.port`"""
+
+    def __init__(self, host="127.0.0.1", port=0, save_dir=None, connect_delay=0.0,
+                 fail_rate=0.0, reject_rate=0.0, drop_rate=0.0, seed=None):
+        if save_dir:
+            os.makedirs(save_dir, exist_ok=True)
+        self.stats = MockSmtpStats()
+        handler = make_handler(self.stats, save_dir, connect_delay, fail_rate,
+                               reject_rate, drop_rate, random.Random(seed))
+        self.server = _Server((host, port), handler)
+        self._thread = None
+
+    @property
+    def host(self):
+        return self.server.server_address[0]
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Mock SMTP server")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=1025)
+    ap.add_argument("--save-dir", help="write received messages here as .eml")
+    ap.add_argument("--connect-delay", type=float, default=0.0, help="seconds per new connection")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="fraction of messages answered 451")
+    ap.add_argument("--reject-rate", type=float, default=0.0, help="fraction of recipients answered 550")
+    args = ap.parse_args()
+
+    smtp = MockSmtpServer(args.host, args.port, args.save_dir, args.connect_delay,
+                          args.fail_rate, args.reject_rate).start()
+    print(f"Mock SMTP server at {smtp.host}:{smtp.port}")
+    try:
+        while True:
+            time.sleep(10)
+            print("[SMTP]", smtp.stats.as_dict())
+    except KeyboardInterrupt:
+        smtp.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,434 @@
+# backend/pipeline.py
+
+import os
+import json
+import time
+import queue
+import threading
+from datetime import datetime, timezone
+
+from storage import get_database, owner_alive, owner_id
+from anchoring import anchor_mode
+from issuance import (
+    IssuanceError, mint_step, anchor_step, anchor_result, certificate_path, store_files,
+    file_fields, file_path, explorer_url, deliver_inline,
+)
+from render_pool import RENDER_WORKERS, get_render_pool
+from render_cache import lazy_files, lazy_mode
+from metrics import STAGE_SECONDS
+from tracing import current_trace_id, log_event, trace_context
+
+
+# ============================================================
+#                         CONFIG
+# ============================================================
+
+# Each stage has its own worker count so it can be scaled on its own.
+# Mint workers mostly wait on the chain; one per in-flight transaction:
+# MINT_MAX_IN_FLIGHT per signing account (read here rather than from
+# mint_engine/admin_mint, which would load the Aptos client before the
+# first mint).
+_SIGNERS = 1 + len([k for k in os.getenv("MINT_SIGNER_KEYS", "").split(",") if k.strip()])
+PIPELINE_MINT_WORKERS = (int(os.getenv("PIPELINE_MINT_WORKERS", "0"))
+                         or int(os.getenv("MINT_MAX_IN_FLIGHT", "16")) * _SIGNERS)
+# Render workers hand off to the render process pool; one per process
+PIPELINE_RENDER_WORKERS = int(os.getenv("PIPELINE_RENDER_WORKERS", "0")) or RENDER_WORKERS
+PIPELINE_PERSIST_WORKERS = int(os.getenv("PIPELINE_PERSIST_WORKERS", "1"))
+PIPELINE_EMAIL_WORKERS = int(os.getenv("PIPELINE_EMAIL_WORKERS", "1"))
+# Only the issuer lease holder runs the stages (issuer_lease); it picks up
+# certificates submitted by the other processes at least this often
+PIPELINE_POLL_INTERVAL = float(os.getenv("PIPELINE_POLL_INTERVAL", "1"))
+
+# Stage lifecycle:
+#   queued -> minting -> minted -> rendering -> rendered -> persisted -> done | failed
+# With CERT_ANCHOR_MODE=merkle, "anchoring" (waiting for the batch root
+# to be anchored) takes the place of "minting".
+# "owner" is the process holding a minting/anchoring/rendering row (storage.owner_id).
+# The certificate entry carries the public status: pending -> minted ->
+# rendered -> delivered (set by the mailer) | failed.
+PIPELINE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS issue_pipeline (
+    cert_id     TEXT PRIMARY KEY,
+    stage       TEXT NOT NULL,
+    tx_hash     TEXT,
+    token_name  TEXT,
+    files       TEXT,
+    error       TEXT,
+    owner       TEXT,
+    created_by  TEXT,
+    trace_id    TEXT,
+    updated_at  TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_pipeline_stage ON issue_pipeline(stage);
+"""
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class _Stage:
+    """A queue of certificate ids drained by its own worker threads."""
+
+    def __init__(self, name, handler, workers, on_error, trace_of):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.on_error = on_error
+        self.trace_of = trace_of
+        self.queue = queue.Queue()
+        self.busy = 0
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"pipeline-{self.name}-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self, timeout=10):
+        for _ in self._threads:
+            self.queue.put(None)
+        for t in self._threads:
+            t.join(timeout=timeout)
+        self._threads = []
+
+    def put(self, cert_id):
+        self.queue.put(cert_id)
+
+    def _run(self):
+        while True:
+            cert_id = self.queue.get()
+            if cert_id is None:
+                return
+            with self._lock:
+                self.busy += 1
+            try:
+                # Runs under the trace id of the request that submitted it
+                with trace_context(self.trace_of(cert_id)):
+                    self._handle(cert_id)
+            except Exception as e:
+                print(f"[PIPELINE {self.name.upper()} ERROR]", cert_id, e)
+            finally:
+                with self._lock:
+                    self.busy -= 1
+
+    def _handle(self, cert_id):
+        t0 = time.perf_counter()
+        try:
+            self.handler(cert_id)
+        except IssuanceError as e:
+            self.on_error(cert_id, str(e))
+        except Exception as e:
+            print(f"[PIPELINE {self.name.upper()} ERROR]", cert_id, e)
+            self.on_error(cert_id, f"Unexpected error: {e}")
+        seconds = time.perf_counter() - t0
+        STAGE_SECONDS.observe(seconds, stage=self.name)
+        log_event("pipeline_stage", stage=self.name, cert_id=cert_id, ms=round(seconds * 1000, 1))
+
+
+# ============================================================
+#                     ISSUANCE PIPELINE
+# ============================================================
+
+class IssuancePipeline:
+    """
+    Single-certificate issuance split into mint -> render -> persist ->
+    email stages with a queue between each.
+
+    submit() stores a pending entry and returns at once; the stages
+    move it along and update its status. Any process can submit; the
+    one that called start() picks new rows up from the database.
+    Progress is persisted per stage, so after a restart start() resumes
+    every unfinished certificate. A certificate interrupted mid-mint is
+    failed rather than minted a second time.
+    """
+
+    def __init__(self, store, mailer=None, render=None,
+                 mint_workers=PIPELINE_MINT_WORKERS, render_workers=PIPELINE_RENDER_WORKERS,
+                 persist_workers=PIPELINE_PERSIST_WORKERS, email_workers=PIPELINE_EMAIL_WORKERS):
+        self.store = store
+        self.mailer = mailer
+        # Defaults to the render process pool, created on first use
+        self.render_files = render
+
+        self.db = get_database()
+        self.db.ensure_schema(PIPELINE_SCHEMA)
+        self.db.ensure_column("issue_pipeline", "trace_id", "TEXT")
+
+        self.stages = {
+            "mint": _Stage("mint", self._mint, mint_workers, self._fail, self._trace_id),
+            "render": _Stage("render", self._render, render_workers, self._fail, self._trace_id),
+            "persist": _Stage("persist", self._persist, persist_workers, self._fail, self._trace_id),
+            "email": _Stage("email", self._email, email_workers, self._fail, self._trace_id),
+        }
+        self._started = False
+        self._start_lock = threading.Lock()
+
+        # Last issue_pipeline rowid handed to the mint stage
+        self._seen = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._poller = None
+
+    # ---- lifecycle ----
+    def start(self):
+        with self._start_lock:
+            if self._started:
+                return self
+            for stage in self.stages.values():
+                stage.start()
+            self._started = True
+            # resume() queues every row up to here, the poller the rest
+            self._seen = self.db.execute(
+                "SELECT COALESCE(MAX(rowid), 0) AS n FROM issue_pipeline"
+            ).fetchone()["n"]
+        self.resume()
+        self._stop.clear()
+        self._poller = threading.Thread(target=self._poll, name="pipeline-poll", daemon=True)
+        self._poller.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._poller:
+            self._poller.join(timeout=10)
+            self._poller = None
+        for stage in self.stages.values():
+            stage.stop()
+        self._started = False
+
+    def resume(self):
+        """Re-queue unfinished certificates; returns how many were re-queued."""
+        stale = [
+            r for r in self.db.execute(
+                "SELECT cert_id, stage, owner FROM issue_pipeline "
+                "WHERE stage IN ('minting', 'anchoring', 'rendering')"
+            ).fetchall()
+            if not owner_alive(r["owner"])
+        ]
+        for r in stale:
+            if r["stage"] == "anchoring":
+                # Adding a leaf is idempotent: this process waits for the
+                # batch, and adds the leaf if it was interrupted before that
+                if self._claim(r["cert_id"], "anchoring", "anchoring"):
+                    self._add_leaf(r["cert_id"])
+            elif r["stage"] == "minting":
+                self._fail(r["cert_id"],
+                           "Interrupted during minting; not retried to avoid a double mint")
+            else:
+                self._set_stage(r["cert_id"], "minted", owner=None, expect="rendering")
+
+        next_stage = {"queued": "mint", "minted": "render", "rendered": "persist", "persisted": "email"}
+        rows = self.db.execute(
+            "SELECT cert_id, stage FROM issue_pipeline "
+            "WHERE stage IN ('queued', 'minted', 'rendered', 'persisted') ORDER BY updated_at"
+        ).fetchall()
+        for r in rows:
+            self.stages[next_stage[r["stage"]]].put(r["cert_id"])
+        return len(rows)
+
+    # ---- submission / status ----
+    def submit(self, student_name, student_email, course_name, created_by=None):
+        """Stores a pending certificate for the mint stage to pick up; returns the entry."""
+        with self.db.transaction():
+            entry = self.store.add_certificate({
+                "status": "pending",
+                "file": None,
+                "student": student_name,
+                "email": student_email,
+                "course": course_name,
+                "tx_hash": None,
+                "issued_at": _now(),
+            })
+            self.db.execute(
+                "INSERT INTO issue_pipeline (cert_id, stage, created_by, trace_id, updated_at) "
+                "VALUES (?, 'queued', ?, ?, ?)",
+                (entry["id"], created_by, current_trace_id(), _now()),
+            )
+        self._wake.set()
+        return entry
+
+    def stats(self):
+        counts = {
+            r["stage"]: r["n"]
+            for r in self.db.execute(
+                "SELECT stage, COUNT(*) AS n FROM issue_pipeline GROUP BY stage"
+            )
+        }
+        return {
+            "stages": {
+                name: {"queued": stage.queue.qsize(), "busy": stage.busy, "workers": stage.workers}
+                for name, stage in self.stages.items()
+            },
+            "counts": counts,
+        }
+
+    def _poll(self):
+        """Hands queued rows written since the last pass to the mint stage."""
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                rows = self.db.execute(
+                    "SELECT rowid, cert_id FROM issue_pipeline "
+                    "WHERE rowid > ? AND stage = 'queued' ORDER BY rowid",
+                    (self._seen,),
+                ).fetchall()
+                for r in rows:
+                    self.stages["mint"].put(r["cert_id"])
+                    self._seen = r["rowid"]
+            except Exception as e:
+                print("[PIPELINE POLL ERROR]", e)
+            self._wake.wait(PIPELINE_POLL_INTERVAL)
+
+    # ---- stage handlers ----
+    def _mint(self, cert_id):
+        if anchor_mode():
+            return self._anchor(cert_id)
+        if not self._claim(cert_id, "queued", "minting"):
+            return
+        entry = self.store.get_certificate(cert_id)
+        tx, token_name = mint_step(entry["student"], entry["course"], entry["email"])
+
+        self._set_stage(cert_id, "minted", owner=None, tx_hash=tx, token_name=token_name)
+        self.store.update_certificate(cert_id, {
+            "status": "minted",
+            "tx_hash": tx,
+            "token_name": token_name,
+            "explorer_url": explorer_url(tx),
+        })
+        self.stages["render"].put(cert_id)
+
+    def _anchor(self, cert_id):
+        # Does not hold a mint worker while the batch fills: the anchorer
+        # resolves the Future and _anchored() moves the certificate on
+        if not self._claim(cert_id, "queued", "anchoring"):
+            return
+        self._add_leaf(cert_id)
+
+    def _add_leaf(self, cert_id):
+        entry = self.store.get_certificate(cert_id)
+        future = anchor_step(cert_id, entry["student"], entry["course"], entry["email"])
+        trace_id = self._trace_id(cert_id)
+
+        def done(f):
+            with trace_context(trace_id):
+                try:
+                    self._anchored(cert_id, f)
+                except IssuanceError as e:
+                    self._fail(cert_id, str(e))
+                except Exception as e:
+                    print("[PIPELINE ANCHOR ERROR]", cert_id, e)
+                    self._fail(cert_id, f"Unexpected error: {e}")
+
+        future.add_done_callback(done)
+
+    def _anchored(self, cert_id, future):
+        tx, token_name, anchor = anchor_result(future)
+        with self.db.transaction():
+            if not self._claim(cert_id, "anchoring", "minted"):
+                return
+            self._set_stage(cert_id, "minted", owner=None, tx_hash=tx, token_name=token_name)
+            self.store.update_certificate(cert_id, {
+                "status": "minted",
+                "tx_hash": tx,
+                "token_name": token_name,
+                "explorer_url": explorer_url(tx),
+                "anchor": anchor,
+            })
+        self.stages["render"].put(cert_id)
+
+    def _render(self, cert_id):
+        if not self._claim(cert_id, "minted", "rendering"):
+            return
+        if lazy_mode():
+            # Nothing to render now: files are produced on first download
+            files = lazy_files(cert_id)
+        else:
+            entry = self.store.get_certificate(cert_id)
+            render = self.render_files or get_render_pool().render_files
+            files = render(
+                entry["student"], entry["course"], entry["tx_hash"], entry["token_name"],
+                certificate_path(),
+            )
+            if not files:
+                raise IssuanceError("Failed to generate certificate")
+            files = store_files(files)
+
+        self._set_stage(cert_id, "rendered", owner=None, files=json.dumps(files))
+        self.stages["persist"].put(cert_id)
+
+    # Persist and email claim their row inside the transaction that does
+    # the work, so when several server processes resume the same
+    # certificate only one of them goes ahead
+    def _persist(self, cert_id):
+        with self.db.transaction():
+            if not self._claim(cert_id, "rendered", "persisted"):
+                return
+            row = self._row(cert_id)
+            self.store.update_certificate(cert_id, {
+                **file_fields(json.loads(row["files"])),
+                "status": "rendered",
+            })
+        self.stages["email"].put(cert_id)
+
+    def _email(self, cert_id):
+        if self.mailer is None:
+            if not self._claim(cert_id, "persisted", "done"):
+                return
+            row = self._row(cert_id)
+            entry = self.store.get_certificate(cert_id)
+            deliver_inline(self.store, entry, file_path(json.loads(row["files"])["file"]))
+            return
+
+        # Outbox row and stage change commit together, so a restart
+        # never queues the same email twice
+        with self.db.transaction():
+            if not self._claim(cert_id, "persisted", "done"):
+                return
+            row = self._row(cert_id)
+            entry = self.store.get_certificate(cert_id)
+            self.mailer.enqueue(entry, file_path(json.loads(row["files"])["file"]))
+
+    # ---- state ----
+    def _row(self, cert_id):
+        return self.db.execute(
+            "SELECT * FROM issue_pipeline WHERE cert_id = ?", (cert_id,)
+        ).fetchone()
+
+    def _trace_id(self, cert_id):
+        row = self.db.execute(
+            "SELECT trace_id FROM issue_pipeline WHERE cert_id = ?", (cert_id,)
+        ).fetchone()
+        return row["trace_id"] if row else None
+
+    def _claim(self, cert_id, from_stage, to_stage):
+        """Atomically move a certificate between stages; False if someone else got it."""
+        with self.db.transaction() as c:
+            cur = c.execute(
+                "UPDATE issue_pipeline SET stage = ?, owner = ?, updated_at = ? "
+                "WHERE cert_id = ? AND stage = ?",
+                (to_stage, owner_id(), _now(), cert_id, from_stage),
+            )
+            return cur.rowcount == 1
+
+    def _set_stage(self, cert_id, stage, expect=None, **fields):
+        fields["stage"] = stage
+        fields["updated_at"] = _now()
+        cols = ", ".join(f"{k} = ?" for k in fields)
+        sql = f"UPDATE issue_pipeline SET {cols} WHERE cert_id = ?"
+        params = [*fields.values(), cert_id]
+        if expect:
+            sql += " AND stage = ?"
+            params.append(expect)
+        with self.db.transaction() as c:
+            c.execute(sql, params)
+
+    def _fail(self, cert_id, error):
+        self._set_stage(cert_id, "failed", owner=None, error=error)
+        try:
+            self.store.update_certificate(cert_id, {"status": "failed", "error": error})
+        except Exception as e:
+            print("[PIPELINE STATUS ERROR]", cert_id, e)
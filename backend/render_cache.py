@@ -0,0 +1,257 @@
+# backend/render_cache.py
+# Lazy rendering. With CERT_RENDER_MODE=lazy, issuance writes no files:
+# the entry already holds the render inputs (student, course, tx_hash,
+# token_name) and its file fields name virtual files, render/<id>.pdf.
+# The first request for one renders it into a size-bounded on-disk
+# cache; least recently used files are evicted, so storage stays flat
+# however many certificates are issued.
+
+import os
+import re
+import json
+import time
+import uuid
+import hashlib
+import threading
+from concurrent.futures import Future
+
+from file_store import CERT_FILES_DIR
+
+# renderer and render_pool (PIL) are imported when a lazy name is built,
+# parsed or rendered, so serving content keys never loads them
+
+
+# ============================================================
+#                         CONFIG
+# ============================================================
+
+# eager: render every format at issuance (default); lazy: on first request
+CERT_RENDER_MODE = os.getenv("CERT_RENDER_MODE", "eager").strip().lower()
+RENDER_CACHE_DIR = os.getenv("RENDER_CACHE_DIR") or os.path.join(CERT_FILES_DIR, ".render-cache")
+RENDER_CACHE_MAX_MB = float(os.getenv("RENDER_CACHE_MAX_MB", "512"))
+# Eviction trims to this share of the limit, so it runs now and then
+# rather than on every insert
+RENDER_CACHE_LOW_WATER = 0.9
+# Partially written renders older than this are leftovers of a crash
+_TMP_MAX_AGE = 600
+
+LAZY_PREFIX = "render/"
+_LAZY_RE = re.compile(r"^render/([A-Za-z0-9_-]{1,64})(\.thumb)?(\.[a-z0-9]{1,8})$")
+
+
+class RenderError(Exception):
+    """A lazy file could not be rendered."""
+
+
+def lazy_mode():
+    return CERT_RENDER_MODE == "lazy"
+
+
+def lazy_files(cert_id):
+    """Virtual file names for a lazily rendered certificate (store_files() shape)."""
+    from renderer import OUTPUT_FORMATS, THUMB_WIDTH, encoder_options, parse_formats, thumb_format
+    exts = encoder_options()
+    formats = {fmt: f"{LAZY_PREFIX}{cert_id}{exts[fmt][0]}" for fmt in parse_formats(OUTPUT_FORMATS)}
+    thumb = None
+    if THUMB_WIDTH > 0:
+        thumb = f"{LAZY_PREFIX}{cert_id}.thumb{exts[thumb_format()][0]}"
+    return {"file": next(iter(formats.values())), "formats": formats, "thumbnail": thumb}
+
+
+def parse_lazy_name(name):
+    """(cert_id, variant) for a virtual file name, where variant is a format or "thumb"; else None."""
+    m = _LAZY_RE.match(name or "")
+    if not m:
+        return None
+    from renderer import OUTPUT_FORMATS, encoder_options, parse_formats, thumb_format
+    cert_id, thumb, ext = m.groups()
+    if thumb:
+        return (cert_id, "thumb") if encoder_options()[thumb_format()][0] == ext else None
+    for fmt in parse_formats(OUTPUT_FORMATS):
+        if encoder_options()[fmt][0] == ext:
+            return cert_id, fmt
+    return None
+
+
+# ============================================================
+#                        RENDER CACHE
+# ============================================================
+
+class RenderCache:
+    """
+    Files live at root/<k[:2]>/<k><ext>, where k hashes the render
+    inputs, the variant and the template version. A hit refreshes the
+    file's mtime, and eviction removes the oldest mtimes first, so the
+    directory is an LRU shared by every process using it.
+
+    Concurrent requests for the same missing file in one process share
+    a single render.
+    """
+
+    def __init__(self, root=RENDER_CACHE_DIR, max_bytes=RENDER_CACHE_MAX_MB * 1024 * 1024,
+                 render=None):
+        self.root = root
+        self.max_bytes = max_bytes
+        # render(student, course, tx_hash, token_name, variant, base_path) -> path | None;
+        # defaults to the render process pool
+        self.render = render
+        os.makedirs(root, exist_ok=True)
+
+        from renderer import TEMPLATE_PATH
+        try:
+            self._template = str(os.stat(TEMPLATE_PATH).st_mtime_ns)
+        except OSError:
+            self._template = ""
+        self._bytes = None     # estimate; a full scan replaces it on eviction
+        self._lock = threading.Lock()
+        self._inflight = {}    # key -> Future of the path
+
+        self.stats = {"hits": 0, "misses": 0, "evicted": 0}
+
+    def key(self, entry, variant):
+        raw = json.dumps([
+            entry.get("student"), entry.get("course"), entry.get("tx_hash"),
+            entry.get("token_name"), variant, self._template,
+        ])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key, variant):
+        from renderer import encoder_options, thumb_format
+        fmt = thumb_format() if variant == "thumb" else variant
+        return os.path.join(self.root, key[:2], key + encoder_options()[fmt][0])
+
+    def get(self, entry, variant):
+        """Local path of the rendered file, rendering it if needed; returns (path, key)."""
+        key = self.key(entry, variant)
+        path = self._path(key, variant)
+        try:
+            # Hit: mark it recently used
+            os.utime(path)
+            self.stats["hits"] += 1
+            return path, key
+        except FileNotFoundError:
+            pass
+
+        with self._lock:
+            pending = self._inflight.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._inflight[key] = Future()
+        if not owner:
+            return pending.result(), key
+
+        self.stats["misses"] += 1
+        try:
+            self._render(entry, variant, path)
+            pending.set_result(path)
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        return path, key
+
+    def resolve(self, name, store):
+        """Local path for a virtual file name; RenderError if it cannot be rendered."""
+        parsed = parse_lazy_name(name)
+        entry = store.get_certificate(parsed[0]) if parsed else None
+        if not entry or not entry.get("tx_hash") or not entry.get("token_name"):
+            raise RenderError(f"No renderable certificate for {name}")
+        return self.get(entry, parsed[1])[0]
+
+    def _render(self, entry, variant, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Rendered beside the final name, then renamed, so readers in
+        # other processes never see a partial file
+        base = os.path.splitext(path)[0] + f".{uuid.uuid4().hex}.tmp"
+        render = self.render
+        if render is None:
+            from render_pool import get_render_pool
+            render = get_render_pool().render_variant
+        out = render(entry["student"], entry["course"], entry["tx_hash"], entry["token_name"],
+                     variant, base)
+        if not out:
+            raise RenderError(f"Rendering {variant} failed for {entry.get('id')}")
+        os.replace(out, path)
+        self._added(os.path.getsize(path))
+
+    # ---- eviction ----
+    def _added(self, size):
+        with self._lock:
+            if self._bytes is not None:
+                self._bytes += size
+            over = self._bytes is None or self._bytes > self.max_bytes
+        if over:
+            self.evict()
+
+    def _scan(self):
+        files = []
+        for shard in os.listdir(self.root):
+            d = os.path.join(self.root, shard)
+            if not os.path.isdir(d):
+                continue
+            with os.scandir(d) as it:
+                for e in it:
+                    try:
+                        if e.is_file():
+                            st = e.stat()
+                            files.append((st.st_mtime, st.st_size, e.path))
+                    except FileNotFoundError:
+                        # Evicted by another process mid-scan
+                        pass
+        return files
+
+    def evict(self):
+        """Deletes least recently used files until the cache is under its low-water mark."""
+        files = self._scan()
+        now = time.time()
+        total = sum(size for _, size, _ in files)
+        target = self.max_bytes * RENDER_CACHE_LOW_WATER if total > self.max_bytes else None
+
+        evicted = 0
+        for mtime, size, path in sorted(files):
+            is_tmp = ".tmp." in os.path.basename(path)
+            if is_tmp and now - mtime < _TMP_MAX_AGE:
+                continue
+            if not is_tmp and (target is None or total <= target):
+                continue
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted += 1
+
+        with self._lock:
+            self._bytes = total
+            self.stats["evicted"] += evicted
+        return evicted
+
+    def size(self):
+        return sum(size for _, size, _ in self._scan())
+
+
+def resolve_attachment(path, store):
+    """Mailer hook: renders virtual attachment names; real paths pass through."""
+    if path and path.startswith(LAZY_PREFIX):
+        return get_render_cache().resolve(path, store)
+    return path
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def cache_stats():
+    """Stats of the process-wide cache, without creating it."""
+    return dict(_cache.stats) if _cache is not None else {}
+
+
+def get_render_cache():
+    """Process-wide render cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = RenderCache()
+        return _cache
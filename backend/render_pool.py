@@ -0,0 +1,131 @@
+# backend/render_pool.py
+
+import os
+import threading
+import multiprocessing
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+# renderer (PIL) is imported on first use, like the pool itself, so
+# importing this module is cheap for processes that never render
+
+
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "0")) or os.cpu_count() or 1
+
+RenderJob = namedtuple("RenderJob", "student_name course_name tx_hash token_name out_path")
+VariantJob = namedtuple("VariantJob", "student_name course_name tx_hash token_name variant base_path")
+
+
+# ============================================================
+#                    WORKER PROCESS SIDE
+# ============================================================
+
+_worker_renderer = None
+
+
+def _init_worker(template_path, font_path):
+    """Runs once per worker: decode the template and load the design fonts."""
+    global _worker_renderer
+    from renderer import CertificateRenderer
+    _worker_renderer = CertificateRenderer(template_path, font_path)
+    for size in (
+        CertificateRenderer.NAME_SIZE,
+        CertificateRenderer.COURSE_SIZE,
+        CertificateRenderer.TX_SIZE,
+    ):
+        _worker_renderer.font(size)
+
+
+def _render_job(job):
+    return _worker_renderer.render_files(
+        job.student_name, job.course_name, job.tx_hash, job.token_name, job.out_path
+    )
+
+
+def _render_variant_job(job):
+    return _worker_renderer.render_variant(
+        job.student_name, job.course_name, job.tx_hash, job.token_name, job.variant, job.base_path
+    )
+
+
+# ============================================================
+#                        POOL
+# ============================================================
+
+class RenderPool:
+    """
+    Process pool for certificate rendering and encoding, which are
+    CPU-bound and would otherwise hold the GIL in the web worker.
+
+    Workers are spawned (not forked) so they never inherit the web
+    server's threads or open connections.
+    """
+
+    def __init__(self, workers=RENDER_WORKERS, template_path=None, font_path=None):
+        from renderer import TEMPLATE_PATH, FONT_PATH
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(template_path or TEMPLATE_PATH, font_path or FONT_PATH),
+        )
+
+    def submit(self, job):
+        """
+        Future resolving to render_files()'s dict (or None on failure),
+        timings included; pass it through record_timings().
+        """
+        return self.executor.submit(_render_job, job)
+
+    def render_files(self, student_name, course_name, tx_hash, token_name, out_path):
+        """Blocking, same signature as generate_certificate_files."""
+        from renderer import record_timings
+        return record_timings(self.submit(
+            RenderJob(student_name, course_name, tx_hash, token_name, out_path)
+        ).result())
+
+    def render(self, student_name, course_name, tx_hash, token_name, out_path):
+        """Blocking, same signature as generate_certificate_png."""
+        files = self.render_files(student_name, course_name, tx_hash, token_name, out_path)
+        return files["file"] if files else None
+
+    def render_variant(self, student_name, course_name, tx_hash, token_name, variant, base_path):
+        """Blocking, same signature as generate_certificate_variant."""
+        from renderer import record_timings
+        files = record_timings(self.executor.submit(_render_variant_job, VariantJob(
+            student_name, course_name, tx_hash, token_name, variant, base_path
+        )).result())
+        return files["file"] if files else None
+
+    def render_many(self, jobs):
+        """Renders jobs in parallel; returns render_files() dicts in job order."""
+        from renderer import record_timings
+        chunk = max(1, len(jobs) // (self.workers * 4))
+        return [record_timings(files)
+                for files in self.executor.map(_render_job, jobs, chunksize=chunk)]
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_render_pool():
+    """Process-wide pool, started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = RenderPool()
+        return _pool
+
+
+def shutdown_render_pool(wait=True):
+    """Stops the process-wide pool if it was started (its workers outlive os._exit)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait)
@@ -0,0 +1,346 @@
+# backend/renderer.py
+
+import os
+import time
+import threading
+from PIL import Image, ImageDraw, ImageFont, features
+
+from text_layout import TextLayout
+from metrics import RENDER_SECONDS, ENCODE_SECONDS
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))        # /backend
+TEMPLATE_PATH = os.path.join(BASE_DIR, "template.png")       # backend/template.png
+
+# Frontend/Fonts folder (InterLocal)
+FONT_PATH = os.path.abspath(
+    os.path.join(BASE_DIR, "..", "frontend", "fonts", "inter.ttf")
+)
+
+
+# ============================================================
+#                      OUTPUT FORMATS
+# ============================================================
+
+# Comma separated, first one is the primary file (recorded and emailed).
+# "both" is shorthand for the old pdf,png pair.
+OUTPUT_FORMATS = os.getenv("CERT_OUTPUT_FORMATS", "pdf")
+THUMB_WIDTH = int(os.getenv("CERT_THUMB_WIDTH", "480"))            # 0 disables
+THUMB_FORMAT = os.getenv("CERT_THUMB_FORMAT", "webp")
+JPEG_QUALITY = int(os.getenv("CERT_JPEG_QUALITY", "85"))
+WEBP_QUALITY = int(os.getenv("CERT_WEBP_QUALITY", "80"))
+PNG_COMPRESS_LEVEL = int(os.getenv("CERT_PNG_COMPRESS_LEVEL", "6"))
+
+_FORMAT_ALIASES = {"both": ["pdf", "png"], "jpg": ["jpeg"]}
+
+
+def encoder_options():
+    """format -> (extension, Pillow format, save kwargs)."""
+    return {
+        "pdf": (".pdf", "PDF", {"resolution": 100.0}),
+        "png": (".png", "PNG", {"compress_level": PNG_COMPRESS_LEVEL}),
+        "jpeg": (".jpg", "JPEG", {"quality": JPEG_QUALITY, "optimize": True}),
+        "webp": (".webp", "WEBP", {"quality": WEBP_QUALITY, "method": 4}),
+    }
+
+
+def parse_formats(value):
+    """'pdf,webp' / 'both' -> ['pdf', 'webp']; unknown names raise ValueError."""
+    if isinstance(value, str):
+        value = value.split(",")
+    known = encoder_options()
+    out = []
+    for name in value:
+        name = name.strip().lower()
+        if not name:
+            continue
+        for fmt in _FORMAT_ALIASES.get(name, [name]):
+            if fmt not in known:
+                raise ValueError(f"Unknown certificate format: {fmt}")
+            if fmt == "webp" and not features.check("webp"):
+                raise ValueError("Pillow was built without WebP support")
+            if fmt not in out:
+                out.append(fmt)
+    if not out:
+        raise ValueError("No certificate output format configured")
+    return out
+
+
+def thumb_format():
+    fmt = THUMB_FORMAT.strip().lower()
+    fmt = _FORMAT_ALIASES.get(fmt, [fmt])[0]
+    if fmt == "webp" and not features.check("webp"):
+        return "jpeg"
+    return fmt if fmt in ("webp", "jpeg", "png") else "jpeg"
+
+
+# ============================================================
+#                      CERTIFICATE RENDERER
+# ============================================================
+
+class CertificateRenderer:
+    """
+    Decodes the template once and keeps it as an immutable base image;
+    each certificate draws on a copy. Fonts are cached per size.
+
+    FreeType faces are not shared between threads, so the font cache
+    is per thread (each thread loads a given size once).
+    """
+
+    # Layout
+    NAME_XY = (726, 526)
+    COURSE_XY = (840, 674)
+    TX_XY = (699, 765)
+    NAME_SIZE = 60
+    COURSE_SIZE = 45
+    TX_SIZE = 22
+    MIN_SIZE = 12
+    # Right edge for name/course, clear of the template's border artwork
+    TEXT_RIGHT = 1850
+
+    def __init__(self, template_path=TEMPLATE_PATH, font_path=FONT_PATH,
+                 formats=None, thumb_width=None):
+        self.template_path = template_path
+        self.font_path = font_path
+        self.formats = parse_formats(formats or OUTPUT_FORMATS)
+        self.thumb_width = THUMB_WIDTH if thumb_width is None else thumb_width
+        self.thumb_format = thumb_format()
+        self._local = threading.local()
+        self.layout = TextLayout(self.font)
+
+        if not os.path.exists(template_path):
+            raise FileNotFoundError(f"Template missing: {template_path}")
+
+        t0 = time.perf_counter()
+        with Image.open(template_path) as im:
+            self._base = im.convert("RGB")
+        self._base.load()
+        # Reported with the first render, so pool workers' loads reach the parent
+        self._load_seconds = time.perf_counter() - t0
+
+    @property
+    def size(self):
+        return self._base.size
+
+    # ---- fonts ----
+    def font(self, size):
+        cache = getattr(self._local, "fonts", None)
+        if cache is None:
+            cache = self._local.fonts = {}
+        f = cache.get(size)
+        if f is None:
+            try:
+                if os.path.exists(self.font_path):
+                    f = ImageFont.truetype(self.font_path, size)
+                else:
+                    f = ImageFont.load_default()
+            except Exception:
+                f = ImageFont.load_default()
+            cache[size] = f
+        return f
+
+    # ---- rendering ----
+    def render(self, student_name, course_name, tx_hash, token_name=None, timings=None):
+        """
+        Returns a new RGB image; the cached base is never modified.
+        Phase durations (text_fit, draw) are added to `timings` if given.
+        """
+        t_start = time.perf_counter()
+        img = self._base.copy()
+        draw = ImageDraw.Draw(img)
+
+        right = min(self.TEXT_RIGHT, img.size[0])
+
+        # Name and course shrink to fit, like the tx line
+        t0 = time.perf_counter()
+        font_name = self.layout.fit_font(
+            draw, student_name, self.NAME_SIZE, right - self.NAME_XY[0], self.MIN_SIZE
+        )
+        font_course = self.layout.fit_font(
+            draw, course_name, self.COURSE_SIZE, right - self.COURSE_XY[0], self.MIN_SIZE
+        )
+        fit = time.perf_counter() - t0
+
+        # Draw main text fields
+        draw.text(self.NAME_XY, student_name, fill="white", font=font_name)
+        draw.text(self.COURSE_XY, course_name, fill="white", font=font_course)
+
+        # TX hash text building
+        tx_text = f"Blockchain Verified Tx: {tx_hash}"
+
+        max_tx_width = int(img.size[0] * 0.70)
+        t0 = time.perf_counter()
+        font_tx = self.layout.fit_font(draw, tx_text, self.TX_SIZE, max_tx_width, self.MIN_SIZE)
+
+        lines = self.layout.wrap(draw, tx_text, font_tx, max_tx_width)
+        fit += time.perf_counter() - t0
+        line_h = draw.textbbox((0, 0), "Ay", font=font_tx)[3]
+
+        start_y = self.TX_XY[1] - (line_h * len(lines) // 2)
+
+        for i, line in enumerate(lines):
+            draw.text(
+                (self.TX_XY[0], start_y + i * line_h),
+                line,
+                fill="gray",
+                font=font_tx
+            )
+
+        if timings is not None:
+            timings["text_fit"] = fit
+            timings["draw"] = time.perf_counter() - t_start - fit
+        return img
+
+    def save(self, img, fmt, base_path):
+        """Encodes img as fmt at base_path + extension; returns the path."""
+        ext, pil_format, options = encoder_options()[fmt]
+        path = base_path + ext
+        img.save(path, pil_format, **options)
+        return path
+
+    def thumbnail(self, img):
+        w, h = img.size
+        width = min(self.thumb_width, w)
+        return img.resize((width, max(1, round(h * width / w))), Image.LANCZOS)
+
+    def render_files(self, student_name, course_name, tx_hash, token_name, out_path):
+        """
+        Renders once and writes every configured format next to out_path
+        (its extension is ignored), plus the thumbnail.
+
+        Returns {"file": primary path, "formats": {fmt: path}, "thumbnail": path|None,
+        "timings": {...}}, or None if the primary format could not be
+        written. Secondary formats and the thumbnail are best effort.
+        Pass the result through record_timings() in the calling process.
+        """
+        timings = {"render": {}, "encode": {}}
+        if self._load_seconds is not None:
+            timings["render"]["template_load"] = self._load_seconds
+            self._load_seconds = None
+        try:
+            img = self.render(student_name, course_name, tx_hash, token_name, timings["render"])
+
+            # Ensure directories exist
+            os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+            base = os.path.splitext(out_path)[0]
+
+            written = {}
+            for i, fmt in enumerate(self.formats):
+                try:
+                    t0 = time.perf_counter()
+                    written[fmt] = self.save(img, fmt, base)
+                    timings["encode"][fmt] = time.perf_counter() - t0
+                except Exception as e:
+                    print(f"[{fmt.upper()} ERROR]", e)
+                    if i == 0:
+                        return None
+
+            thumb = None
+            if self.thumb_width > 0:
+                try:
+                    t0 = time.perf_counter()
+                    thumb = self.save(self.thumbnail(img), self.thumb_format, base + "_thumb")
+                    timings["render"]["thumbnail"] = time.perf_counter() - t0
+                except Exception as e:
+                    print("[THUMBNAIL ERROR]", e)
+
+            return {"file": written[self.formats[0]], "formats": written, "thumbnail": thumb,
+                    "timings": timings}
+
+        except Exception as e:
+            print("[CERT GENERATION ERROR]", e)
+            return None
+
+    def render_variant(self, student_name, course_name, tx_hash, token_name, variant, base_path):
+        """
+        Renders a single file: one output format, or "thumb" for the
+        thumbnail. Writes base_path + extension. Returns {"file": path,
+        "timings": {...}} (see render_files), or None on failure.
+        """
+        timings = {"render": {}, "encode": {}}
+        if self._load_seconds is not None:
+            timings["render"]["template_load"] = self._load_seconds
+            self._load_seconds = None
+        try:
+            img = self.render(student_name, course_name, tx_hash, token_name, timings["render"])
+            os.makedirs(os.path.dirname(base_path) or ".", exist_ok=True)
+            t0 = time.perf_counter()
+            if variant == "thumb":
+                path = self.save(self.thumbnail(img), self.thumb_format, base_path)
+                timings["render"]["thumbnail"] = time.perf_counter() - t0
+            else:
+                path = self.save(img, variant, base_path)
+                timings["encode"][variant] = time.perf_counter() - t0
+            return {"file": path, "timings": timings}
+        except Exception as e:
+            print(f"[{variant.upper()} RENDER ERROR]", e)
+            return None
+
+    def render_to_file(self, student_name, course_name, tx_hash, token_name, out_path):
+        """Writes the configured formats; returns the primary file path or None."""
+        files = self.render_files(student_name, course_name, tx_hash, token_name, out_path)
+        return files["file"] if files else None
+
+
+def record_timings(files):
+    """
+    Moves the "timings" of a render_files() result into the render and
+    encode histograms. Returns files without them.
+    """
+    if not files:
+        return files
+    timings = files.pop("timings", None) or {}
+    for phase, seconds in timings.get("render", {}).items():
+        RENDER_SECONDS.observe(seconds, phase=phase)
+    for fmt, seconds in timings.get("encode", {}).items():
+        ENCODE_SECONDS.observe(seconds, format=fmt)
+    return files
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_renderer():
+    """Process-wide renderer, created on first use."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = CertificateRenderer()
+        return _default
+
+
+def generate_certificate_png(student_name, course_name, tx_hash, token_name, out_path):
+    try:
+        renderer = get_renderer()
+    except FileNotFoundError as e:
+        print("[ERROR]", e)
+        return None
+    files = renderer.render_files(student_name, course_name, tx_hash, token_name, out_path)
+    return record_timings(files)["file"] if files else None
+
+
+def generate_certificate_files(student_name, course_name, tx_hash, token_name, out_path):
+    """Like generate_certificate_png but returns render_files()'s dict."""
+    try:
+        renderer = get_renderer()
+    except FileNotFoundError as e:
+        print("[ERROR]", e)
+        return None
+    return record_timings(
+        renderer.render_files(student_name, course_name, tx_hash, token_name, out_path)
+    )
+
+
+def generate_certificate_variant(student_name, course_name, tx_hash, token_name, variant,
+                                 base_path):
+    """In-process render_variant(); returns the file path or None."""
+    try:
+        renderer = get_renderer()
+    except FileNotFoundError as e:
+        print("[ERROR]", e)
+        return None
+    files = record_timings(renderer.render_variant(
+        student_name, course_name, tx_hash, token_name, variant, base_path
+    ))
+    return files["file"] if files else None
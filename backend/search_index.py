@@ -0,0 +1,286 @@
+# backend/search_index.py
+# Admin search over issued certificates: prefix / full-text matching on
+# student, email, course and token_name, facet counts per course and
+# issue month, newest first with keyset pagination.
+#
+# On SQLite the index is an FTS5 table next to `certificates`, kept
+# current by triggers on it: every writer, in any process, updates the
+# index in the same transaction as the certificate. The triggers also
+# keep a (course, month) -> count table, so facets for a browse without
+# search text never count rows. The legacy JSON store is scanned.
+
+import os
+import re
+import json
+from collections import Counter
+
+from storage import decode_cursor, encode_cursor, normalize_tx_hash
+from tx_index import LRUCache
+
+
+# ============================================================
+#                         CONFIG
+# ============================================================
+
+SEARCH_DEFAULT_LIMIT = 25
+SEARCH_MAX_LIMIT = 200
+# Facets for search text are counted over at most this many matches;
+# beyond it the response says the counts are a lower bound
+SEARCH_FACET_SCAN = int(os.getenv("SEARCH_FACET_SCAN", "10000"))
+# Facet counts of recent searches are reused while paging and drilling
+# down. A new certificate invalidates them; edits show after this long.
+SEARCH_FACET_TTL = float(os.getenv("SEARCH_FACET_TTL", "30"))
+# Values returned per facet (most frequent courses, most recent months)
+SEARCH_FACET_SIZE = 50
+
+_CURSOR = "search"
+_TX_HASH = re.compile(r"^(0x)?[0-9a-fA-F]{64}$")
+
+_COURSE = "COALESCE(json_extract({r}.data, '$.course'), '')"
+_MONTH = "COALESCE(substr({r}.issued_at, 1, 7), '')"
+
+
+def _index_row(r):
+    return f"""
+    INSERT INTO cert_search (rowid, student, email, course, token_name) VALUES (
+        {r}.seq, json_extract({r}.data, '$.student'), {r}.email,
+        json_extract({r}.data, '$.course'), json_extract({r}.data, '$.token_name'));
+    INSERT INTO cert_facets (seq, course, month)
+        VALUES ({r}.seq, {_COURSE.format(r=r)}, {_MONTH.format(r=r)});
+    INSERT INTO cert_facet_counts (course, month, n)
+        VALUES ({_COURSE.format(r=r)}, {_MONTH.format(r=r)}, 1)
+        ON CONFLICT(course, month) DO UPDATE SET n = n + 1;"""
+
+
+def _unindex_row(r):
+    return f"""
+    DELETE FROM cert_search WHERE rowid = {r}.seq;
+    UPDATE cert_facet_counts SET n = n - 1
+        WHERE (course, month) = (SELECT course, month FROM cert_facets WHERE seq = {r}.seq);
+    DELETE FROM cert_facets WHERE seq = {r}.seq;"""
+
+
+# Statement by statement, so that creating the index and backfilling it
+# from existing certificates happen in one transaction
+SEARCH_SCHEMA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS cert_search USING fts5("
+    "student, email, course, token_name, "
+    "prefix='1 2 3', tokenize='unicode61 remove_diacritics 2')",
+
+    "CREATE TABLE IF NOT EXISTS cert_facets ("
+    "seq INTEGER PRIMARY KEY, course TEXT NOT NULL, month TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS idx_cert_facets_course ON cert_facets(course, seq)",
+    "CREATE INDEX IF NOT EXISTS idx_cert_facets_month ON cert_facets(month, seq)",
+    "CREATE INDEX IF NOT EXISTS idx_cert_facets_both ON cert_facets(course, month, seq)",
+
+    "CREATE TABLE IF NOT EXISTS cert_facet_counts ("
+    "course TEXT NOT NULL, month TEXT NOT NULL, n INTEGER NOT NULL, "
+    "PRIMARY KEY (course, month))",
+
+    f"CREATE TRIGGER IF NOT EXISTS cert_search_insert AFTER INSERT ON certificates BEGIN"
+    f"{_index_row('new')}\nEND",
+
+    f"CREATE TRIGGER IF NOT EXISTS cert_search_delete AFTER DELETE ON certificates BEGIN"
+    f"{_unindex_row('old')}\nEND",
+
+    # Status changes and the like leave the indexed fields alone
+    f"""CREATE TRIGGER IF NOT EXISTS cert_search_update AFTER UPDATE ON certificates
+    WHEN old.email IS NOT new.email OR old.issued_at IS NOT new.issued_at
+      OR json_extract(old.data, '$.student') IS NOT json_extract(new.data, '$.student')
+      OR json_extract(old.data, '$.course') IS NOT json_extract(new.data, '$.course')
+      OR json_extract(old.data, '$.token_name') IS NOT json_extract(new.data, '$.token_name')
+    BEGIN{_unindex_row('old')}{_index_row('new')}
+    END""",
+)
+
+_BACKFILL = (
+    "INSERT INTO cert_search (rowid, student, email, course, token_name) "
+    "SELECT seq, json_extract(data, '$.student'), email, json_extract(data, '$.course'), "
+    "json_extract(data, '$.token_name') FROM certificates",
+
+    "INSERT INTO cert_facets (seq, course, month) "
+    f"SELECT seq, {_COURSE.format(r='certificates')}, {_MONTH.format(r='certificates')} "
+    "FROM certificates",
+
+    "INSERT INTO cert_facet_counts (course, month, n) "
+    "SELECT course, month, COUNT(*) FROM cert_facets GROUP BY course, month",
+)
+
+
+def match_query(text):
+    """
+    FTS5 query for free text: every word must match, the last token of
+    each word as a prefix ("ada lov" finds Ada Lovelace, "ada@ex" finds
+    ada@example.com). Words are quoted, so FTS5 syntax is not interpreted.
+    """
+    words = [w for w in text.split() if re.search(r"\w", w)]
+    return " ".join('"' + w.replace('"', '""') + '"*' for w in words)
+
+
+def facet_counts(rows, course=None, month=None):
+    """
+    (total, facets) from (course, month, n) rows. Each facet is counted
+    with the other facet's filter applied, so the counts are what
+    selecting that value would return.
+    """
+    courses, months, total = Counter(), Counter(), 0
+    for c, m, n in rows:
+        if month is None or m == month:
+            courses[c] += n
+        if course is None or c == course:
+            months[m] += n
+            if month is None or m == month:
+                total += n
+    return total, {
+        "course": [
+            {"value": c, "count": n}
+            for c, n in sorted(courses.items(), key=lambda kv: (-kv[1], kv[0]))[:SEARCH_FACET_SIZE] if n
+        ],
+        "month": [
+            {"value": m, "count": n}
+            for m, n in sorted(months.items(), reverse=True)[:SEARCH_FACET_SIZE] if n
+        ],
+    }
+
+
+# ============================================================
+#                      SEARCH INDEX
+# ============================================================
+
+class SearchIndex:
+    """
+    search() answers one dashboard query:
+
+        {"total", "total_exact", "facets": {"course": [...], "month": [...]},
+         "certificates": [...], "next_cursor"}
+
+    `q` is free text, or a transaction hash (exact match). `course` and
+    `month` ("YYYY-MM") narrow the results; pass `next_cursor` back as
+    `cursor` for the next page.
+    """
+
+    def __init__(self, store, facet_scan=SEARCH_FACET_SCAN, facet_ttl=SEARCH_FACET_TTL):
+        self.store = store
+        self.facet_scan = facet_scan
+        self.facet_cache = LRUCache(256, facet_ttl)
+        self.db = store.db if store.backend == "sqlite" else None
+        if self.db is not None:
+            self.ensure()
+
+    def ensure(self):
+        """Creates the index and its triggers, indexing existing certificates once."""
+        with self.db.transaction() as c:
+            for statement in SEARCH_SCHEMA:
+                c.execute(statement)
+            if self.store.get_meta("search_index") is None:
+                for statement in _BACKFILL:
+                    c.execute(statement)
+                self.store.set_meta("search_index", "1")
+
+    def search(self, q="", course=None, month=None, limit=SEARCH_DEFAULT_LIMIT, cursor=None):
+        after = None
+        if cursor:
+            try:
+                after = int(decode_cursor(cursor, _CURSOR)[0])
+            except (IndexError, TypeError):
+                raise ValueError("Invalid cursor")
+        q = (q or "").strip()
+        if self.db is None:
+            return self._scan(q, course, month, limit, after)
+
+        # The rows a query selects, before the course/month filters
+        if _TX_HASH.match(q):
+            key = "c.seq"
+            source = "FROM certificates c JOIN cert_facets f ON f.seq = c.seq WHERE c.tx_hash = ?"
+            params = [normalize_tx_hash(q)]
+        elif match_query(q):
+            key = "s.rowid"
+            source = "FROM cert_search s JOIN cert_facets f ON f.seq = s.rowid WHERE cert_search MATCH ?"
+            params = [match_query(q)]
+        else:
+            key = "f.seq"
+            source = "FROM cert_facets f WHERE 1"
+            params = []
+
+        where, where_params = "", []
+        if course is not None:
+            where += " AND f.course = ?"
+            where_params.append(course)
+        if month is not None:
+            where += " AND f.month = ?"
+            where_params.append(month)
+        if after is not None:
+            where += f" AND {key} < ?"
+            where_params.append(after)
+
+        seqs = [r[0] for r in self.db.execute(
+            f"SELECT {key} {source}{where} ORDER BY {key} DESC LIMIT ?",
+            params + where_params + [limit + 1],
+        )]
+        more = len(seqs) > limit
+        seqs = seqs[:limit]
+
+        if params:
+            latest = self.db.execute("SELECT MAX(seq) FROM certificates").fetchone()[0]
+            cache_key = (key, params[0], latest)
+            rows = self.facet_cache.get(cache_key)
+            if rows is None:
+                rows = [tuple(r) for r in self.db.execute(
+                    f"SELECT course, month, COUNT(*) FROM "
+                    f"(SELECT f.course, f.month {source} LIMIT ?) GROUP BY course, month",
+                    params + [self.facet_scan + 1],
+                )]
+                self.facet_cache.put(cache_key, rows)
+            exact = sum(r[2] for r in rows) <= self.facet_scan
+        else:
+            rows = self.db.execute(
+                "SELECT course, month, n FROM cert_facet_counts WHERE n > 0"
+            ).fetchall()
+            exact = True
+        total, facets = facet_counts(rows, course, month)
+
+        entries = {}
+        if seqs:
+            entries = dict(self.db.execute(
+                f"SELECT seq, data FROM certificates WHERE seq IN ({', '.join('?' * len(seqs))})",
+                seqs,
+            ).fetchall())
+        return {
+            "total": total,
+            "total_exact": exact,
+            "facets": facets,
+            "certificates": [json.loads(entries[s]) for s in seqs if s in entries],
+            "next_cursor": encode_cursor(_CURSOR, [seqs[-1]]) if more else None,
+        }
+
+    def _scan(self, q, course, month, limit, after):
+        """The same query over the JSON store: a full scan, newest first."""
+        tx = normalize_tx_hash(q) if _TX_HASH.match(q) else None
+        words = [w.lower() for w in re.findall(r"\w+", q)]
+
+        matched = []
+        for seq, e in enumerate(self.store.iter_certificates(), 1):
+            if tx is not None:
+                if normalize_tx_hash(e.get("tx_hash")) != tx:
+                    continue
+            elif words:
+                text = " ".join(str(e.get(k) or "") for k in ("student", "email", "course", "token_name"))
+                tokens = re.findall(r"\w+", text.lower())
+                if not all(any(t.startswith(w) for t in tokens) for w in words):
+                    continue
+            matched.append((seq, e.get("course") or "", (e.get("issued_at") or "")[:7], e))
+
+        pairs = Counter((c, m) for _, c, m, _ in matched)
+        total, facets = facet_counts([(c, m, n) for (c, m), n in pairs.items()], course, month)
+        page = [
+            (seq, e) for seq, c, m, e in reversed(matched)
+            if (course is None or c == course) and (month is None or m == month)
+            and (after is None or seq < after)
+        ][:limit + 1]
+        return {
+            "total": total,
+            "total_exact": True,
+            "facets": facets,
+            "certificates": [e for _, e in page[:limit]],
+            "next_cursor": encode_cursor(_CURSOR, [page[limit - 1][0]]) if len(page) > limit else None,
+        }
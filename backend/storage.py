@@ -0,0 +1,884 @@
+# backend/storage.py
+
+import os
+import json
+import time
+import uuid
+import base64
+import sqlite3
+import functools
+import threading
+from contextlib import contextmanager
+
+from metrics import STORE_SECONDS
+
+try:
+    import fcntl
+except ImportError:     # Windows
+    fcntl = None
+    import msvcrt
+
+
+# ============================================================
+#                       CONFIG
+# ============================================================
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# "sqlite" (default) or "json" (legacy single-file layout)
+STORE_BACKEND = os.getenv("CREDLYTIC_STORE", "sqlite").lower()
+SQLITE_PATH = os.getenv("CREDLYTIC_DB", os.path.join(BASE_DIR, "credlytic.db"))
+
+LEGACY_DB_FILE = os.path.join(BASE_DIR, "db.json")
+LEGACY_ADMINS_FILE = os.path.join(BASE_DIR, "admin.json")
+
+
+def normalize_tx_hash(h):
+    h = (h or "").strip().lower()
+    if not h:
+        return ""
+    return h if h.startswith("0x") else "0x" + h
+
+
+def new_certificate_id():
+    return uuid.uuid4().hex
+
+
+def _timed(op):
+    """Records the method's latency in credlytic_store_seconds{backend, op}."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(self, *args, **kwargs)
+            finally:
+                STORE_SECONDS.observe(time.perf_counter() - t0, backend=self.backend, op=op)
+        return wrapper
+    return decorate
+
+
+# Orders accepted by list_certificates(); "issued_at" is issue order
+LIST_SORTS = ("issued_at", "course")
+
+
+def encode_cursor(sort, key):
+    """Opaque page cursor: the sort it belongs to ("-course" etc.) and the last row's key."""
+    raw = json.dumps([sort, list(key)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, sort):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, key = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort or not isinstance(key, list):
+        raise ValueError("Cursor belongs to a different sort order")
+    return tuple(key)
+
+
+def _sort_token(sort, descending):
+    return f"-{sort}" if descending else sort
+
+
+def _atomic_write_json(path, data):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+@contextmanager
+def _file_lock(path):
+    """
+    Exclusive lock on path + ".lock", across processes, for the JSON
+    files' read-modify-write cycles.
+    """
+    with open(path + ".lock", "a+b") as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+# ============================================================
+#                 SQLITE CONNECTION HANDLING
+# ============================================================
+
+class Database:
+    """
+    Thread-local SQLite connections in WAL mode.
+    Readers never block the single writer; writes go through
+    transaction(), which takes the write lock up front.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def conn(self):
+        c = getattr(self._local, "conn", None)
+        if c is None:
+            c = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            c.row_factory = sqlite3.Row
+            c.execute("PRAGMA journal_mode=WAL")
+            c.execute("PRAGMA synchronous=NORMAL")
+            c.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = c
+        return c
+
+    @contextmanager
+    def transaction(self):
+        c = self.conn()
+        if c.in_transaction:
+            # Nested use joins the outer transaction
+            yield c
+            return
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            yield c
+        except BaseException:
+            c.execute("ROLLBACK")
+            raise
+        else:
+            c.execute("COMMIT")
+
+    def execute(self, sql, params=()):
+        return self.conn().execute(sql, params)
+
+    def ensure_schema(self, script):
+        self.conn().executescript(script)
+
+    def ensure_column(self, table, column, decl):
+        """Adds a column to a table created by an older version."""
+        cols = {r["name"] for r in self.execute(f"PRAGMA table_info({table})")}
+        if column not in cols:
+            self.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+    def close(self):
+        c = getattr(self._local, "conn", None)
+        if c is not None:
+            c.close()
+            self._local.conn = None
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _start_time(pid):
+    """Kernel start time of a process (Linux), or None where /proc is not available."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # Field 22; the command name before it may contain spaces
+            return f.read().rsplit(")", 1)[1].split()[19]
+    except (OSError, IndexError):
+        return None
+
+
+_owner = (None, None)
+
+
+def owner_id():
+    """
+    What this process writes into a row it claims (jobs, outbox):
+    "<pid>:<start time>", or "<pid>:<random>" without /proc. A pid alone
+    is not enough: after a container restart the new process often gets
+    the pid of the one that died holding the row.
+    """
+    global _owner
+    pid = os.getpid()
+    if _owner[0] != pid:    # first call, or a forked child
+        _owner = (pid, f"{pid}:{_start_time(pid) or uuid.uuid4().hex}")
+    return _owner[1]
+
+
+def owner_alive(owner):
+    """Whether the process that claimed a row is still running."""
+    if not owner:
+        return False
+    pid, _, instance = str(owner).partition(":")
+    try:
+        pid = int(pid)
+    except ValueError:
+        return False
+    if pid == os.getpid():
+        # Bare pids were written by an earlier process
+        return owner == owner_id()
+    if not _pid_alive(pid):
+        return False
+    if not instance:
+        return True
+    # A live pid that started at another time is a different process
+    started = _start_time(pid)
+    return started is None or started == instance
+
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+
+def _reset_after_fork():
+    # A forked child (e.g. a gunicorn worker) must not use the parent's
+    # connections; drop them unclosed, since closing could release the
+    # parent's file locks
+    for db in _databases.values():
+        db._local = threading.local()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_database(path=None):
+    """Shared Database per file, so every subsystem reuses the same connections."""
+    path = os.path.abspath(path or SQLITE_PATH)
+    with _databases_lock:
+        db = _databases.get(path)
+        if db is None:
+            db = _databases[path] = Database(path)
+        return db
+
+
+# ============================================================
+#                  CERTIFICATE STORE (BASE)
+# ============================================================
+
+class CertificateStore:
+    """
+    Storage interface used by the API.
+
+    Entries are plain dicts in the same shape the API has always
+    returned; every entry carries a stable "id".
+
+    Listeners registered with add_listener() are called with the
+    stored entry after every successful add/update.
+    """
+
+    backend = None
+    _listeners = ()
+
+    def add_listener(self, fn):
+        self._listeners = tuple(self._listeners) + (fn,)
+
+    def _notify(self, entry):
+        for fn in self._listeners:
+            try:
+                fn(entry)
+            except Exception as e:
+                print("[STORE LISTENER ERROR]", e)
+
+    # ---- certificates ----
+    def add_certificate(self, entry):
+        raise NotImplementedError
+
+    def update_certificate(self, cert_id, fields):
+        raise NotImplementedError
+
+    def get_certificate(self, cert_id):
+        for e in self.iter_certificates():
+            if e.get("id") == cert_id:
+                return e
+        return None
+
+    def certificates_for(self, email, ignore_case=False):
+        if ignore_case:
+            return [e for e in self.iter_certificates()
+                    if (e.get("email") or "").lower() == email.lower()]
+        return [e for e in self.iter_certificates() if e.get("email") == email]
+
+    def find_by_tx_hash(self, tx_hash):
+        needle = normalize_tx_hash(tx_hash)
+        return [
+            e for e in self.iter_certificates()
+            if normalize_tx_hash(e.get("tx_hash")) == needle
+        ]
+
+    def find_by_tx_hashes(self, tx_hashes):
+        """Certificates for any of the hashes, in one pass over the store."""
+        needles = {normalize_tx_hash(h) for h in tx_hashes}
+        return [
+            e for e in self.iter_certificates()
+            if normalize_tx_hash(e.get("tx_hash")) in needles
+        ]
+
+    def iter_certificates(self):
+        raise NotImplementedError
+
+    def count(self):
+        return sum(1 for _ in self.iter_certificates())
+
+    # ---- listing ----
+    def list_certificates(self, email, course=None, issued_from=None, issued_to=None,
+                          sort="issued_at", descending=False, cursor=None, limit=None,
+                          raw=False):
+        """
+        One page of a student's certificates, failed issues excluded.
+
+        issued_from/issued_to bound issued_at (ISO strings, to is
+        exclusive). cursor is the next_cursor of the previous page;
+        limit=None returns everything after it. raw=True returns each
+        entry as its JSON text. Returns (entries, next_cursor or None).
+        """
+        rows = []
+        for i, e in enumerate(self.certificates_for(email)):
+            if not self._matches(e, course, issued_from, issued_to):
+                continue
+            key = (i,) if sort == "issued_at" else (e.get("course") or "", i)
+            rows.append((key, e))
+        rows.sort(key=lambda r: r[0], reverse=descending)
+
+        if cursor:
+            after = decode_cursor(cursor, _sort_token(sort, descending))
+            rows = [r for r in rows if (r[0] < after if descending else r[0] > after)]
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(_sort_token(sort, descending), rows[-1][0])
+        entries = [json.dumps(e) if raw else e for _, e in rows]
+        return entries, next_cursor
+
+    def count_certificates(self, email, course=None, issued_from=None, issued_to=None):
+        """Size of list_certificates() with the same filters and no limit."""
+        return sum(
+            1 for e in self.certificates_for(email)
+            if self._matches(e, course, issued_from, issued_to)
+        )
+
+    @staticmethod
+    def _matches(e, course, issued_from, issued_to):
+        issued = e.get("issued_at") or ""
+        return (
+            e.get("status") != "failed"
+            and (not course or (e.get("course") or "").lower() == course.lower())
+            and (not issued_from or issued >= issued_from)
+            and (not issued_to or issued < issued_to)
+        )
+
+    def certificates_version(self, email):
+        """
+        Changes whenever the student's certificates do; used for ETags.
+        None if the backend cannot tell cheaply.
+        """
+        return None
+
+    def change_cursor(self):
+        """Position in the store's write history, for changes_since(); None if not tracked."""
+        return None
+
+    def changes_since(self, cursor):
+        """
+        (entries written by any process after `cursor`, new cursor).
+        Backends that cannot tell return nothing.
+        """
+        return [], cursor
+
+    # ---- admins ----
+    def get_admins(self):
+        raise NotImplementedError
+
+    def get_admin(self, email):
+        return self.get_admins().get(email)
+
+    def put_admin(self, email, record):
+        raise NotImplementedError
+
+    def admins_version(self):
+        """Changes whenever any process changes an admin binding; None if unknown."""
+        return None
+
+    # ---- export ----
+    def export_json(self, db_path, admins_path=None):
+        """Write the legacy db.json / admin.json layout."""
+        grouped = {}
+        for e in self.iter_certificates():
+            grouped.setdefault(e["email"], []).append(e)
+        _atomic_write_json(db_path, grouped)
+        if admins_path:
+            _atomic_write_json(admins_path, self.get_admins())
+        return sum(len(v) for v in grouped.values())
+
+
+# ============================================================
+#                     SQLITE BACKEND
+# ============================================================
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS certificates (
+    seq        INTEGER PRIMARY KEY AUTOINCREMENT,
+    id         TEXT NOT NULL UNIQUE,
+    email      TEXT NOT NULL,
+    tx_hash    TEXT,
+    issued_at  TEXT,
+    data       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_certificates_email ON certificates(email, seq);
+CREATE INDEX IF NOT EXISTS idx_certificates_email_nocase ON certificates(email COLLATE NOCASE, seq);
+CREATE INDEX IF NOT EXISTS idx_certificates_tx ON certificates(tx_hash);
+
+-- Bumped on every write to a student's certificates (listing ETags)
+CREATE TABLE IF NOT EXISTS student_versions (
+    email   TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS admins (
+    email   TEXT PRIMARY KEY,
+    data    TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key     TEXT PRIMARY KEY,
+    value   TEXT
+);
+"""
+
+# certificates.changed orders writes across processes: each insert or
+# update takes the next number (changes_since)
+CHANGES_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_certificates_changed ON certificates(changed);
+"""
+_NEXT_CHANGE = "(SELECT COALESCE(MAX(changed), 0) + 1 FROM certificates)"
+
+
+class SqliteCertificateStore(CertificateStore):
+
+    backend = "sqlite"
+
+    def __init__(self, path=None):
+        self.db = get_database(path)
+        self.db.ensure_schema(SQLITE_SCHEMA)
+        self.db.ensure_column("certificates", "changed", "INTEGER")
+        self.db.ensure_schema(CHANGES_INDEX)
+
+    @staticmethod
+    def _row_entry(row):
+        return json.loads(row["data"]) if row else None
+
+    # ---- certificates ----
+    @_timed("add_certificate")
+    def add_certificate(self, entry):
+        entry = dict(entry)
+        entry.setdefault("id", new_certificate_id())
+        with self.db.transaction() as c:
+            c.execute(
+                "INSERT INTO certificates (id, email, tx_hash, issued_at, data, changed) "
+                f"VALUES (?, ?, ?, ?, ?, {_NEXT_CHANGE})",
+                (
+                    entry["id"],
+                    entry["email"],
+                    normalize_tx_hash(entry.get("tx_hash")) or None,
+                    entry.get("issued_at"),
+                    json.dumps(entry),
+                ),
+            )
+            self._bump_version(c, entry["email"])
+        self._notify(entry)
+        return entry
+
+    @_timed("update_certificate")
+    def update_certificate(self, cert_id, fields):
+        with self.db.transaction() as c:
+            row = c.execute(
+                "SELECT email, data FROM certificates WHERE id = ?", (cert_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            entry = json.loads(row["data"])
+            entry.update(fields)
+            c.execute(
+                "UPDATE certificates SET email = ?, tx_hash = ?, issued_at = ?, data = ?, "
+                f"changed = {_NEXT_CHANGE} WHERE id = ?",
+                (
+                    entry["email"],
+                    normalize_tx_hash(entry.get("tx_hash")) or None,
+                    entry.get("issued_at"),
+                    json.dumps(entry),
+                    cert_id,
+                ),
+            )
+            self._bump_version(c, row["email"])
+            if entry["email"] != row["email"]:
+                self._bump_version(c, entry["email"])
+        self._notify(entry)
+        return entry
+
+    @_timed("get_certificate")
+    def get_certificate(self, cert_id):
+        row = self.db.execute(
+            "SELECT data FROM certificates WHERE id = ?", (cert_id,)
+        ).fetchone()
+        return self._row_entry(row)
+
+    @_timed("certificates_for")
+    def certificates_for(self, email, ignore_case=False):
+        rows = self.db.execute(
+            "SELECT data FROM certificates WHERE email = ? "
+            f"{'COLLATE NOCASE ' if ignore_case else ''}ORDER BY seq", (email,)
+        ).fetchall()
+        return [json.loads(r["data"]) for r in rows]
+
+    @_timed("list_certificates")
+    def list_certificates(self, email, course=None, issued_from=None, issued_to=None,
+                          sort="issued_at", descending=False, cursor=None, limit=None,
+                          raw=False):
+        # Keyset pagination: the cursor holds the last row's sort key, so
+        # every page is an index range scan however deep it is
+        if sort == "issued_at":
+            key_cols = ["seq"]
+        else:
+            key_cols = ["COALESCE(json_extract(data, '$.course'), '')", "seq"]
+
+        where, params = self._list_filter(email, course, issued_from, issued_to)
+        if cursor:
+            after = decode_cursor(cursor, _sort_token(sort, descending))
+            if len(after) != len(key_cols):
+                raise ValueError("Invalid cursor")
+            op = "<" if descending else ">"
+            where.append(f"({', '.join(key_cols)}) {op} ({', '.join('?' * len(after))})")
+            params += after
+
+        direction = "DESC" if descending else "ASC"
+        sql = (
+            f"SELECT data, {', '.join(key_cols)} FROM certificates WHERE {' AND '.join(where)} "
+            f"ORDER BY {', '.join(f'{c} {direction}' for c in key_cols)}"
+        )
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+        rows = self.db.execute(sql, params).fetchall()
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(_sort_token(sort, descending), tuple(rows[-1])[1:])
+        # raw: stored JSON text as-is, never decoded and re-encoded
+        entries = [r["data"] if raw else json.loads(r["data"]) for r in rows]
+        return entries, next_cursor
+
+    @_timed("count_certificates")
+    def count_certificates(self, email, course=None, issued_from=None, issued_to=None):
+        where, params = self._list_filter(email, course, issued_from, issued_to)
+        return self.db.execute(
+            f"SELECT COUNT(*) FROM certificates WHERE {' AND '.join(where)}", params
+        ).fetchone()[0]
+
+    @staticmethod
+    def _list_filter(email, course, issued_from, issued_to):
+        where = ["email = ?", "COALESCE(json_extract(data, '$.status'), '') != 'failed'"]
+        params = [email]
+        if course:
+            where.append("lower(json_extract(data, '$.course')) = lower(?)")
+            params.append(course)
+        if issued_from:
+            where.append("issued_at >= ?")
+            params.append(issued_from)
+        if issued_to:
+            where.append("issued_at < ?")
+            params.append(issued_to)
+        return where, params
+
+    def certificates_version(self, email):
+        row = self.db.execute(
+            "SELECT version FROM student_versions WHERE email = ?", (email,)
+        ).fetchone()
+        return row["version"] if row else 0
+
+    def change_cursor(self):
+        return self.db.execute("SELECT COALESCE(MAX(changed), 0) FROM certificates").fetchone()[0]
+
+    def changes_since(self, cursor):
+        rows = self.db.execute(
+            "SELECT data, changed FROM certificates WHERE changed > ? ORDER BY changed",
+            (cursor or 0,),
+        ).fetchall()
+        if not rows:
+            return [], cursor
+        return [json.loads(r["data"]) for r in rows], rows[-1]["changed"]
+
+    @staticmethod
+    def _bump_version(c, email):
+        c.execute(
+            "INSERT INTO student_versions (email, version) VALUES (?, 1) "
+            "ON CONFLICT(email) DO UPDATE SET version = version + 1",
+            (email,),
+        )
+
+    @_timed("find_by_tx_hash")
+    def find_by_tx_hash(self, tx_hash):
+        rows = self.db.execute(
+            "SELECT data FROM certificates WHERE tx_hash = ? ORDER BY seq",
+            (normalize_tx_hash(tx_hash),),
+        ).fetchall()
+        return [json.loads(r["data"]) for r in rows]
+
+    @_timed("find_by_tx_hashes")
+    def find_by_tx_hashes(self, tx_hashes):
+        needles = list(dict.fromkeys(normalize_tx_hash(h) for h in tx_hashes))
+        out = []
+        # Stays under SQLite's bound-parameter limit; each chunk is index lookups
+        for i in range(0, len(needles), 500):
+            chunk = needles[i:i + 500]
+            rows = self.db.execute(
+                f"SELECT data FROM certificates WHERE tx_hash IN ({', '.join('?' * len(chunk))}) "
+                "ORDER BY seq",
+                chunk,
+            ).fetchall()
+            out += [json.loads(r["data"]) for r in rows]
+        return out
+
+    def iter_certificates(self):
+        cur = self.db.execute("SELECT data FROM certificates ORDER BY seq")
+        for row in cur:
+            yield json.loads(row["data"])
+
+    def count(self):
+        return self.db.execute("SELECT COUNT(*) FROM certificates").fetchone()[0]
+
+    # ---- admins ----
+    def get_admins(self):
+        rows = self.db.execute("SELECT email, data FROM admins").fetchall()
+        return {r["email"]: json.loads(r["data"]) for r in rows}
+
+    @_timed("get_admin")
+    def get_admin(self, email):
+        row = self.db.execute(
+            "SELECT data FROM admins WHERE email = ?", (email,)
+        ).fetchone()
+        return self._row_entry(row)
+
+    @_timed("put_admin")
+    def put_admin(self, email, record):
+        with self.db.transaction() as c:
+            c.execute(
+                "INSERT INTO admins (email, data) VALUES (?, ?) "
+                "ON CONFLICT(email) DO UPDATE SET data = excluded.data",
+                (email, json.dumps(record)),
+            )
+            c.execute(
+                "INSERT INTO meta (key, value) VALUES ('admins_version', '1') "
+                "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+            )
+        return record
+
+    def admins_version(self):
+        return self.get_meta("admins_version", "0")
+
+    # ---- meta ----
+    def get_meta(self, key, default=None):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else default
+
+    def set_meta(self, key, value):
+        with self.db.transaction() as c:
+            c.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value),
+            )
+
+    # ---- migration ----
+    def import_json(self, db_path, admins_path=None):
+        """
+        One-shot import of the legacy db.json / admin.json layout.
+        Safe to re-run: legacy entries get deterministic ids.
+        """
+        imported = 0
+
+        if db_path and os.path.exists(db_path):
+            with open(db_path, "r") as f:
+                legacy = json.load(f) or {}
+
+            with self.db.transaction() as c:
+                for email, entries in legacy.items():
+                    if not isinstance(entries, list):
+                        continue
+                    for e in entries:
+                        e = dict(e)
+                        e.setdefault("email", email)
+                        e.setdefault("id", uuid.uuid5(
+                            uuid.NAMESPACE_URL,
+                            f"{email}|{e.get('tx_hash')}|{e.get('file')}",
+                        ).hex)
+                        cur = c.execute(
+                            "INSERT OR IGNORE INTO certificates "
+                            "(id, email, tx_hash, issued_at, data) VALUES (?, ?, ?, ?, ?)",
+                            (
+                                e["id"],
+                                e["email"],
+                                normalize_tx_hash(e.get("tx_hash")) or None,
+                                e.get("issued_at"),
+                                json.dumps(e),
+                            ),
+                        )
+                        imported += cur.rowcount
+                        if cur.rowcount:
+                            self._bump_version(c, e["email"])
+
+        if admins_path and os.path.exists(admins_path):
+            with open(admins_path, "r") as f:
+                admins = json.load(f) or {}
+            with self.db.transaction() as c:
+                for email, record in admins.items():
+                    c.execute(
+                        "INSERT OR IGNORE INTO admins (email, data) VALUES (?, ?)",
+                        (email, json.dumps(record)),
+                    )
+
+        return imported
+
+
+# ============================================================
+#                 JSON BACKEND (LEGACY LAYOUT)
+# ============================================================
+
+class JsonCertificateStore(CertificateStore):
+    """
+    The original db.json / admin.json files.
+    Every operation is O(total certificates); kept for small
+    dev setups. Writes are serialized (across processes too) and
+    atomic (temp + rename).
+    """
+
+    backend = "json"
+
+    def __init__(self, db_path=LEGACY_DB_FILE, admins_path=LEGACY_ADMINS_FILE):
+        self.db_path = db_path
+        self.admins_path = admins_path
+        self._lock = threading.RLock()
+        for path in (db_path, admins_path):
+            if not os.path.exists(path):
+                _atomic_write_json(path, {})
+
+    @_timed("load_db")
+    def _load(self, path):
+        with open(path, "r") as f:
+            return json.load(f) or {}
+
+    @_timed("save_db")
+    def _save(self, path, data):
+        _atomic_write_json(path, data)
+
+    def add_certificate(self, entry):
+        entry = dict(entry)
+        entry.setdefault("id", new_certificate_id())
+        with self._lock, _file_lock(self.db_path):
+            db = self._load(self.db_path)
+            db.setdefault(entry["email"], []).append(entry)
+            self._save(self.db_path, db)
+        self._notify(entry)
+        return entry
+
+    def update_certificate(self, cert_id, fields):
+        with self._lock, _file_lock(self.db_path):
+            db = self._load(self.db_path)
+            found = None
+            for entries in db.values():
+                if not isinstance(entries, list):
+                    continue
+                for e in entries:
+                    if e.get("id") == cert_id:
+                        found = e
+                        break
+                if found:
+                    break
+            if found is None:
+                return None
+            found.update(fields)
+            self._save(self.db_path, db)
+        self._notify(found)
+        return found
+
+    def certificates_for(self, email, ignore_case=False):
+        db = self._load(self.db_path)
+        if ignore_case:
+            return [e for key, entries in db.items() if key.lower() == email.lower()
+                    and isinstance(entries, list) for e in entries]
+        entries = db.get(email, [])
+        return entries if isinstance(entries, list) else []
+
+    def certificates_version(self, email):
+        # Any write replaces the file, so its mtime/size identify the contents
+        st = os.stat(self.db_path)
+        return f"{st.st_mtime_ns}-{st.st_size}"
+
+    def change_cursor(self):
+        try:
+            return self.certificates_version(None)
+        except OSError:
+            return None
+
+    def changes_since(self, cursor):
+        # No write history: a changed file is read again in full
+        version = self.change_cursor()
+        if version == cursor:
+            return [], cursor
+        return list(self.iter_certificates()), version
+
+    def iter_certificates(self):
+        for email, entries in self._load(self.db_path).items():
+            if not isinstance(entries, list):
+                continue
+            for e in entries:
+                e.setdefault("email", email)
+                yield e
+
+    def get_admins(self):
+        return self._load(self.admins_path)
+
+    def put_admin(self, email, record):
+        with self._lock, _file_lock(self.admins_path):
+            admins = self._load(self.admins_path)
+            admins[email] = record
+            self._save(self.admins_path, admins)
+        return record
+
+    def admins_version(self):
+        st = os.stat(self.admins_path)
+        return f"{st.st_mtime_ns}-{st.st_size}"
+
+
+# ============================================================
+#                       FACTORY
+# ============================================================
+
+def open_store(backend=None):
+    backend = (backend or STORE_BACKEND).lower()
+
+    if backend == "json":
+        return JsonCertificateStore()
+
+    if backend == "sqlite":
+        fresh = not os.path.exists(SQLITE_PATH)
+        store = SqliteCertificateStore(SQLITE_PATH)
+
+        # First start on SQLite: pull in the legacy files once
+        if fresh or store.get_meta("legacy_imported") is None:
+            n = store.import_json(LEGACY_DB_FILE, LEGACY_ADMINS_FILE)
+            store.set_meta("legacy_imported", "1")
+            if n:
+                print(f"[STORE] Imported {n} certificates from {LEGACY_DB_FILE}")
+        return store
+
+    raise ValueError(f"Unknown CREDLYTIC_STORE backend: {backend}")
@@ -0,0 +1,26 @@
+# backend/tests/conftest.py
+# Backend modules are imported flat, as app.py does
+
+import os
+import sys
+
+import pytest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """A scratch SQLite store; get_database() without a path opens it too."""
+    import storage
+    monkeypatch.setattr(storage, "SQLITE_PATH", str(tmp_path / "credlytic.db"))
+    return storage.SqliteCertificateStore(storage.SQLITE_PATH)
+
+
+@pytest.fixture
+def node():
+    """A mock Aptos fullnode committing a block every 50 ms."""
+    from mock_aptos_node import MockAptosNode
+    with MockAptosNode(block_time=0.05, seed=1) as n:
+        yield n
@@ -0,0 +1,36 @@
+# backend/tests/helpers.py
+
+from aptos_sdk.account_address import AccountAddress
+from aptos_sdk.bcs import Serializer
+from aptos_sdk.transactions import EntryFunction, TransactionArgument, TransactionPayload
+
+
+def transfer(amount=1):
+    """The cheapest payload to sign: a transfer to 0x1."""
+    return TransactionPayload(EntryFunction.natural(
+        "0x1::aptos_account", "transfer", [],
+        [TransactionArgument(AccountAddress.from_str("0x1"), Serializer.struct),
+         TransactionArgument(amount, Serializer.u64)],
+    ))
+
+
+def token(creator, email, collection="Credlytic - Hack"):
+    """create_token_script as admin_mint.build_mint_payload sends it."""
+    return TransactionPayload(EntryFunction.natural(
+        "0x3::token", "create_token_script", [],
+        [
+            TransactionArgument(collection, Serializer.str),
+            TransactionArgument(f"Certificate: Student #{email}", Serializer.str),
+            TransactionArgument("Awarded for: Course", Serializer.str),
+            TransactionArgument(1, Serializer.u64),
+            TransactionArgument(1, Serializer.u64),
+            TransactionArgument("https://i.imgur.com/T0aCg0C.png", Serializer.str),
+            TransactionArgument(creator, Serializer.struct),
+            TransactionArgument(0, Serializer.u64),
+            TransactionArgument(0, Serializer.u64),
+            TransactionArgument([False] * 5, Serializer.sequence_serializer(Serializer.bool)),
+            TransactionArgument(["student_id"], Serializer.sequence_serializer(Serializer.str)),
+            TransactionArgument([email.encode("utf-8")], Serializer.sequence_serializer(Serializer.to_bytes)),
+            TransactionArgument(["string"], Serializer.sequence_serializer(Serializer.str)),
+        ],
+    ))
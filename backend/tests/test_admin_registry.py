@@ -0,0 +1,73 @@
+# backend/tests/test_admin_registry.py
+# Admin wallet bindings made in parallel by several processes and
+# threads are all kept, and registries in other processes pick them up
+# on reload, for both store backends.
+
+import time
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from admin_registry import AdminRegistry
+from storage import JsonCertificateStore, SqliteCertificateStore
+
+
+PROCESSES = 3
+THREADS = 4
+BINDS = 10
+
+
+def open_backend(backend, work):
+    if backend == "json":
+        return JsonCertificateStore(f"{work}/db.json", f"{work}/admin.json")
+    return SqliteCertificateStore(f"{work}/credlytic.db")
+
+
+def binder(backend, work, proc, start):
+    """One process: THREADS threads each binding BINDS distinct admins."""
+    registry = AdminRegistry(open_backend(backend, work), reload_interval=0)
+    start.wait()
+
+    def run(t):
+        for i in range(BINDS):
+            registry.bind(f"admin-{proc}-{t}-{i}@example.edu",
+                          {"wallet": f"0x{proc:02x}{t:02x}{i:04x}", "verified": True})
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        list(pool.map(run, range(THREADS)))
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_parallel_binds_are_kept(backend, tmp_path):
+    store = open_backend(backend, tmp_path)
+    watcher = AdminRegistry(store, reload_interval=0)
+
+    ctx = multiprocessing.get_context("spawn")
+    start = ctx.Event()
+    procs = [ctx.Process(target=binder, args=(backend, str(tmp_path), p, start))
+             for p in range(PROCESSES)]
+    for p in procs:
+        p.start()
+    start.set()
+    for p in procs:
+        p.join(timeout=60)
+        assert p.exitcode == 0
+
+    expected = PROCESSES * THREADS * BINDS
+    assert len(store.get_admins()) == expected
+    # The watcher never bound anything itself; it sees them on reload
+    assert len(watcher.all()) == expected
+    assert watcher.get("admin-2-3-9@example.edu")["wallet"] == "0x02030009"
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_reload_waits_for_interval(backend, tmp_path):
+    registry = AdminRegistry(open_backend(backend, tmp_path), reload_interval=0.2)
+    other = AdminRegistry(open_backend(backend, tmp_path), reload_interval=0)
+    other.bind("late@example.edu", {"wallet": "0x1", "verified": True})
+
+    # Still serving the snapshot taken at load
+    assert registry.get("late@example.edu") is None
+    time.sleep(0.25)
+    assert registry.get("late@example.edu") == {"wallet": "0x1", "verified": True}
@@ -0,0 +1,99 @@
+# backend/tests/test_app.py
+# HTTP routes through the Flask test client, on a scratch database and
+# without the background workers (CREDLYTIC_PRELOAD=1 defers them).
+
+import os
+import sys
+import importlib
+import subprocess
+
+import pytest
+
+from conftest import BACKEND
+
+
+ADMIN = ("admin@example.edu", "0xabc")
+
+
+@pytest.fixture(scope="module")
+def app_module(tmp_path_factory):
+    mp = pytest.MonkeyPatch()
+    import storage
+    mp.setattr(storage, "SQLITE_PATH", str(tmp_path_factory.mktemp("app") / "credlytic.db"))
+    mp.setenv("CREDLYTIC_PRELOAD", "1")
+    mp.setenv("CREDLYTIC_ROLE", "issuer,reader")
+    module = importlib.import_module("app")
+    module.admins.bind(ADMIN[0], {"wallet": ADMIN[1], "verified": True})
+    yield module
+    mp.undo()
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def failed_cert(app_module):
+    return app_module.store.add_certificate({
+        "student": "Ada Lovelace", "email": "ada@example.edu", "course": "Rust 101",
+        "status": "failed", "email_status": "pending", "error": "Minting failed: node down",
+    })
+
+
+def test_status_without_credentials_hides_entry(client, failed_cert):
+    res = client.get(f"/api/certificates/{failed_cert['id']}")
+    assert res.status_code == 200
+    assert res.get_json()["certificate"] == {
+        "id": failed_cert["id"], "status": "failed", "email_status": "pending",
+    }
+
+
+def test_status_with_admin_returns_entry(client, failed_cert):
+    res = client.get(f"/api/certificates/{failed_cert['id']}",
+                     query_string={"admin_email": ADMIN[0], "admin_wallet": ADMIN[1]})
+    cert = res.get_json()["certificate"]
+    assert cert["email"] == "ada@example.edu"
+    assert cert["error"] == "Minting failed: node down"
+
+
+def test_status_with_wrong_wallet_is_refused(client, failed_cert):
+    res = client.get(f"/api/certificates/{failed_cert['id']}",
+                     query_string={"admin_email": ADMIN[0], "admin_wallet": "0xdef"})
+    assert res.status_code == 403
+
+
+
+READER_SCRIPT = """
+import storage
+storage.open_store().put_admin("admin@example.edu", {"wallet": "0xabc", "verified": True})
+import app
+entry = app.store.add_certificate({"email": "ada@example.edu", "status": "pending"})
+res = app.app.test_client().get(
+    f"/api/certificates/{entry['id']}",
+    query_string={"admin_email": "admin@example.edu", "admin_wallet": "0xabc"},
+)
+print(res.status_code, res.get_json()["certificate"]["email"])
+"""
+
+
+def test_reader_returns_entry_to_admin(tmp_path):
+    # A fresh process, so the app module is built for the reader role only
+    env = dict(os.environ, CREDLYTIC_ROLE="reader", CREDLYTIC_PRELOAD="1",
+               CREDLYTIC_DB=str(tmp_path / "credlytic.db"))
+    out = subprocess.run([sys.executable, "-c", READER_SCRIPT], cwd=BACKEND, env=env,
+                         capture_output=True, text=True, timeout=60)
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.split()[-2:] == ["200", "ada@example.edu"]
+
+
+@pytest.mark.parametrize("role", ["reader", "issuer"])
+def test_import_does_not_load_aptos(role, tmp_path):
+    env = dict(os.environ, CREDLYTIC_ROLE=role, CREDLYTIC_PRELOAD="1",
+               CREDLYTIC_DB=str(tmp_path / "credlytic.db"))
+    out = subprocess.run(
+        [sys.executable, "-c", "import sys, app; print('aptos_sdk' in sys.modules)"],
+        cwd=BACKEND, env=env, capture_output=True, text=True, timeout=60,
+    )
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.split()[-1] == "False"
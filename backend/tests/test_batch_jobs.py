@@ -0,0 +1,56 @@
+# backend/tests/test_batch_jobs.py
+# A batch row interrupted after its certificate was stored is resumed
+# without a second certificate or a second email.
+
+import pytest
+
+import render_cache
+from batch_jobs import BatchIssuer
+from mailer import Mailer
+
+
+@pytest.fixture
+def issuer(store, monkeypatch):
+    # Lazy files: nothing is rendered, so no render processes start
+    monkeypatch.setattr(render_cache, "CERT_RENDER_MODE", "lazy")
+    issuer = BatchIssuer(store, workers=1, mailer=Mailer(store))
+    yield issuer
+    issuer.pool.shutdown(wait=True)
+
+
+def minted_row(issuer):
+    job_id = "job1"
+    with issuer.db.transaction() as c:
+        c.execute("INSERT INTO issue_jobs (id, created_at, total) VALUES (?, '', 1)", (job_id,))
+        c.execute(
+            "INSERT INTO issue_job_rows (job_id, row_no, student_name, student_email, course_name, "
+            "status, tx_hash, token_name) VALUES (?, 0, 'Ada Lovelace', 'ada@example.edu', "
+            "'Compilers', 'minted', ?, 'Certificate: Ada Lovelace #1')",
+            (job_id, "0x" + "ab" * 32),
+        )
+    return job_id
+
+
+def outbox(issuer):
+    return issuer.db.execute("SELECT cert_id FROM mail_outbox").fetchall()
+
+
+@pytest.mark.parametrize("lost", ["nothing", "outbox row"])
+def test_resume_after_certificate_stored(store, issuer, lost):
+    job_id = minted_row(issuer)
+    issuer._run_row(job_id, 0)
+    cert_id = issuer.status(job_id, limit=1)["rows"][0]["cert_id"]
+
+    # The process died after storing the certificate (and queuing its
+    # email, or not), before the row was marked done
+    with issuer.db.transaction() as c:
+        c.execute("UPDATE issue_job_rows SET status = 'rendering', owner = NULL")
+        if lost == "outbox row":
+            c.execute("DELETE FROM mail_outbox")
+    assert issuer.resume() == 1
+    issuer.pool.shutdown(wait=True)
+
+    row = issuer.status(job_id, limit=1)["rows"][0]
+    assert (row["status"], row["cert_id"]) == ("done", cert_id)
+    assert [e["id"] for e in store.iter_certificates()] == [cert_id]
+    assert [r["cert_id"] for r in outbox(issuer)] == [cert_id]
@@ -0,0 +1,111 @@
+# backend/tests/test_chain_state.py
+# ChainState against the mock node: coalescing, the persistent cache and
+# negative-entry expiry, counted in requests the node actually served.
+
+import time
+
+from aptos_sdk.account import Account
+
+from chain_state import ChainState, _addr
+from helpers import token, transfer
+from mint_engine import MintEngine
+from mock_aptos_node import MockAptosNode
+
+
+def test_saturated_window_answers_error(store):
+    # Each request takes the full timeout, one at a time
+    with MockAptosNode(latency=0.5) as node:
+        chain = ChainState(node.url, max_concurrency=1, timeout=0.2, db=store.db)
+        try:
+            busy = [chain.lookup("0x" + format(i, "064x")) for i in range(1, 5)]
+            status = chain.check("0x" + format(99, "064x"))
+            for f in busy:
+                f.result(timeout=10)
+        finally:
+            chain.stop()
+    assert status == {"status": "error", "error": "Timed out waiting for the fullnode"}
+
+
+def minted(node, n):
+    """Hashes of n committed transactions."""
+    engine = MintEngine(Account.generate(), node.url, poll_interval=0.05).start()
+    try:
+        return [f.result(timeout=30) for f in [engine.submit(transfer(i + 1)) for i in range(n)]]
+    finally:
+        engine.stop()
+
+
+def test_one_fullnode_request_per_hash(store):
+    with MockAptosNode(block_time=0.05, latency=0.1) as node:
+        hashes = minted(node, 5)
+        chain = ChainState(node.url, db=store.db)
+        try:
+            before = node.chain.lookups
+            # Every hash asked for by 8 concurrent callers
+            futures = [chain.lookup(h) for h in hashes for _ in range(8)]
+            statuses = [f.result(timeout=10) for f in futures]
+            requests = node.chain.lookups - before
+        finally:
+            chain.stop()
+    assert requests == len(hashes)
+    assert {s["status"] for s in statuses} == {"confirmed"}
+    assert chain.stats["coalesced"] == 7 * len(hashes)
+
+
+def test_final_results_are_cached_for_good(store, node):
+    tx_hash = minted(node, 1)[0]
+    chain = ChainState(node.url, negative_ttl=0.1, db=store.db)
+    try:
+        assert chain.check(tx_hash)["status"] == "confirmed"
+    finally:
+        chain.stop()
+    row = store.db.execute("SELECT expires_at FROM chain_cache WHERE tx_hash = ?", (tx_hash,)).fetchone()
+    assert row["expires_at"] is None
+
+    # A new instance, well past negative_ttl, still asks nothing
+    time.sleep(0.2)
+    before = node.chain.lookups
+    other = ChainState(node.url, negative_ttl=0.1, db=store.db)
+    assert other.check(tx_hash)["status"] == "confirmed"
+    assert node.chain.lookups == before
+    assert other.stats == {"cache_hits": 1, "requests": 0, "coalesced": 0}
+
+
+def test_not_found_expires_after_negative_ttl(store, node):
+    missing = "0x" + "ab" * 32
+    chain = ChainState(node.url, negative_ttl=0.3, db=store.db)
+    try:
+        before = node.chain.lookups
+        assert chain.check(missing)["status"] == "not_found"
+        assert chain.check(missing)["status"] == "not_found"
+        assert node.chain.lookups - before == 1
+        time.sleep(0.4)
+        chain.check(missing)
+        assert node.chain.lookups - before == 2
+    finally:
+        chain.stop()
+
+
+def test_only_issuer_tokens_in_the_collection_verify(store, node):
+    issuer, stranger = Account.generate(), Account.generate()
+    engines = [MintEngine(a, node.url, poll_interval=0.05).start() for a in (issuer, stranger)]
+    try:
+        own = engines[0].submit(token(issuer.address(), "ada@example.edu")).result(timeout=30)
+        foreign = engines[1].submit(token(stranger.address(), "ada@example.edu")).result(timeout=30)
+        elsewhere = engines[0].submit(
+            token(issuer.address(), "ada@example.edu", collection="Other")).result(timeout=30)
+    finally:
+        for e in engines:
+            e.stop()
+
+    chain = ChainState(node.url, db=store.db, issuers={_addr(str(issuer.address()))})
+    try:
+        assert chain.verify("ada@example.edu", own)[:2] == (True, None)
+        assert chain.verify("bob@example.edu", own)[:2] == (False, "Token student_id does not match")
+        assert chain.verify("ada@example.edu", foreign)[:2] == (False, "Token was not minted by the issuer")
+        assert chain.verify("ada@example.edu", elsewhere)[:2] == (
+            False, "Token is not in the Credlytic collection")
+        # No CHAIN_ISSUER_ADDRESS and no keys: nothing verifies
+        assert ChainState(node.url, db=store.db, issuers=set()).verify("ada@example.edu", own)[0] is False
+    finally:
+        chain.stop()
@@ -0,0 +1,94 @@
+# backend/tests/test_issuer_lease.py
+# One process holds the issuer lease and runs the workers; the others only
+# write rows, which the holder picks up.
+
+import time
+
+import pytest
+
+import batch_jobs
+import pipeline
+from batch_jobs import BatchIssuer
+from issuer_lease import IssuerLease
+from pipeline import IssuancePipeline
+
+
+def wait_for(check, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if check():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_one_holder_until_the_lease_expires(store):
+    events = []
+    first = IssuerLease(lambda: events.append("first"), on_lost=lambda: events.append("first lost"),
+                        lease=30)
+    second = IssuerLease(lambda: events.append("second"), lease=30)
+    second.holder = "another-process"
+
+    first.renew()
+    second.renew()
+    first.renew()
+    assert events == ["first"]
+    assert (first.held, second.held) == (True, False)
+    assert first.status()["holder"] == first.holder
+
+    # The first holder stalls past its lease
+    with first.db.transaction() as c:
+        c.execute("UPDATE worker_lease SET lease_until = 0")
+    second.renew()
+    first.renew()
+    assert events == ["first", "second", "first lost"]
+    assert (first.held, second.held) == (False, True)
+
+
+@pytest.fixture
+def fast_poll(monkeypatch):
+    monkeypatch.setattr(pipeline, "PIPELINE_POLL_INTERVAL", 0.05)
+    monkeypatch.setattr(batch_jobs, "BATCH_POLL_INTERVAL", 0.05)
+
+
+def test_pipeline_holder_mints_what_others_submit(store, fast_poll, monkeypatch):
+    minted = []
+
+    def mint_step(name, course, email):
+        minted.append(email)
+        return "0x" + "ab" * 32, f"Certificate: {name}"
+
+    monkeypatch.setattr(pipeline, "mint_step", mint_step)
+    # Stops at "minted": nothing renders or sends
+    stages = dict(mint_workers=1, render_workers=0, persist_workers=0, email_workers=0)
+    holder = IssuancePipeline(store, **stages).start()
+    other = IssuancePipeline(store, **stages)
+    try:
+        entry = other.submit("Ada Lovelace", "ada@example.edu", "Compilers")
+        assert wait_for(lambda: store.get_certificate(entry["id"])["status"] == "minted")
+        assert minted == ["ada@example.edu"]
+        assert other.stats()["stages"]["mint"]["queued"] == 0
+    finally:
+        holder.stop()
+
+
+def test_batch_holder_runs_what_others_submit(store, fast_poll):
+    holder = BatchIssuer(store, workers=1)
+    ran = []
+    holder._run_row = lambda job_id, row_no: ran.append((job_id, row_no))
+    holder.start()
+    other = BatchIssuer(store, workers=1)
+    other._run_row = lambda job_id, row_no: pytest.fail("not the lease holder")
+    try:
+        job_id = other.submit([
+            {"student_name": "Ada Lovelace", "student_email": "ada@example.edu", "course_name": "Compilers"},
+            {"student_name": "", "student_email": "x@example.edu", "course_name": "Compilers"},
+            {"student_name": "Alan Turing", "student_email": "alan@example.edu", "course_name": "Compilers"},
+        ])
+        # The invalid row is failed on submit and never run
+        assert wait_for(lambda: len(ran) == 2)
+        assert ran == [(job_id, 0), (job_id, 2)]
+    finally:
+        holder.stop()
+        holder.pool.shutdown(wait=True)
+        other.pool.shutdown(wait=True)
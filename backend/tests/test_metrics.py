@@ -0,0 +1,26 @@
+# backend/tests/test_metrics.py
+# A failing scrape-time callback is logged as a structured error and
+# drops out of the exposition instead of breaking it.
+
+import json
+
+from metrics import Callback, Registry
+from tracing import trace_context
+
+
+def test_failing_callback_logs_error(capsys):
+    registry = Registry()
+
+    def broken():
+        raise RuntimeError("queue gone")
+
+    metric = Callback("test_broken", "Always fails", broken, registry=registry)
+    with trace_context("abc123"):
+        assert metric.collect() == []
+
+    record = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+    assert record["level"] == "error"
+    assert record["event"] == "metrics_callback_failed"
+    assert record["metric"] == "test_broken"
+    assert record["error"] == "queue gone"
+    assert record["trace_id"] == "abc123"
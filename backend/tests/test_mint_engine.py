@@ -0,0 +1,104 @@
+# backend/tests/test_mint_engine.py
+# A submission whose reply is lost may still have landed: the engine must
+# adopt that transaction rather than sign the payload again, and the
+# signer pool must not retry it through another account.
+
+import httpx
+import pytest
+from aptos_sdk.account import Account
+
+from helpers import transfer
+from mint_engine import MintEngine, MintError, SignerPool
+
+
+def break_submits(engine, fault):
+    """
+    fault(n) for the n-th submit: "lost" reaches the node but the reply
+    times out, "down" fails to connect, None goes through.
+    """
+    submit = engine.client.submit_bcs_transaction
+    calls = []
+
+    async def lossy(signed):
+        calls.append(signed)
+        kind = fault(len(calls))
+        if kind == "down":
+            raise httpx.ConnectError("connection refused")
+        tx_hash = await submit(signed)
+        if kind == "lost":
+            raise httpx.ReadTimeout("reply lost")
+        return tx_hash
+
+    engine.client.submit_bcs_transaction = lossy
+    return calls
+
+
+def committed(node, engine):
+    return node.chain.account_transactions(str(engine.account.address()), 0, 100)
+
+
+def test_lost_reply_is_adopted(node):
+    engine = MintEngine(Account.generate(), node.url, poll_interval=0.05).start()
+    try:
+        # The first submit lands; by the retry it has committed (too old)
+        calls = break_submits(engine, lambda n: "lost" if n == 1 else None)
+        tx_hash = engine.submit_and_wait(transfer(), timeout=30)
+    finally:
+        engine.stop()
+
+    assert [t["hash"] for t in committed(node, engine)] == [tx_hash]
+    assert engine.stats["adopted"] == 1
+    # Never signed again
+    assert all(c.bytes() == calls[0].bytes() for c in calls)
+
+
+def test_pool_does_not_retry_an_ambiguous_failure(node):
+    engines = [MintEngine(Account.generate(), node.url, poll_interval=0.05, max_retries=2)
+               for _ in range(2)]
+    pool = SignerPool(engines).start()
+    try:
+        # The first submit lands, then the node is unreachable
+        for e in engines:
+            break_submits(e, lambda n, e=e: "lost" if n == 1 and e is engines[0] else "down")
+        pool._turn = len(engines) - 1   # first mint goes to engines[0]
+        with pytest.raises(MintError) as err:
+            pool.submit_and_wait(lambda creator: transfer(), timeout=30)
+    finally:
+        pool.stop()
+
+    assert not err.value.retry_safe
+    assert len(committed(node, engines[0])) == 1
+    assert committed(node, engines[1]) == []
+    assert pool.stats()[pool.addresses[0]]["fallbacks"] == 0
+
+
+def test_pool_falls_back_when_nothing_was_sent(node):
+    engines = [MintEngine(Account.generate(), node.url, poll_interval=0.05, max_retries=1)
+               for _ in range(2)]
+    pool = SignerPool(engines).start()
+    try:
+        break_submits(engines[0], lambda n: "down")
+        pool._turn = len(engines) - 1
+        tx_hash = pool.submit_and_wait(lambda creator: transfer(), timeout=30)
+    finally:
+        pool.stop()
+
+    assert committed(node, engines[0]) == []
+    assert [t["hash"] for t in committed(node, engines[1])] == [tx_hash]
+
+
+def test_confirmation_gives_up(node):
+    engine = MintEngine(Account.generate(), node.url, poll_interval=0.05,
+                        confirm_timeout=0.3).start()
+
+    async def unknown(p):
+        return "unknown", None
+
+    engine._check = unknown
+    try:
+        with pytest.raises(MintError, match="not confirmed") as err:
+            engine.submit_and_wait(transfer(), timeout=30)
+    finally:
+        engine.stop()
+    assert not err.value.retry_safe
+    assert engine.stats["unconfirmed"] == 1
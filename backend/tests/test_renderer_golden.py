@@ -0,0 +1,58 @@
+# backend/tests/test_renderer_golden.py
+# Rendered certificates against committed golden images. Only the text
+# band is stored (the rest must match the template untouched), so the
+# goldens stay small. After an intended layout change, regenerate with
+#
+#   UPDATE_GOLDEN=1 python -m pytest tests/test_renderer_golden.py
+
+import os
+
+import pytest
+from PIL import Image, ImageChops
+
+from renderer import CertificateRenderer
+
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+UPDATE_GOLDEN = os.getenv("UPDATE_GOLDEN") == "1"
+
+# Covers everything the renderer draws on any certificate
+TEXT_BAND = (600, 480, 2000, 860)
+
+CASES = {
+    # Fits at the design sizes; the transaction hash wraps
+    "plain": ("Ada Lovelace", "Rust 101", "0x" + "ab" * 32),
+    # Non-ASCII text, short hash on one line
+    "accented": ("José Ñúñez-Gómez", "Distributed Systems Engineering", "0xdeadbeef"),
+    # Name and course overflow and are scaled down to fit
+    "overflow": (
+        "Maximilian Alexander von Habsburg-Lothringen",
+        "Introduction to Blockchain Based Credential Verification Systems",
+        "0x" + "7e" * 40,
+    ),
+}
+
+
+@pytest.fixture(scope="module")
+def renderer():
+    return CertificateRenderer()
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_render_matches_golden(renderer, case):
+    img = renderer.render(*CASES[case])
+    band = img.crop(TEXT_BAND)
+    path = os.path.join(GOLDEN_DIR, f"{case}.png")
+
+    if UPDATE_GOLDEN:
+        os.makedirs(GOLDEN_DIR, exist_ok=True)
+        band.save(path, optimize=True)
+
+    golden = Image.open(path).convert(band.mode)
+    assert golden.size == band.size
+    assert ImageChops.difference(band, golden).getbbox() is None, f"{case} differs from {path}"
+
+    # Nothing is drawn outside the band
+    outside = img.copy()
+    outside.paste(renderer._base.convert(img.mode).crop(TEXT_BAND), TEXT_BAND[:2])
+    assert ImageChops.difference(outside, renderer._base.convert(img.mode)).getbbox() is None
@@ -0,0 +1,55 @@
+# backend/tests/test_storage.py
+# Row owners (storage.owner_id): a row claimed by a process that is gone
+# is stale even when a new process has taken over its pid.
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from mailer import Mailer
+from storage import _start_time, owner_alive, owner_id
+
+
+@pytest.fixture
+def sleeper():
+    proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    yield proc.pid
+    proc.kill()
+    proc.wait()
+
+
+def test_own_rows_from_an_earlier_process_are_stale():
+    assert owner_alive(owner_id())
+    # Same pid, earlier process: a bare pid, or another start time
+    assert not owner_alive(os.getpid())
+    assert not owner_alive(f"{os.getpid()}:earlier")
+
+
+def test_other_process_is_matched_by_start_time(sleeper):
+    started = _start_time(sleeper)
+    if started is None:
+        pytest.skip("no /proc here")
+    assert owner_alive(f"{sleeper}:{started}")
+    assert not owner_alive(f"{sleeper}:{int(started) - 1}")
+    assert owner_alive(sleeper)
+
+
+def test_dead_or_missing_owner_is_stale():
+    assert not owner_alive(None)
+    assert not owner_alive("")
+    assert not owner_alive(f"{2 ** 22 + 1}:1")
+
+
+def test_mailer_resumes_row_held_under_reused_pid(store):
+    mailer = Mailer(store)
+    try:
+        mailer.enqueue({"id": "c1", "email": "ada@example.edu"}, None)
+        with mailer.db.transaction() as c:
+            # Left 'sending' by a process that had this process's pid
+            c.execute("UPDATE mail_outbox SET status = 'sending', owner = ?", (str(os.getpid()),))
+        assert mailer.resume() == 1
+        assert mailer.status() == {"queued": 1}
+    finally:
+        mailer.stop()
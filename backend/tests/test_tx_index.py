@@ -0,0 +1,63 @@
+# backend/tests/test_tx_index.py
+# Certificates updated by another process reach an index that already
+# holds them, within its refresh interval.
+
+import subprocess
+import sys
+import time
+
+import pytest
+
+import storage
+from conftest import BACKEND
+from tx_index import TxIndex
+
+
+TX = "0x" + "ab" * 32
+
+UPDATE_SCRIPT = """
+import sys, storage
+if sys.argv[1] == "json":
+    store = storage.JsonCertificateStore(sys.argv[2], sys.argv[3])
+else:
+    store = storage.SqliteCertificateStore(sys.argv[2])
+store.update_certificate(sys.argv[4], {"status": "delivered", "email_status": "sent"})
+"""
+
+
+@pytest.fixture(params=["sqlite", "json"])
+def backend_store(request, tmp_path):
+    if request.param == "json":
+        paths = [str(tmp_path / "db.json"), str(tmp_path / "admin.json")]
+        return [request.param, *paths], storage.JsonCertificateStore(*paths)
+    path = str(tmp_path / "credlytic.db")
+    return [request.param, path, ""], storage.SqliteCertificateStore(path)
+
+
+def update_elsewhere(args, cert_id):
+    """The write comes from another process, so no listener of ours sees it."""
+    subprocess.run([sys.executable, "-c", UPDATE_SCRIPT, *args, cert_id],
+                   cwd=BACKEND, check=True, timeout=60)
+
+
+def test_other_process_updates_reach_index(backend_store):
+    args, store = backend_store
+    entry = store.add_certificate({"email": "ada@example.edu", "tx_hash": TX, "status": "rendered"})
+    index = TxIndex(store, refresh_interval=0.2)
+    index.build()
+    assert index.verify("ada@example.edu", TX)["status"] == "rendered"
+
+    update_elsewhere(args, entry["id"])
+    time.sleep(0.3)
+    found = index.verify("ada@example.edu", TX)
+    assert (found["status"], found["email_status"]) == ("delivered", "sent")
+
+
+def test_refresh_reads_only_new_writes(store):
+    index = TxIndex(store, refresh_interval=0)
+    for i in range(3):
+        store.add_certificate({"email": f"s{i}@example.edu", "tx_hash": f"0x{i:064x}"})
+    index.build()
+    assert index.refresh() == 0
+    store.update_certificate(store.find_by_tx_hash(f"0x{1:064x}")[0]["id"], {"status": "delivered"})
+    assert index.refresh() == 1
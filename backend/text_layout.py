@@ -0,0 +1,125 @@
+# backend/text_layout.py
+
+import textwrap
+import threading
+
+
+class TextLayout:
+    """
+    Font fitting and wrapping for certificate fields.
+
+    - fit_font() binary-searches the point size instead of stepping
+      down one point at a time.
+    - wrap() finds break points from cached per-glyph advance widths
+      in one forward pass, then confirms each break with a couple of
+      real textbbox measurements, so lines come out exactly as the
+      old char-by-char loop produced them.
+
+    Both assume width grows with point size and with prefix length,
+    which holds for the certificate fonts.
+    """
+
+    def __init__(self, font_for):
+        self.font_for = font_for      # size -> font
+        self._advances = {}           # (font key) -> {char: advance}
+        self._lock = threading.Lock()
+
+    # ---- measurement ----
+    @staticmethod
+    def width(draw, text, font):
+        return draw.textbbox((0, 0), text, font=font)[2]
+
+    @staticmethod
+    def _font_key(font):
+        path = getattr(font, "path", None)
+        return (path, getattr(font, "size", None)) if path else id(font)
+
+    def _advance_table(self, font):
+        key = self._font_key(font)
+        table = self._advances.get(key)
+        if table is None:
+            with self._lock:
+                table = self._advances.setdefault(key, {})
+        return table
+
+    def cumulative_advances(self, font, text):
+        """cum[k] = summed advance of text[:k], from cached glyph widths."""
+        table = self._advance_table(font)
+        cum = [0.0]
+        total = 0.0
+        for ch in text:
+            adv = table.get(ch)
+            if adv is None:
+                adv = table[ch] = font.getlength(ch)
+            total += adv
+            cum.append(total)
+        return cum
+
+    # ---- font fitting ----
+    def fit_font(self, draw, text, start_size, max_width, min_size=12):
+        """Largest size in [min_size, start_size] whose rendering fits max_width."""
+        # Common case: the text already fits at the design size
+        if self.width(draw, text, self.font_for(start_size)) <= max_width:
+            return self.font_for(start_size)
+
+        lo, hi, best = min_size, start_size - 1, None
+        while lo <= hi:
+            mid = (lo + hi) // 2
+            if self.width(draw, text, self.font_for(mid)) <= max_width:
+                best = mid
+                lo = mid + 1
+            else:
+                hi = mid - 1
+        return self.font_for(best if best is not None else min_size)
+
+    # ---- wrapping ----
+    def wrap(self, draw, text, font, max_width):
+        if not text:
+            return [""]
+
+        final = []
+        for line in textwrap.wrap(text, width=60):
+            if self.width(draw, line, font) <= max_width:
+                final.append(line)
+            else:
+                final.extend(self._break_line(draw, line, font, max_width))
+        return final
+
+    def _fits(self, draw, line, i, e, font, max_width):
+        return self.width(draw, line[i:e], font) <= max_width
+
+    def _break_line(self, draw, line, font, max_width):
+        """
+        Greedy character breaking: each segment is extended until adding
+        the next character would overflow. The first segment of a line
+        must have its first character measured; later segments always
+        start with the character that overflowed the previous one.
+        """
+        cum = self.cumulative_advances(font, line)
+        n = len(line)
+        out = []
+        i = 0
+        e = 0
+        first = True
+
+        while i < n:
+            min_len = 0 if first else 1
+            first = False
+
+            # Advance-width estimate, scanning forward only
+            e = max(e, i + min_len)
+            while e < n and cum[e + 1] - cum[i] <= max_width:
+                e += 1
+
+            # Correct the estimate with real measurements
+            while e > i + min_len and not self._fits(draw, line, i, e, font, max_width):
+                e -= 1
+            while e < n and self._fits(draw, line, i, e + 1, font, max_width):
+                e += 1
+
+            # e == i only if the first character alone overflows: the old
+            # loop emitted an empty line and started the next one with it
+            out.append(line[i:e])
+            i = e
+
+        return out
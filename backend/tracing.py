@@ -0,0 +1,59 @@
+# backend/tracing.py
+# Trace ids and structured (JSON lines) logs. A trace id is taken from
+# the X-Request-ID header or generated per request, and follows the
+# work into background stages through trace_context().
+
+import os
+import sys
+import json
+import uuid
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+
+TRACE_HEADER = "X-Request-ID"
+# LOG_REQUESTS=0 silences the per-request access lines
+LOG_REQUESTS = os.getenv("LOG_REQUESTS", "1") == "1"
+
+_trace_id = contextvars.ContextVar("trace_id", default=None)
+
+
+def new_trace_id():
+    return uuid.uuid4().hex
+
+
+def current_trace_id():
+    return _trace_id.get()
+
+
+def set_trace_id(trace_id):
+    """Sets the trace id for the current context; returns a token for reset_trace_id()."""
+    return _trace_id.set(trace_id)
+
+
+def reset_trace_id(token):
+    _trace_id.reset(token)
+
+
+@contextmanager
+def trace_context(trace_id):
+    """Runs a block (e.g. a background stage) under an existing trace id."""
+    token = _trace_id.set(trace_id or new_trace_id())
+    try:
+        yield
+    finally:
+        _trace_id.reset(token)
+
+
+def log_event(event, level="info", **fields):
+    """One JSON object per line on stdout, tagged with the current trace id."""
+    record = {
+        "ts": datetime.now(timezone.utc).isoformat(),
+        "level": level,
+        "event": event,
+        "trace_id": _trace_id.get(),
+    }
+    record.update(fields)
+    sys.stdout.write(json.dumps(record, default=str) + "\n")
+    sys.stdout.flush()
@@ -0,0 +1,204 @@
+# backend/tx_index.py
+
+import os
+import time
+import threading
+from collections import OrderedDict
+
+from storage import normalize_tx_hash
+
+
+VERIFY_CACHE_SIZE = int(os.getenv("VERIFY_CACHE_SIZE", "10000"))
+VERIFY_CACHE_TTL = float(os.getenv("VERIFY_CACHE_TTL", "300"))
+# "Not found" answers are kept briefly: another worker may issue meanwhile
+VERIFY_NEGATIVE_TTL = float(os.getenv("VERIFY_NEGATIVE_TTL", "15"))
+# How often a lookup picks up certificates other processes changed
+VERIFY_REFRESH_INTERVAL = float(os.getenv("VERIFY_REFRESH_INTERVAL", "2"))
+
+
+# ============================================================
+#                    BOUNDED LRU + TTL CACHE
+# ============================================================
+
+class LRUCache:
+    """Thread-safe LRU cache with per-entry expiry and hit/miss counters."""
+
+    _MISSING = object()
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key, self._MISSING)
+            if item is not self._MISSING:
+                value, expires = item
+                if expires > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value, ttl=None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+# ============================================================
+#                  TX HASH -> CERTIFICATE INDEX
+# ============================================================
+
+class TxIndex:
+    """
+    Normalized tx_hash -> {email: certificate} map, built once from
+    the store and kept current through the store's change listener.
+    Writes by other processes (status, file, email_status) are pulled
+    from the store's change history at most every refresh_interval
+    seconds, like AdminRegistry's reload.
+
+    verify() answers from a result cache first, then the index, and
+    only falls back to the store for hashes it has never seen (issued
+    by another worker process since the last refresh).
+    """
+
+    def __init__(self, store, cache_size=VERIFY_CACHE_SIZE, cache_ttl=VERIFY_CACHE_TTL,
+                 negative_ttl=VERIFY_NEGATIVE_TTL, refresh_interval=VERIFY_REFRESH_INTERVAL):
+        self.store = store
+        self.cache = LRUCache(cache_size, cache_ttl)
+        self.negative_ttl = negative_ttl
+        self.refresh_interval = refresh_interval
+        self._index = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        # Entries read before build() are looked up after this point
+        self._cursor = store.change_cursor()
+        self._next_refresh = 0.0
+        store.add_listener(self.on_change)
+
+    def build(self):
+        # Cursor first: a write landing during the scan is applied again
+        # by the next refresh, never missed
+        cursor = self.store.change_cursor()
+        index = {}
+        for e in self.store.iter_certificates():
+            h = normalize_tx_hash(e.get("tx_hash"))
+            if h:
+                index.setdefault(h, {})[e.get("email")] = e
+        with self._lock:
+            self._index = index
+        self._cursor = cursor
+        self._next_refresh = time.monotonic() + self.refresh_interval
+        self.cache.clear()
+        return len(index)
+
+    def refresh(self):
+        """Applies certificates written since the last refresh; returns how many."""
+        if not self._refresh_lock.acquire(blocking=False):
+            return 0    # another thread is at it
+        try:
+            self._next_refresh = time.monotonic() + self.refresh_interval
+            try:
+                entries, cursor = self.store.changes_since(self._cursor)
+            except Exception as e:
+                print("[TX INDEX ERROR]", e)
+                return 0
+            for e in entries:
+                self.on_change(e)
+            self._cursor = cursor
+            return len(entries)
+        finally:
+            self._refresh_lock.release()
+
+    def _maybe_refresh(self):
+        if time.monotonic() >= self._next_refresh:
+            self.refresh()
+
+    def on_change(self, entry):
+        h = normalize_tx_hash(entry.get("tx_hash"))
+        if not h:
+            return
+        with self._lock:
+            self._index.setdefault(h, {})[entry.get("email")] = entry
+        self.cache.pop((entry.get("email"), h))
+
+    def __len__(self):
+        return len(self._index)
+
+    def verify(self, email, tx_hash):
+        self._maybe_refresh()
+        h = normalize_tx_hash(tx_hash)
+        key = (email, h)
+
+        cached = self.cache.get(key, LRUCache._MISSING)
+        if cached is not LRUCache._MISSING:
+            return cached
+
+        by_email = self._index.get(h)
+        if by_email is None:
+            # Unknown hash: may have been issued by another process
+            for e in self.store.find_by_tx_hash(h):
+                self.on_change(e)
+            by_email = self._index.get(h, {})
+
+        entry = by_email.get(email)
+        self.cache.put(key, entry, None if entry else self.negative_ttl)
+        return entry
+
+    def verify_many(self, pairs):
+        """
+        verify() for a list of (email, tx_hash) pairs; returns entries
+        (or None) in the same order. Hashes missing from the index are
+        fetched from the store in one query, not one per pair.
+        """
+        self._maybe_refresh()
+        keys = [(email, normalize_tx_hash(tx_hash)) for email, tx_hash in pairs]
+        results = [self.cache.get(k, LRUCache._MISSING) for k in keys]
+
+        unknown = {
+            h for (_, h), r in zip(keys, results)
+            if r is LRUCache._MISSING and h not in self._index
+        }
+        if unknown:
+            for e in self.store.find_by_tx_hashes(unknown):
+                self.on_change(e)
+
+        for i, (key, r) in enumerate(zip(keys, results)):
+            if r is LRUCache._MISSING:
+                entry = self._index.get(key[1], {}).get(key[0])
+                self.cache.put(key, entry, None if entry else self.negative_ttl)
+                results[i] = entry
+        return results
@@ -0,0 +1,52 @@
+# backend/wsgi.py
+# Production entry point:
+#
+#   gunicorn -c gunicorn.conf.py wsgi:app
+#
+# gunicorn imports this once in the master (preload_app) and forks the
+# workers from it, so everything loaded here is shared copy-on-write:
+# Flask and the routes, the tx index (reader role), and for the issuer
+# role the Aptos account and the decoded certificate template and fonts.
+# Threads, sockets and processes are not safe to fork; the mint engine,
+# mailer, pipeline, chain client and render pool all start after the fork
+# (post_fork in gunicorn.conf.py), the issuer workers in the one worker
+# holding the issuer lease.
+
+import os
+import time
+
+import app as server
+
+app = server.app
+
+
+def preload():
+    t0 = time.perf_counter()
+    if server.ISSUER:
+        preload_issuer()
+    server.build_index()
+    print(f"[PRELOAD] pid {os.getpid()} ({','.join(sorted(server.roles))}) "
+          f"ready in {time.perf_counter() - t0:.2f}s")
+
+
+def preload_issuer():
+    # Loads the university account; fails here, not at the first mint,
+    # if UNIVERSITY_PRIVATE_KEY is missing
+    import admin_mint  # noqa: F401
+    from renderer import CertificateRenderer, get_renderer
+    try:
+        renderer = get_renderer()
+        # The font cache is per thread; this checks the font loads and
+        # leaves inter.ttf in the page cache for the workers' threads
+        for size in (
+            CertificateRenderer.NAME_SIZE,
+            CertificateRenderer.COURSE_SIZE,
+            CertificateRenderer.TX_SIZE,
+        ):
+            renderer.font(size)
+    except FileNotFoundError as e:
+        print("[PRELOAD ERROR]", e)
+
+
+if os.getenv("CREDLYTIC_PRELOAD") == "1":
+    preload()